@@ -1,28 +1,60 @@
 from flask import Flask
 from flask_migrate import Migrate
-from config import Config
-from extensions import db, cors
+from config import Config, env_flag
+from extensions import db, cors, jwt
+from database import configure_engines
+from replica import init_replica_routing
+from serializers import JSONProvider
 
 # Initialize extensions
 migrate = Migrate()
 
 def create_app():
     app = Flask(__name__)
+    app.json = JSONProvider(app)
     app.config.from_object(Config)
 
     # Initialize extensions
     db.init_app(app)
+    configure_engines(app)
     migrate.init_app(app, db)
+    jwt.init_app(app)
     cors(app)
 
     # Import models after initializing extensions
     import models
+    from directory import user_directory
+    user_directory.configure(app.config['USER_CACHE_SIZE'], app.config['USER_CACHE_TTL_SECONDS'])
+    from reports import report_jobs
+    report_jobs.configure(app)
+    from events import register_session_hooks
+    from versions import register_version_hooks
+    from jobs import register_job_hooks, init_job_worker
+    register_session_hooks()
+    register_version_hooks()
+    register_job_hooks()
+    init_job_worker(app)
 
     # Import and register blueprints
-    from routes import feedback_bp, user_bp, notification_bp
+    from routes import feedback_bp, user_bp, notification_bp, job_bp
+    from auth import auth_bp, init_auth
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(feedback_bp, url_prefix='/api/feedback')
     app.register_blueprint(user_bp, url_prefix='/api/users')
     app.register_blueprint(notification_bp, url_prefix='/api/notifications')
+    app.register_blueprint(job_bp, url_prefix='/api/jobs')
+    init_replica_routing(app, {feedback_bp.name, user_bp.name, notification_bp.name})
+    init_auth(app, {feedback_bp.name, user_bp.name, notification_bp.name, job_bp.name})
+
+    # Register CLI commands
+    from summaries import rebuild_summaries_command
+    from tags import rebuild_tags_command
+    from search import rebuild_search_command
+    from jobs import run_jobs_command
+    app.cli.add_command(rebuild_summaries_command)
+    app.cli.add_command(rebuild_tags_command)
+    app.cli.add_command(rebuild_search_command)
+    app.cli.add_command(run_jobs_command)
 
     # Health check endpoint
     @app.route('/api/health')
@@ -33,6 +65,8 @@ def create_app():
 
 if __name__ == '__main__':
     app = create_app()
+    # The dev server keeps the ?user_id= demo mode unless told otherwise
+    app.config['AUTH_REQUIRED'] = env_flag('AUTH_REQUIRED', 'false')
     with app.app_context():
         # Create all tables
         db.create_all()
@@ -1,10 +1,46 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
+from extensions import jwt
 from models import db, User, Feedback
+from directory import user_directory
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
 
+# Tokens carry the user id as identity and the role as a claim. current_user
+# is resolved through the user directory (a per-process LRU with TTL), so
+# authenticated requests do not query the user table.
+
+def issue_token(user):
+    return create_access_token(identity=str(user.id), additional_claims={'role': user.role})
+
+@jwt.user_lookup_loader
+def load_user(jwt_header, jwt_data):
+    return user_directory.get(int(jwt_data['sub']))
+
+@jwt.user_lookup_error_loader
+def user_not_found(jwt_header, jwt_data):
+    return jsonify({'error': 'User not found'}), 401
+
+@jwt.unauthorized_loader
+def missing_token(reason):
+    return jsonify({'error': reason}), 401
+
+@jwt.invalid_token_loader
+def invalid_token(reason):
+    return jsonify({'error': reason}), 401
+
+@jwt.expired_token_loader
+def expired_token(jwt_header, jwt_data):
+    return jsonify({'error': 'Token has expired'}), 401
+
+def init_auth(app, blueprint_names):
+    """Require a valid token on the given blueprints when AUTH_REQUIRED is set"""
+    @app.before_request
+    def authenticate():
+        if request.blueprint in blueprint_names and request.method != 'OPTIONS' and app.config['AUTH_REQUIRED']:
+            verify_jwt_in_request()
+
 @auth_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
@@ -15,7 +51,10 @@ def login():
     user = User.query.filter_by(username=data['username']).first()
     
     if user and user.check_password(data['password']):
-        access_token = create_access_token(identity=str(user.id))
+        if user.password_needs_rehash():
+            user.set_password(data['password'])
+            db.session.commit()
+        access_token = issue_token(user)
         return jsonify({
             'access_token': access_token,
             'user': user.to_dict()
@@ -53,8 +92,9 @@ def register():
     
     db.session.add(user)
     db.session.commit()
+    user_directory.invalidate(user.id)
     
-    access_token = create_access_token(identity=str(user.id))
+    access_token = issue_token(user)
     return jsonify({
         'access_token': access_token,
         'user': user.to_dict()
@@ -102,6 +142,7 @@ def create_demo_users():
         }
     ]
     
+    team = []
     for emp_data in employees:
         employee = User(
             username=emp_data['username'],
@@ -111,6 +152,7 @@ def create_demo_users():
         )
         employee.set_password('password123')
         db.session.add(employee)
+        team.append(employee)
     
     db.session.commit()
     
@@ -118,21 +160,21 @@ def create_demo_users():
     sample_feedback = [
         {
             'giver_id': manager.id,
-            'receiver_id': manager.team_members[0].id,
+            'receiver_id': team[0].id,
             'strengths': 'Excellent communication skills and strong technical knowledge. Always meets deadlines and helps team members.',
             'areas_to_improve': 'Could take more initiative in leading team discussions and presenting ideas.',
             'sentiment': 'positive'
         },
         {
             'giver_id': manager.id,
-            'receiver_id': manager.team_members[1].id,
+            'receiver_id': team[1].id,
             'strengths': 'Great problem-solving abilities and attention to detail. Very reliable team player.',
             'areas_to_improve': 'Could improve time management and prioritize tasks better.',
             'sentiment': 'positive'
         },
         {
             'giver_id': manager.id,
-            'receiver_id': manager.team_members[2].id,
+            'receiver_id': team[2].id,
             'strengths': 'Creative thinker with innovative ideas. Good at brainstorming sessions.',
             'areas_to_improve': 'Needs to improve documentation skills and follow up on action items.',
             'sentiment': 'neutral'
@@ -0,0 +1,303 @@
+"""Benchmark every API route at several data sizes against stored budgets.
+
+Seeds a throwaway SQLite database with seed.py for each size, then drives
+every route of the feedback, users and notifications blueprints through
+the Flask test client. For each scenario it records p50/p95/p99 latency
+(reads get one warm-up request first), the most SQL statements any one
+request issued, and the peak Python memory (tracemalloc) of one request.
+It prints a table and exits with status 1 when a scenario exceeds its
+statement, median latency or memory budget in budgets.json, when its
+statement count changes with data size (an N+1 query), or when a route
+has no scenario.
+
+Statement counts are deterministic; timings depend on the machine and
+its load, so latency budgets are on the median with generous headroom.
+On machines where even that is unreliable, --warn-timing reports latency
+and memory overruns as warnings instead of failing on them.
+
+    python benchmarks/endpoints.py [--sizes small medium] [--runs 50]
+        [--only dashboard search] [--warn-timing] [--update-budgets]
+
+--update-budgets rewrites budgets.json from this run: the measured
+statement counts, plus headroom on median latency and memory.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BUDGETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'budgets.json')
+BLUEPRINTS = ('feedback', 'users', 'notifications')
+
+# Arguments for seed_synthetic() at each size
+SIZES = {
+    'small': {'users': 200, 'feedback_per_user': 5},
+    'medium': {'users': 2000, 'feedback_per_user': 10},
+    'large': {'users': 20000, 'feedback_per_user': 10},
+}
+
+# Latency (median) and memory budgets are the measured value times this
+LATENCY_HEADROOM = 5
+MEMORY_HEADROOM = 2
+
+_ITEMS = [
+    {'receiver_id': '{busiest_receiver_id}', 'strengths': 'Benchmark strengths', 'areas_to_improve': 'Benchmark areas'}
+] * 10
+
+# (name, endpoint, method, path, json body). Paths and bodies are filled in
+# from the seed manifest; reads come before writes so reads see seeded data.
+SCENARIOS = [
+    ('feedback list', 'feedback.get_all_feedback', 'GET', '/api/feedback/', None),
+    ('feedback list, team', 'feedback.get_all_feedback', 'GET', '/api/feedback/?team_id={team_manager_id}', None),
+    ('feedback list, receiver', 'feedback.get_all_feedback', 'GET', '/api/feedback/?receiver_id={busiest_receiver_id}', None),
+    ('feedback export', 'feedback.export_feedback', 'GET', '/api/feedback/export?receiver_id={busiest_receiver_id}', None),
+    ('dashboard', 'feedback.get_dashboard', 'GET', '/api/feedback/dashboard', None),
+    ('dashboard, team', 'feedback.get_dashboard', 'GET', '/api/feedback/dashboard?team_id={team_manager_id}', None),
+    ('requests', 'feedback.get_feedback_requests', 'GET', '/api/feedback/requests', None),
+    ('comments', 'feedback.get_comments', 'GET', '/api/feedback/{busiest_feedback_id}/comments', None),
+    ('feedback pdf', 'feedback.export_feedback_pdf', 'GET', '/api/feedback/{busiest_feedback_id}/export', None),
+    ('report status', 'feedback.get_report_status', 'GET', '/api/feedback/reports/{report_id}', None),
+    ('report download', 'feedback.download_report', 'GET', '/api/feedback/reports/{report_id}/download', None),
+    ('by tags', 'feedback.get_feedback_by_tags', 'GET', '/api/feedback/by-tags?tags=mentoring,ownership', None),
+    ('search', 'feedback.search_feedback_text', 'GET', '/api/feedback/search?q=documentation+release', None),
+    ('search, receiver', 'feedback.search_feedback_text', 'GET',
+     '/api/feedback/search?q=documentation&receiver_id={busiest_receiver_id}', None),
+    ('tags', 'feedback.get_tag_counts', 'GET', '/api/feedback/tags', None),
+    ('team', 'feedback.get_team_members', 'GET', '/api/feedback/team?team_id={team_manager_id}', None),
+    ('users', 'users.get_all_users', 'GET', '/api/users/', None),
+    ('users, org', 'users.get_all_users', 'GET', '/api/users/?manager_id={team_manager_id}&transitive=true', None),
+    ('user', 'users.get_user', 'GET', '/api/users/{busiest_receiver_id}', None),
+    ('notifications', 'notifications.get_notifications', 'GET', '/api/notifications/?user_id={busiest_receiver_id}', None),
+    ('inbox', 'notifications.get_inbox', 'GET', '/api/notifications/inbox?user_id={busiest_receiver_id}', None),
+    ('poll', 'notifications.poll_inbox', 'GET', '/api/notifications/poll?user_id={busiest_receiver_id}&after=0', None),
+    ('unread count', 'notifications.get_unread_count', 'GET',
+     '/api/notifications/unread-count?user_id={busiest_receiver_id}', None),
+    ('create feedback', 'feedback.create_feedback', 'POST', '/api/feedback/',
+     {'receiver_id': '{busiest_receiver_id}', 'strengths': 'Benchmark strengths', 'areas_to_improve': 'Benchmark areas',
+      'sentiment': 'positive', 'tags': ['teamwork']}),
+    ('bulk feedback', 'feedback.create_feedback_batch', 'POST', '/api/feedback/bulk', {'items': _ITEMS}),
+    ('request feedback', 'feedback.request_feedback', 'POST', '/api/feedback/request',
+     {'receiver_id': '{busiest_receiver_id}', 'message': 'Benchmark request'}),
+    ('bulk requests', 'feedback.request_feedback_batch', 'POST', '/api/feedback/requests/bulk',
+     {'items': [{'receiver_id': '{busiest_receiver_id}', 'message': 'Benchmark request'}] * 10}),
+    ('add comment', 'feedback.add_comment', 'POST', '/api/feedback/{busiest_feedback_id}/comments',
+     {'user_id': '{root_user_id}', 'content': 'Benchmark comment'}),
+    ('acknowledge', 'feedback.acknowledge_feedback', 'PUT', '/api/feedback/{unacknowledged_id}/acknowledge', None),
+    ('create report', 'feedback.create_report', 'POST', '/api/feedback/reports', {'receiver_id': '{busiest_receiver_id}'}),
+    ('update user', 'users.update_user', 'PUT', '/api/users/{busiest_receiver_id}',
+     {'email': 'user{busiest_receiver_id}@example.com'}),
+    ('mark all read', 'notifications.mark_notifications_read', 'PUT',
+     '/api/notifications/read?user_id={busiest_receiver_id}', {'all': True}),
+    ('mark read', 'notifications.mark_notification_read', 'PUT', '/api/notifications/{notification_id}/read', None),
+    ('create notification', 'notifications.create_notification', 'POST', '/api/notifications/',
+     {'user_id': '{busiest_receiver_id}', 'title': 'Benchmark', 'message': 'Benchmark notification'}),
+]
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def fill(value, ids):
+    """Substitute manifest ids into a path or JSON body; '{name}' alone becomes an int"""
+    if isinstance(value, str):
+        if value.startswith('{') and value.endswith('}') and value[1:-1] in ids:
+            return ids[value[1:-1]]
+        return value.format(**ids)
+    if isinstance(value, list):
+        return [fill(item, ids) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, ids) for key, item in value.items()}
+    return value
+
+def uncovered_endpoints(app):
+    """Routes of the benchmarked blueprints that no scenario drives"""
+    covered = {endpoint for _, endpoint, _, _, _ in SCENARIOS}
+    return sorted(
+        rule.endpoint for rule in app.url_map.iter_rules()
+        if rule.endpoint.split('.')[0] in BLUEPRINTS and rule.endpoint not in covered
+    )
+
+def prepare(app, client, ids):
+    """Ids the scenarios need beyond the seed manifest"""
+    from extensions import db
+    from models import Feedback, Notification
+    from reports import report_jobs
+    from versions import bump_versions
+
+    with app.app_context():
+        # Every table has its version row, so no write scenario pays for
+        # the first-write INSERT and counts do not depend on run order
+        bump_versions(list(db.metadata.tables))
+        db.session.commit()
+        spec = {'feedback_id': ids['busiest_feedback_id']}
+        report_jobs.get_or_render(spec)
+        ids['report_id'] = client.post('/api/feedback/reports', json=spec).json['job_id']
+        # The first request does the write; the rest are no-ops
+        ids['unacknowledged_id'] = (
+            Feedback.query.filter(Feedback.acknowledged.is_(False))
+            .order_by(Feedback.id.desc()).first().id
+        )
+        ids['notification_id'] = (
+            Notification.query.filter_by(user_id=ids['busiest_receiver_id'])
+            .order_by(Notification.id.desc()).first().id
+        )
+
+def request_once(client, method, path, body):
+    response = client.open(path, method=method, json=body)
+    if response.status_code >= 400:
+        raise RuntimeError(f'{method} {path} returned {response.status_code}: {response.data[:200]}')
+
+def measure(client, statements, method, path, body, runs):
+    """Latencies (ms), most statements per request, and peak KiB of one request"""
+    latencies, most = [], 0
+    if method == 'GET':
+        # Warm up; a write's first request may be the only one that writes
+        request_once(client, method, path, body)
+    for _ in range(runs):
+        statements[0] = 0
+        started = time.perf_counter()
+        request_once(client, method, path, body)
+        latencies.append((time.perf_counter() - started) * 1000)
+        most = max(most, statements[0])
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    request_once(client, method, path, body)
+    peak = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    return latencies, most, peak / 1024
+
+def check(result, budget, size):
+    """Budget violations of one measured scenario, as (statement problems,
+    latency and memory problems)"""
+    problems, timing = [], []
+    if result['queries'] > budget['queries']:
+        problems.append(f"{result['queries']} statements > {budget['queries']}")
+    if size in budget.get('p50_ms', {}) and result['p50'] > budget['p50_ms'][size]:
+        timing.append(f"p50 {result['p50']:.1f} ms > {budget['p50_ms'][size]}")
+    if size in budget.get('peak_kib', {}) and result['peak_kib'] > budget['peak_kib'][size]:
+        timing.append(f"peak {result['peak_kib']:.0f} KiB > {budget['peak_kib'][size]}")
+    return problems, timing
+
+def updated_budgets(budgets, results):
+    """Budgets rebuilt from the measured results, keeping sizes not run"""
+    for (size, name), result in results.items():
+        budget = budgets.setdefault(name, {'queries': 0, 'p50_ms': {}, 'peak_kib': {}})
+        budget['queries'] = max(
+            result['queries'] for (_, other), result in results.items() if other == name
+        )
+        budget['p50_ms'][size] = round(max(result['p50'] * LATENCY_HEADROOM, 5), 1)
+        budget['peak_kib'][size] = int(max(result['peak_kib'] * MEMORY_HEADROOM, 256))
+    return budgets
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', default=['small', 'medium'], choices=list(SIZES),
+                        help='data sizes to run')
+    parser.add_argument('--runs', type=int, default=50, help='timed requests per scenario')
+    parser.add_argument('--only', nargs='+', help='run only scenarios whose name starts with one of these')
+    parser.add_argument('--seed', type=int, default=42, help='seed for the synthetic data')
+    parser.add_argument('--warn-timing', action='store_true',
+                        help='report latency and memory overruns as warnings instead of failing')
+    parser.add_argument('--update-budgets', action='store_true', help='write budgets.json from this run')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'endpoints.db')}"
+    os.environ['REPORT_CACHE_DIR'] = os.path.join(workdir, 'reports')
+    os.environ['JOBS_WORKERS'] = '0'
+    os.environ['AUTH_REQUIRED'] = 'false'
+
+    from sqlalchemy import event
+    from app import create_app
+    from extensions import db
+    from directory import user_directory
+    from seed import seed_synthetic
+
+    app = create_app()
+    client = app.test_client()
+    statements = [0]
+
+    def count(*_):
+        statements[0] += 1
+
+    with app.app_context():
+        for engine in db.engines.values():
+            event.listen(engine, 'before_cursor_execute', count)
+
+    scenarios = [
+        scenario for scenario in SCENARIOS
+        if not args.only or any(scenario[0].startswith(prefix) for prefix in args.only)
+    ]
+    budgets = {}
+    if os.path.exists(BUDGETS):
+        with open(BUDGETS) as f:
+            budgets = json.load(f)
+
+    failures = [f'{endpoint}: no scenario' for endpoint in uncovered_endpoints(app)]
+    results = {}
+    for size in args.sizes:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            started = time.perf_counter()
+            ids = seed_synthetic(seed=args.seed, log=lambda message: None, **SIZES[size])
+            user_directory.clear()
+        prepare(app, client, ids)
+        print(f"\n=== {size}: {ids['users']} users, {ids['feedback']} feedback, {ids['comments']} comments, "
+              f"{ids['notifications']} notifications (seeded in {time.perf_counter() - started:.1f}s) ===")
+        print(f"{'scenario':<26} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'SQL':>4} {'peak KiB':>9}")
+
+        for name, endpoint, method, path, body in scenarios:
+            # Start cold so the statement count includes the user lookups
+            user_directory.clear()
+            latencies, queries, peak_kib = measure(
+                client, statements, method, fill(path, ids), fill(body, ids), args.runs
+            )
+            result = results[size, name] = {
+                'p50': percentile(latencies, 0.5), 'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99), 'queries': queries, 'peak_kib': peak_kib
+            }
+            if args.update_budgets:
+                status = ''
+            elif name not in budgets:
+                status = 'no budget'
+            else:
+                problems, timing = check(result, budgets[name], size)
+                if not args.warn_timing:
+                    problems += timing
+                failures.extend(f'{size} {name}: {problem}' for problem in problems)
+                status = '; '.join(problems + [f'warning: {problem}' for problem in timing if problem not in problems])
+                status = status or 'ok'
+            print(f"{name:<26} {result['p50']:8.1f} {result['p95']:8.1f} {result['p99']:8.1f} "
+                  f"{queries:4d} {peak_kib:9.0f}  {status}")
+
+    if not args.update_budgets:
+        failures.extend(f'{name}: no budget in budgets.json' for name, *_ in scenarios if name not in budgets)
+
+    # The same route issuing more statements on more data is an N+1 query
+    for name, *_ in scenarios:
+        counts = {size: results[size, name]['queries'] for size in args.sizes}
+        if len(set(counts.values())) > 1:
+            failures.append(f'{name}: statement count grows with data size {counts}')
+
+    if args.update_budgets:
+        with open(BUDGETS, 'w') as f:
+            json.dump(updated_budgets(budgets, results), f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'\nWrote {BUDGETS}')
+
+    if failures:
+        print('\nFAILED')
+        for failure in failures:
+            print(f'  {failure}')
+        sys.exit(1)
+    print('\nAll scenarios within budget')
+
+if __name__ == '__main__':
+    main()
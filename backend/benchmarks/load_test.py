@@ -0,0 +1,116 @@
+"""Compare requests/sec of the Werkzeug dev server and gunicorn.
+
+Seeds a throwaway SQLite database with init_db, starts each server in a
+subprocess on a free port, and drives a fixed mix of GET endpoints from a
+pool of client threads for a fixed duration.
+
+    python benchmarks/load_test.py [--seconds 10] [--clients 16] [--workers 4]
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PATHS = [
+    '/api/health',
+    '/api/feedback/',
+    '/api/feedback/dashboard',
+    '/api/feedback/team',
+    '/api/users/',
+    '/api/notifications/',
+]
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def wait_until_up(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + '/api/health', timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server at {base_url} did not start')
+
+def drive(base_url, seconds, clients):
+    """Hit PATHS round-robin from many threads; returns (count, errors, latencies)"""
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    stop_at = time.time() + seconds
+
+    def client(offset):
+        local = []
+        i = offset
+        while time.time() < stop_at:
+            started = time.perf_counter()
+            try:
+                urllib.request.urlopen(base_url + PATHS[i % len(PATHS)], timeout=10).read()
+                local.append(time.perf_counter() - started)
+            except OSError:
+                with lock:
+                    errors[0] += 1
+            i += 1
+        with lock:
+            latencies.extend(local)
+
+    with ThreadPoolExecutor(clients) as pool:
+        list(pool.map(client, range(clients)))
+    return len(latencies), errors[0], latencies
+
+def run(name, command, env, base_url, args):
+    process = subprocess.Popen(command, cwd=BACKEND, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_up(base_url)
+        count, errors, latencies = drive(base_url, args.seconds, args.clients)
+    finally:
+        process.terminate()
+        process.wait()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0
+    print(f'{name:>10}: {count / args.seconds:8.1f} req/s  '
+          f'p50 {statistics.median(latencies) * 1000 if latencies else 0:6.1f} ms  '
+          f'p99 {p99 * 1000:6.1f} ms  errors {errors}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=10)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'load.db')
+    env['AUTH_REQUIRED'] = 'false'
+    subprocess.run([sys.executable, 'init_db.py'], cwd=BACKEND, env=env,
+                   check=True, stdout=subprocess.DEVNULL)
+
+    port = free_port()
+    dev_server = (
+        'from app import create_app\n'
+        f'create_app().run(host="127.0.0.1", port={port}, debug=False, threaded=True)'
+    )
+    run('dev server', [sys.executable, '-c', dev_server], env, f'http://127.0.0.1:{port}', args)
+
+    port = free_port()
+    gunicorn_env = dict(env, PORT=str(port), WEB_CONCURRENCY=str(args.workers),
+                        GUNICORN_THREADS=str(args.threads), GUNICORN_ACCESS_LOG='')
+    run('gunicorn', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        gunicorn_env, f'http://127.0.0.1:{port}', args)
+
+if __name__ == '__main__':
+    main()
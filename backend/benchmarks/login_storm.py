@@ -0,0 +1,104 @@
+"""Simulate a login storm (everyone signing in on Monday morning).
+
+Fires --logins POST /api/auth/login requests from --concurrency threads at
+a throwaway SQLite database, once per password-hash method, then makes one
+authenticated GET per token to show that token checks stay off the user
+table. Prints p50/p99 latency and throughput for each method.
+
+    python benchmarks/login_storm.py [--logins 1000] [--concurrency 8]
+        [--methods pbkdf2:sha256:600000 pbkdf2:sha256:100000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PASSWORD = 'password123'
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+def storm(client, requests, concurrency):
+    """Run (method, url, kwargs) requests concurrently; returns latencies and wall time"""
+    def timed(spec):
+        method, url, kwargs = spec
+        started = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            raise RuntimeError(f'{url} returned {response.status_code}: {response.data[:200]}')
+        return elapsed, response
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(timed, requests))
+    return results, time.perf_counter() - started
+
+def report(label, results, wall):
+    latencies = [elapsed * 1000 for elapsed, _ in results]
+    print(
+        f'{label:<40} p50 {percentile(latencies, 0.5):8.1f} ms  p99 {percentile(latencies, 0.99):8.1f} ms'
+        f'  {len(results) / wall:8.1f} req/s'
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--logins', type=int, default=1000, help='login requests per method')
+    parser.add_argument('--users', type=int, default=200, help='distinct accounts')
+    parser.add_argument('--concurrency', type=int, default=8, help='client threads')
+    parser.add_argument('--methods', nargs='+', default=['pbkdf2:sha256:600000', 'pbkdf2:sha256:100000'],
+                        help='PASSWORD_HASH_METHOD values to compare')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'logins.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    os.environ['JOBS_WORKERS'] = '0'
+
+    from werkzeug.security import generate_password_hash
+    from app import create_app
+    from extensions import db
+    from models import User
+
+    app = create_app()
+    client = app.test_client()
+    rand = random.Random(42)
+    with app.app_context():
+        db.create_all()
+
+    print(f'{args.logins} logins over {args.users} accounts, {args.concurrency} client threads\n')
+    for method in args.methods:
+        app.config['PASSWORD_HASH_METHOD'] = method
+        with app.app_context():
+            # One hash shared by every account keeps setup fast
+            password_hash = generate_password_hash(PASSWORD, method=method)
+            User.query.delete()
+            db.session.bulk_insert_mappings(User, [
+                {'username': f'user{i}', 'email': f'user{i}@example.com', 'role': 'employee',
+                 'password_hash': password_hash}
+                for i in range(args.users)
+            ])
+            db.session.commit()
+
+        logins = [
+            ('POST', '/api/auth/login', {'json': {'username': f'user{rand.randrange(args.users)}', 'password': PASSWORD}})
+            for _ in range(args.logins)
+        ]
+        results, wall = storm(client, logins, args.concurrency)
+        report(f'login ({method})', results, wall)
+
+        tokens = [response.json['access_token'] for _, response in results]
+        reads = [
+            ('GET', '/api/notifications/unread-count', {'headers': {'Authorization': f'Bearer {token}'}})
+            for token in tokens
+        ]
+        results, wall = storm(client, reads, args.concurrency)
+        report('  authenticated GET with its token', results, wall)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Show SQLite query plans and timings for the hot list queries.
+
+Builds a throwaway database, fills it with a synthetic org (seed.py),
+then runs each query shape used by the list endpoints twice: once with
+the indexes from the 'add indexes' migration dropped, and once with them
+in place.
+
+    python benchmarks/query_plans.py [--feedback 50000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+# Query shapes issued by routes.py, with the cursor/filter values inlined
+QUERIES = {
+    'feedback page': """
+        SELECT * FROM feedback
+        ORDER BY created_at DESC, id DESC LIMIT 51""",
+    'feedback by receiver': """
+        SELECT * FROM feedback WHERE receiver_id = :user_id
+        ORDER BY created_at DESC, id DESC LIMIT 51""",
+    'feedback received by users': """
+        SELECT * FROM feedback WHERE receiver_id IN (:user_id, :user_id + 1, :user_id + 2)
+        ORDER BY created_at, id""",
+    'comments for feedback page': """
+        SELECT * FROM comment WHERE feedback_id IN (:feedback_id, :feedback_id + 1, :feedback_id + 2)
+        ORDER BY created_at, id""",
+    'unread notifications for user': """
+        SELECT * FROM notification WHERE user_id = :user_id AND read = 0
+        ORDER BY created_at DESC, id DESC LIMIT 51""",
+    'requests for receiver': """
+        SELECT * FROM feedback_request WHERE receiver_id = :user_id
+        ORDER BY created_at DESC, id DESC LIMIT 51""",
+    'team members': """
+        SELECT * FROM user WHERE manager_id = :user_id""",
+}
+
+def seed(db, feedback_count):
+    """Fill the database with a synthetic org, ten feedback items per user (see seed.py)"""
+    from seed import seed_synthetic
+    seed_synthetic(users=max(feedback_count // 10, 10), feedback_per_user=10, log=lambda message: None)
+
+def report(db, label, runs):
+    """Print the plan and mean time of every query"""
+    params = {'user_id': 20, 'feedback_id': 100}
+    print(f'\n=== {label} ===')
+    for name, sql in QUERIES.items():
+        plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql), params).all()
+        started = time.perf_counter()
+        for _ in range(runs):
+            db.session.execute(text(sql), params).all()
+        elapsed = (time.perf_counter() - started) / runs * 1000
+        print(f'\n{name}: {elapsed:.3f} ms')
+        for row in plan:
+            print(f'    {row[-1]}')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--feedback', type=int, default=50000, help='number of feedback rows')
+    parser.add_argument('--runs', type=int, default=20, help='timed runs per query')
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'plans.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+
+    from app import create_app
+    from extensions import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        seed(db, args.feedback)
+
+        indexes = [
+            index
+            for table in db.metadata.sorted_tables
+            for index in table.indexes
+            if table.name != 'feedback_tag'
+        ]
+        for index in indexes:
+            index.drop(db.engine)
+        db.session.execute(text('ANALYZE'))
+        report(db, 'without indexes', args.runs)
+
+        for index in indexes:
+            index.create(db.engine)
+        db.session.execute(text('ANALYZE'))
+        report(db, 'with indexes', args.runs)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""Measure rows/sec serialised for the feedback list response.
+
+Compares the per-route dict building the handlers used to do, encoded with
+the stdlib json module (Flask's default provider), against the compiled
+schemas in serializers.py encoded by the app's JSON provider (orjson when
+it is installed). Rows are built in memory, so only serialisation is timed.
+
+    python benchmarks/serialization.py [--rows 5000] [--runs 20]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://')
+
+def build_rows(count):
+    """Transient feedback rows with three comments each"""
+    from models import Feedback, Comment
+
+    start = datetime(2024, 1, 1)
+    feedback_list, comments = [], {}
+    for i in range(1, count + 1):
+        feedback = Feedback(
+            id=i, giver_id=i % 50 + 1, receiver_id=(i + 7) % 50 + 1,
+            strengths='Clear communication and steady delivery ' * 3,
+            areas_to_improve='Delegate more and document decisions ' * 3,
+            sentiment='positive', tags=['leadership', 'communication'],
+            created_at=start + timedelta(minutes=i)
+        )
+        feedback_list.append(feedback)
+        comments[i] = [
+            Comment(id=i * 3 + j, feedback_id=i, user_id=j + 1, content='Agreed, well put.',
+                    created_at=start + timedelta(minutes=i, seconds=j))
+            for j in range(3)
+        ]
+    names = {user_id: f'user{user_id}' for user_id in range(1, 52)}
+    return feedback_list, comments, names
+
+def hand_built(feedback_list, comments, names):
+    """The loop get_all_feedback used before serializers.py"""
+    result = []
+    for feedback in feedback_list:
+        feedback_data = {
+            'id': feedback.id,
+            'strengths': feedback.strengths,
+            'areas_to_improve': feedback.areas_to_improve,
+            'sentiment': feedback.sentiment,
+            'tags': feedback.tags if feedback.tags else [],
+            'giver_name': names.get(feedback.giver_id),
+            'receiver_name': names.get(feedback.receiver_id),
+            'created_at': feedback.created_at.isoformat(),
+            'comments': []
+        }
+        for comment in comments[feedback.id]:
+            feedback_data['comments'].append({
+                'id': comment.id,
+                'content': comment.content,
+                'author_name': names.get(comment.user_id),
+                'created_at': comment.created_at.isoformat()
+            })
+        result.append(feedback_data)
+    return result
+
+def timed(fn, runs):
+    """Best wall time of fn over runs, with the garbage collector paused"""
+    best = float('inf')
+    gc.disable()
+    try:
+        for _ in range(runs):
+            started = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - started)
+    finally:
+        gc.enable()
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=5000, help='feedback rows per run')
+    parser.add_argument('--runs', type=int, default=20, help='timed runs per case')
+    args = parser.parse_args()
+
+    from app import create_app
+    import serializers
+    from serializers import feedback_item_schema
+
+    app = create_app()
+    with app.app_context():
+        feedback_list, comments, names = build_rows(args.rows)
+        context = {'names': names, 'comments': comments}
+        provider = app.json
+
+        def stdlib_dumps(obj):
+            return json.dumps(obj, default=provider.default, ensure_ascii=True, sort_keys=True, separators=(',', ':'))
+
+        cases = {
+            'dicts: hand-built': lambda: hand_built(feedback_list, comments, names),
+            'dicts: compiled schema': lambda: feedback_item_schema.dump_many(feedback_list, context),
+            'dicts: schema, ?fields=id,sentiment': lambda: feedback_item_schema.dump_many(
+                feedback_list, context, frozenset(('id', 'sentiment'))),
+            'encode+dicts: before (hand-built, stdlib json)': lambda: stdlib_dumps(
+                hand_built(feedback_list, comments, names)),
+            f'encode+dicts: after (schema, {"orjson" if serializers.orjson else "stdlib json"})': lambda: provider.dumps(
+                feedback_item_schema.dump_many(feedback_list, context)),
+        }
+
+        if hand_built(feedback_list, comments, names) != feedback_item_schema.dump_many(feedback_list, context):
+            sys.exit('schema output differs from the hand-built dicts')
+
+        print(f'{args.rows} feedback rows (3 comments each), best of {args.runs} runs\n')
+        for label, fn in cases.items():
+            elapsed = timed(fn, args.runs)
+            print(f'{label:<52} {args.rows / elapsed:>12,.0f} rows/s  {elapsed * 1000:8.2f} ms')
+
+if __name__ == '__main__':
+    main()
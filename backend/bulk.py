@@ -0,0 +1,160 @@
+from datetime import datetime
+from sqlalchemy import insert
+from extensions import db
+from models import User, Feedback, FeedbackTag, FeedbackRequest
+from events import queue_notifications
+from summaries import SENTIMENTS, record_feedback_rows, record_request_rows
+from tags import normalize_tags, tags_error
+
+# Bulk submission for review cycles: validate every item up front, then
+# insert all valid rows, their tags and summary counters with executemany
+# in the caller's transaction, and queue one job for their notifications.
+
+def _is_id(value):
+    # bool is a subclass of int, but True is not a user id
+    return isinstance(value, int) and not isinstance(value, bool)
+
+def _field_error(item, ids=(), text=(), choices=None):
+    """The first field of an item with a value of the wrong type or outside
+    its allowed values, as an error message"""
+    for field in ids:
+        if field in item and not _is_id(item[field]):
+            return f'{field} must be an integer'
+    for field in text:
+        if field in item and not isinstance(item[field], str):
+            return f'{field} must be a string'
+    for field, allowed in (choices or {}).items():
+        if field in item and item[field] not in allowed:
+            return f'{field} must be one of {", ".join(allowed)}'
+    return None
+
+def feedback_item_error(item):
+    """Why a feedback item's fields are invalid, or None"""
+    return _field_error(
+        item, ('giver_id', 'receiver_id'), ('strengths', 'areas_to_improve'), {'sentiment': SENTIMENTS}
+    ) or tags_error(item.get('tags', []))
+
+def request_item_error(item):
+    """Why a feedback request item's fields are invalid, or None"""
+    return _field_error(item, ('requester_id', 'receiver_id'), ('message', 'priority'))
+
+def _validate(items, required, user_fields, item_error):
+    """Split items into (index, item) pairs that passed and per-item errors"""
+    user_ids = {
+        item.get(field) for item in items if isinstance(item, dict)
+        for field in user_fields if _is_id(item.get(field))
+    }
+    known_users = {
+        user_id for (user_id,) in
+        db.session.query(User.id).filter(User.id.in_(user_ids))
+    } if user_ids else set()
+
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            error = 'Item must be an object'
+        elif not all(item.get(key) for key in required):
+            error = 'Missing required fields'
+        else:
+            # Types first: only integer ids can be looked up in known_users
+            error = item_error(item)
+            if not error and any(field in item and item[field] not in known_users for field in user_fields):
+                error = 'Unknown user'
+        if error:
+            errors[index] = error
+        else:
+            valid.append((index, item))
+    return valid, errors
+
+def _results(items, ids, errors):
+    """Per-item outcome in submission order"""
+    results = []
+    for index in range(len(items)):
+        if index in errors:
+            results.append({'index': index, 'status': 'error', 'error': errors[index]})
+        else:
+            results.append({'index': index, 'status': 'created', 'id': ids[index]})
+    return results
+
+def _insert(model, rows):
+    """Batched multi-row INSERT ... RETURNING; stores each new id on its row"""
+    # Asking SQLAlchemy to keep RETURNING in parameter order makes SQLite
+    # fall back to one INSERT per row. Ids handed out by our own sequential
+    # batches only ever increase, so sorting them restores the order.
+    new_ids = sorted(db.session.scalars(insert(model).returning(model.id), rows))
+    for row, new_id in zip(rows, new_ids):
+        row['id'] = new_id
+
+def create_feedback_bulk(items, default_giver_id):
+    """Insert many feedback items; returns per-item results"""
+    valid, errors = _validate(
+        items, ['receiver_id', 'strengths', 'areas_to_improve'], ['giver_id', 'receiver_id'], feedback_item_error
+    )
+    now = datetime.utcnow()
+
+    rows = [{
+        'giver_id': item.get('giver_id', default_giver_id),
+        'receiver_id': item['receiver_id'],
+        'strengths': item['strengths'],
+        'areas_to_improve': item['areas_to_improve'],
+        'sentiment': item.get('sentiment', 'neutral'),
+        'acknowledged': False,
+        'tags': normalize_tags(item.get('tags', [])),
+        'created_at': now,
+        'updated_at': now
+    } for _, item in valid]
+
+    ids = {}
+    if rows:
+        _insert(Feedback, rows)
+        tag_rows = [{'feedback_id': row['id'], 'tag': tag} for row in rows for tag in row['tags']]
+        if tag_rows:
+            db.session.execute(insert(FeedbackTag), tag_rows)
+        record_feedback_rows(rows)
+        queue_notifications([{
+            'user_id': row['receiver_id'],
+            'title': 'New Feedback Received',
+            'message': f'You have received new {row["sentiment"]} feedback',
+            'type': 'feedback'
+        } for row in rows])
+        ids = {index: row['id'] for (index, _), row in zip(valid, rows)}
+
+    return _results(items, ids, errors)
+
+def create_requests_bulk(items, default_requester_id):
+    """Insert many feedback requests; returns per-item results"""
+    valid, errors = _validate(items, ['receiver_id'], ['requester_id', 'receiver_id'], request_item_error)
+    now = datetime.utcnow()
+
+    accepted, rows = [], []
+    for index, item in valid:
+        try:
+            due_date = datetime.fromisoformat(item['due_date']) if item.get('due_date') else None
+        except (TypeError, ValueError):
+            errors[index] = 'Invalid due_date'
+            continue
+        accepted.append(index)
+        rows.append({
+            'requester_id': item.get('requester_id', default_requester_id),
+            'receiver_id': item['receiver_id'],
+            'message': item.get('message', ''),
+            'tags': item.get('tags', []),
+            'priority': item.get('priority', 'medium'),
+            'due_date': due_date,
+            'created_at': now,
+            'updated_at': now
+        })
+
+    ids = {}
+    if rows:
+        _insert(FeedbackRequest, rows)
+        record_request_rows(rows)
+        queue_notifications([{
+            'user_id': row['receiver_id'],
+            'title': 'Feedback Request',
+            'message': 'Someone has requested feedback from you',
+            'type': 'request'
+        } for row in rows])
+        ids = {index: row['id'] for index, row in zip(accepted, rows)}
+
+    return _results(items, ids, errors)
@@ -1,9 +1,76 @@
 import os
+import tempfile
+from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
 
+def env_flag(name, default):
+    return os.getenv(name, default).lower() in ('1', 'true', 'yes')
+
+def engine_options(database_uri):
+    """SQLAlchemy engine/pool options, tunable from the environment"""
+    options = {
+        'pool_pre_ping': env_flag('DB_POOL_PRE_PING', 'true'),
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+    }
+    # In-memory SQLite uses a single-connection pool with no sizing options
+    if database_uri not in ('sqlite://', 'sqlite:///:memory:'):
+        options.update({
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', '30')),
+        })
+    return options
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key-change-in-production')
+    JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key-change-in-production')
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
+    # Tokens are only accepted in the Authorization header, never in URLs
+    JWT_TOKEN_LOCATION = ['headers']
+    # Reject API requests without a valid token. Development and tests can
+    # set it to false for the ?user_id= demo mode; the dev server does so
+    # by default.
+    AUTH_REQUIRED = env_flag('AUTH_REQUIRED', 'true')
+    # Werkzeug method spec for new password hashes; the iteration count is the
+    # cost. Stored hashes made with another spec are upgraded on next login.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///feedback.db')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False 
\ No newline at end of file
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica; GET endpoints read from it when set
+    SQLALCHEMY_BINDS = {'replica': os.environ['DATABASE_REPLICA_URL']} if os.getenv('DATABASE_REPLICA_URL') else {}
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '5'))
+    # Applied to every SQLite connection on connect (see database.py)
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),
+        'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),
+        'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),
+        'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+    }
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '10000'))
+    USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', '300'))
+    # Keep serialised bodies of ETag-validated GET responses in memory
+    RESPONSE_CACHE_ENABLED = env_flag('RESPONSE_CACHE_ENABLED', 'false')
+    # Inbox long-poll (see events.py). Waiters per process default to half
+    # of gunicorn's threads, so the rest stay free for other requests.
+    NOTIFICATIONS_POLL_TIMEOUT_SECONDS = float(os.getenv('NOTIFICATIONS_POLL_TIMEOUT_SECONDS', '25'))
+    NOTIFICATIONS_POLL_CHECK_SECONDS = float(os.getenv('NOTIFICATIONS_POLL_CHECK_SECONDS', '2'))
+    NOTIFICATIONS_POLL_MAX_WAITERS = int(os.getenv(
+        'NOTIFICATIONS_POLL_MAX_WAITERS', str(max(1, int(os.getenv('GUNICORN_THREADS', '4')) // 2))
+    ))
+    NOTIFICATIONS_POLL_FALLBACK_SECONDS = int(os.getenv('NOTIFICATIONS_POLL_FALLBACK_SECONDS', '30'))
+    NOTIFICATIONS_POLL_LIMIT = int(os.getenv('NOTIFICATIONS_POLL_LIMIT', '100'))
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '1000'))
+    # Newest received feedback per user sent by /api/users/?fields=feedback_received
+    USERS_RECEIVED_FEEDBACK_LIMIT = int(os.getenv('USERS_RECEIVED_FEEDBACK_LIMIT', '20'))
+    EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', '1000'))
+    REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'feedback-reports'))
+    JOBS_WORKERS = int(os.getenv('JOBS_WORKERS', '2'))
+    JOBS_POLL_SECONDS = float(os.getenv('JOBS_POLL_SECONDS', '1'))
+    JOBS_MAX_ATTEMPTS = int(os.getenv('JOBS_MAX_ATTEMPTS', '5'))
+    JOBS_BACKOFF_SECONDS = float(os.getenv('JOBS_BACKOFF_SECONDS', '2'))
+    JOBS_BACKOFF_MAX_SECONDS = float(os.getenv('JOBS_BACKOFF_MAX_SECONDS', '300'))
+    JOBS_LOCK_TIMEOUT_SECONDS = int(os.getenv('JOBS_LOCK_TIMEOUT_SECONDS', '600'))
+    JOBS_RETENTION_HOURS = int(os.getenv('JOBS_RETENTION_HOURS', '168'))
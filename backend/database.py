@@ -0,0 +1,25 @@
+from sqlalchemy import event
+from extensions import db
+
+# Per-connection SQLite tuning. WAL lets readers run alongside the single
+# writer, synchronous=NORMAL is safe under WAL and avoids an fsync per
+# commit, and busy_timeout makes writers wait for the lock instead of
+# failing with "database is locked".
+
+def _apply_pragmas(pragmas):
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+    return on_connect
+
+def configure_engines(app):
+    """Install connect-time pragmas on every SQLite engine of the app"""
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', _apply_pragmas(pragmas))
@@ -0,0 +1,92 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import g, has_app_context
+from extensions import db
+from models import User
+
+# User directory: resolves user ids to the few fields listings need
+# (username, role, manager_id) without a query per row. Lookups are
+# batched, memoised for the rest of the request in flask.g, and kept in a
+# process-wide LRU whose entries expire after a TTL. Writes that change
+# those fields call invalidate() so this process never serves stale data;
+# other processes catch up when the TTL runs out.
+
+class UserDirectory:
+    """Process-wide LRU of user id -> basic user fields, with TTL"""
+
+    def __init__(self, max_size=10000, ttl_seconds=300):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, max_size, ttl_seconds):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clear()
+
+    def _request_cache(self):
+        if not has_app_context():
+            return {}
+        if 'user_directory' not in g:
+            g.user_directory = {}
+        return g.user_directory
+
+    def lookup(self, user_ids):
+        """Basic fields for every known id, fetching all misses in one query"""
+        wanted = {user_id for user_id in user_ids if user_id is not None}
+        request_cache = self._request_cache()
+        found = {user_id: request_cache[user_id] for user_id in wanted if user_id in request_cache}
+
+        now = time.monotonic()
+        with self._lock:
+            for user_id in wanted - found.keys():
+                entry = self._entries.get(user_id)
+                if entry is None:
+                    continue
+                expires_at, data = entry
+                if expires_at < now:
+                    del self._entries[user_id]
+                    continue
+                self._entries.move_to_end(user_id)
+                found[user_id] = data
+
+        missing = wanted - found.keys()
+        if missing:
+            rows = (
+                db.session.query(User.id, User.username, User.role, User.manager_id)
+                .filter(User.id.in_(missing))
+            )
+            fetched = {
+                row.id: {'id': row.id, 'username': row.username, 'role': row.role, 'manager_id': row.manager_id}
+                for row in rows
+            }
+            with self._lock:
+                for user_id, data in fetched.items():
+                    self._entries[user_id] = (now + self.ttl_seconds, data)
+                    self._entries.move_to_end(user_id)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+            found.update(fetched)
+
+        request_cache.update(found)
+        return found
+
+    def usernames(self, user_ids):
+        """Map of user id -> username"""
+        return {user_id: data['username'] for user_id, data in self.lookup(user_ids).items()}
+
+    def get(self, user_id):
+        return self.lookup([user_id]).get(user_id)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+        self._request_cache().pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_directory = UserDirectory()
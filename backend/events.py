@@ -0,0 +1,165 @@
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import event, insert
+from extensions import db
+from models import Notification
+from jobs import enqueue, handler
+
+# Notification delivery for the inbox long-poll. The notification table is
+# the source of truth: a waiting request re-reads it every few seconds, so
+# notifications committed by any process (job workers included) reach it.
+# LocalBroker only wakes waiters in the same process early; a broker backed
+# by Redis/Postgres LISTEN can be installed with set_broker(), as long as it
+# provides the same subscribe/unsubscribe/publish methods.
+#
+# Each waiting request holds a server thread, so the number of waiters per
+# process is capped (see WaiterLimit); requests over the cap are answered
+# at once and the client falls back to plain polling.
+#
+# Write paths never insert notifications themselves: queue_notifications()
+# adds one 'notify' job in the same transaction as the rows that caused
+# them, and the job inserts them all with executemany. They are published
+# once the job's transaction commits.
+
+class LocalBroker:
+    """In-process pub/sub with one queue per connected subscriber"""
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = queue.Queue(maxsize=self.max_queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscriptions = self._subscribers.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, message):
+        with self._lock:
+            subscriptions = list(self._subscribers.get(user_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.put_nowait(message)
+            except queue.Full:
+                # A stalled client drops events; it catches up on reconnect
+                # through Last-Event-ID.
+                pass
+
+_broker = LocalBroker()
+
+def get_broker():
+    return _broker
+
+def set_broker(broker):
+    """Replace the process-wide broker"""
+    global _broker
+    _broker = broker
+
+def _collect_notifications(session, flush_context):
+    """Remember notifications inserted by this flush"""
+    pending = session.info.setdefault('pending_notifications', [])
+    pending.extend(obj.to_dict() for obj in session.new if isinstance(obj, Notification))
+
+def defer_notifications(notifications_data):
+    """Publish notifications inserted outside the unit of work (executemany)
+    once the current transaction commits"""
+    db.session.info.setdefault('pending_notifications', []).extend(notifications_data)
+
+def _publish_notifications(session):
+    """Fan out the committed notifications"""
+    for notification_data in session.info.pop('pending_notifications', []):
+        _broker.publish(notification_data['user_id'], notification_data)
+
+def _discard_notifications(session):
+    session.info.pop('pending_notifications', None)
+
+def queue_notifications(notifications):
+    """Queue notifications (dicts of user_id/title/message/type) in the
+    current transaction"""
+    enqueue('notify', {'notifications': notifications})
+
+@handler('notify')
+def create_notifications_job(payload):
+    """Insert queued notifications; they are pushed once the job commits"""
+    now = datetime.utcnow()
+    # Jobs queued before notifications were batched carry a single one
+    rows = [dict(notification, read=False, created_at=now) for notification in payload.get('notifications', [payload])]
+    # Ids from one multi-row INSERT increase in row order (see bulk._insert)
+    new_ids = sorted(db.session.scalars(insert(Notification).returning(Notification.id), rows))
+    defer_notifications([
+        dict(row, id=new_id, created_at=now.isoformat()) for row, new_id in zip(rows, new_ids)
+    ])
+
+def register_session_hooks():
+    """Publish notifications after the transaction that created them commits"""
+    if event.contains(db.session, 'after_flush', _collect_notifications):
+        return
+    event.listen(db.session, 'after_flush', _collect_notifications)
+    event.listen(db.session, 'after_commit', _publish_notifications)
+    event.listen(db.session, 'after_rollback', _discard_notifications)
+
+class WaiterLimit:
+    """Number of requests waiting for notifications in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def try_acquire(self, limit):
+        with self._lock:
+            if self.count >= limit:
+                return False
+            self.count += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.count -= 1
+
+poll_waiters = WaiterLimit()
+
+def notifications_after(user_id, after_id, limit):
+    """The user's notifications with an id above after_id, oldest first"""
+    return [
+        notification.to_dict() for notification in
+        Notification.query
+        .filter(Notification.user_id == user_id, Notification.id > after_id)
+        .order_by(Notification.id)
+        .limit(limit)
+    ]
+
+def wait_for_notifications(user_id, after_id, timeout, check_seconds, limit):
+    """Notifications after after_id, waiting up to timeout seconds for one.
+
+    Subscribes before the first read so nothing committed in between is
+    missed. A local publish ends the wait at once; otherwise the table is
+    re-read every check_seconds, which picks up other processes' writes.
+    """
+    subscription = _broker.subscribe(user_id)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            notifications = notifications_after(user_id, after_id, limit)
+            remaining = deadline - time.monotonic()
+            if notifications or remaining <= 0:
+                return notifications
+            # Give the connection back to the pool while waiting
+            db.session.remove()
+            try:
+                subscription.get(timeout=min(check_seconds, remaining))
+            except queue.Empty:
+                pass
+    finally:
+        _broker.unsubscribe(user_id, subscription)
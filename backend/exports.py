@@ -0,0 +1,47 @@
+from flask import current_app
+from models import Feedback
+from queries import feedback_context
+from serializers import feedback_item_schema
+
+# Streaming export of the full feedback history. Rows are read with
+# yield_per (a server-side cursor where the driver supports one) and
+# serialised one batch at a time, so memory stays flat however many rows
+# match and the client receives the first batch as soon as it is ready.
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _serialise(feedback_list, only):
+    """Serialise one batch, loading its comments and names in two lookups"""
+    return feedback_item_schema.dump_many(feedback_list, feedback_context(feedback_list, feedback_item_schema, only), only)
+
+def stream_feedback(query, fmt, only=None, batch_size=None):
+    """Yield the feedback matched by query, oldest first, as NDJSON lines
+    or as the pieces of one JSON array"""
+    batch_size = batch_size or current_app.config['EXPORT_BATCH_SIZE']
+    dumps = current_app.json.dumps
+    rows = query.order_by(Feedback.created_at, Feedback.id).yield_per(batch_size)
+
+    if fmt == 'ndjson':
+        for batch in _batches(rows, batch_size):
+            yield ''.join(dumps(item) + '\n' for item in _serialise(batch, only))
+        return
+
+    yield '['
+    separator = ''
+    for batch in _batches(rows, batch_size):
+        yield separator + ','.join(dumps(item) for item in _serialise(batch, only))
+        separator = ','
+    yield ']\n'
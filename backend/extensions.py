@@ -1,5 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from flask_jwt_extended import JWTManager
+from replica import RoutingSession
 
-db = SQLAlchemy()
-cors = CORS 
\ No newline at end of file
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+cors = CORS
+jwt = JWTManager() 
\ No newline at end of file
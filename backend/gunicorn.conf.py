@@ -0,0 +1,32 @@
+# Gunicorn settings for the production entry point (wsgi:app).
+# Every value can be overridden from the environment.
+#
+# The master never imports the app: workers load it after forking, so
+# SIGHUP starts workers on the new code. Schema changes are applied before
+# gunicorn starts (`flask db upgrade`, see the Dockerfile), not in a hook.
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Threaded workers: long-polls and slow clients hold a thread, not a process.
+# Long-poll waiters are capped at NOTIFICATIONS_POLL_MAX_WAITERS per worker.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '1000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '100'))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-') or None
+errorlog = '-'
+
+def worker_exit(server, worker):
+    """Let job threads finish their current job before the worker exits"""
+    from jobs import job_worker
+    job_worker.stop(timeout=graceful_timeout)
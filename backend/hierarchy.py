@@ -0,0 +1,77 @@
+from collections import defaultdict
+from sqlalchemy import select, func, or_
+from extensions import db
+from models import User
+
+# Manager hierarchy. User.manager_id forms a tree; these helpers walk it
+# with recursive CTEs over ix_user_manager_id, so "everyone under manager X"
+# is one indexed query however deep the org is, and can be used as an IN
+# subquery without pulling the ids into Python. UNION (not UNION ALL) stops
+# the recursion even if bad data ever forms a cycle.
+
+def reports_cte(manager_id, include_self=False, direct_only=False):
+    """CTE of the ids of manager_id's reports (direct and transitive)"""
+    users = User.__table__
+    if direct_only:
+        condition = users.c.manager_id == manager_id
+        if include_self:
+            condition = or_(condition, users.c.id == manager_id)
+        return select(users.c.id).where(condition).cte('reports')
+
+    start = select(users.c.id).where(
+        users.c.id == manager_id if include_self else users.c.manager_id == manager_id
+    )
+    reports = start.cte('reports', recursive=True)
+    return reports.union(
+        select(users.c.id).where(users.c.manager_id == reports.c.id)
+    )
+
+def team_ids(manager_id, include_self=False, direct_only=False):
+    """Select of report ids, for use in column.in_(...)"""
+    reports = reports_cte(manager_id, include_self, direct_only)
+    return select(reports.c.id)
+
+def count_reports(manager_id, direct_only=False):
+    """Number of people under manager_id"""
+    reports = reports_cte(manager_id, direct_only=direct_only)
+    return db.session.execute(select(func.count()).select_from(reports)).scalar()
+
+def is_report(manager_id, user_id):
+    """Whether user_id is somewhere under manager_id.
+
+    Walks up from user_id through manager_id, so the cost is the depth of
+    the chain rather than the size of manager_id's org, and stops as soon
+    as manager_id is reached.
+    """
+    users = User.__table__
+    start = select(users.c.manager_id.label('id')).where(users.c.id == user_id)
+    chain = start.cte('chain', recursive=True)
+    chain = chain.union(
+        select(users.c.manager_id)
+        .where(users.c.id == chain.c.id, chain.c.id != manager_id, users.c.manager_id.isnot(None))
+    )
+    return db.session.execute(
+        select(chain.c.id).where(chain.c.id == manager_id).limit(1)
+    ).first() is not None
+
+def ancestors(user_ids=None):
+    """Map of user id -> every manager above them.
+
+    Covers all users when user_ids is None. Users without a manager are
+    absent from the map.
+    """
+    users = User.__table__
+    start = select(
+        users.c.id.label('user_id'), users.c.manager_id.label('ancestor_id')
+    ).where(users.c.manager_id.isnot(None))
+    if user_ids is not None:
+        start = start.where(users.c.id.in_(list(user_ids)))
+    chain = start.cte('chain', recursive=True)
+    chain = chain.union(
+        select(chain.c.user_id, users.c.manager_id)
+        .where(users.c.id == chain.c.ancestor_id, users.c.manager_id.isnot(None))
+    )
+    result = defaultdict(list)
+    for user_id, ancestor_id in db.session.execute(select(chain.c.user_id, chain.c.ancestor_id)):
+        result[user_id].append(ancestor_id)
+    return dict(result)
@@ -0,0 +1,101 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, make_response, request
+from versions import table_versions
+
+# Conditional GET for read-heavy endpoints. The ETag is derived from the
+# change sequence of every table the response depends on, so a client's
+# If-None-Match is answered with 304 after one small query and without
+# running the view. Optionally the serialised body is kept server-side,
+# keyed by ETag; a write changes the ETag, which retires the old entry.
+#
+# Last-Modified only has 1-second resolution, so freshness is decided on
+# the ETag whenever the client sends one. For clients that only send
+# If-Modified-Since, Last-Modified is only sent (and a 304 only given)
+# once the second of the latest change is over; before that a second
+# write in the same second would look unmodified.
+
+class ResponseCache:
+    """Small LRU of response bodies keyed by ETag"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+response_cache = ResponseCache()
+
+def _validators(tables):
+    versions = table_versions(tables)
+    key = '|'.join([
+        request.full_path,
+        request.headers.get('Authorization', ''),
+        # changed_at as well, so versions restarting from zero after the
+        # tables are recreated never repeat an earlier ETag
+        ','.join(f'{name}:{versions[name][0]}:{versions[name][1]}' for name in sorted(versions))
+    ])
+    etag = hashlib.sha1(key.encode()).hexdigest()
+    changed = [changed_at for _, changed_at in versions.values() if changed_at is not None]
+    return etag, max(changed) if changed else None
+
+def _second_is_over(moment):
+    """Whether no later write can carry the same Last-Modified second"""
+    return datetime.utcnow() >= moment.replace(microsecond=0) + timedelta(seconds=1)
+
+def conditional(*tables):
+    """Serve 304s (and optionally cached bodies) for a GET view that reads `tables`"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag, last_modified = _validators(tables)
+            if last_modified is not None and not _second_is_over(last_modified):
+                last_modified = None
+
+            if etag in request.if_none_match or (
+                not request.if_none_match
+                and last_modified is not None
+                and request.if_modified_since is not None
+                and last_modified.replace(microsecond=0) <= request.if_modified_since.replace(tzinfo=None)
+            ):
+                response = make_response('', 304)
+            else:
+                use_cache = current_app.config['RESPONSE_CACHE_ENABLED']
+                cached = response_cache.get(etag) if use_cache else None
+                if cached is not None:
+                    body, mimetype = cached
+                    response = current_app.response_class(body, mimetype=mimetype)
+                else:
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    if use_cache:
+                        response_cache.put(etag, (response.get_data(), response.mimetype))
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return wrapper
+    return decorator
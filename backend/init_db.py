@@ -1,6 +1,10 @@
 from extensions import db
 from models import User, Feedback, FeedbackRequest, Comment, Notification
 from app import create_app
+from summaries import rebuild_summaries
+from tags import rebuild_tag_index
+from seed import seed_synthetic
+import argparse
 import json
 from datetime import datetime, timedelta
 
@@ -194,6 +198,10 @@ def init_db():
         db.session.commit()
         print("Notifications created successfully!")
         
+        rebuild_summaries()
+        rebuild_tag_index()
+        print("Dashboard summaries and tag index built successfully!")
+        
         print("\nDatabase initialized with demo data!")
         print(f"Created {len(managers)} managers and {len(employees)} employees")
         print(f"Created {len(feedback_data)} feedback entries")
@@ -201,5 +209,45 @@ def init_db():
         print(f"Created {len(requests_data)} feedback requests")
         print(f"Created {len(notifications_data)} notifications")
 
+def init_synthetic_db(manifest=None, **options):
+    """Recreate the tables and fill them with a synthetic org (see seed.py)"""
+    app = create_app()
+    
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        started = datetime.now()
+        stats = seed_synthetic(**options)
+        print(f"\nSeeded in {(datetime.now() - started).total_seconds():.1f}s: " + ', '.join(
+            f"{stats[name]} {name}" for name in ('users', 'feedback', 'comments', 'requests', 'notifications')
+        ))
+        if manifest:
+            with open(manifest, 'w') as f:
+                json.dump(stats, f, indent=2)
+            print(f"Wrote {manifest}")
+    return stats
+
 if __name__ == '__main__':
-    init_db() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Create the database and fill it with demo data')
+    parser.add_argument('--synthetic', action='store_true', help='generate a large synthetic org instead of the demo data')
+    parser.add_argument('--users', type=int, default=1000, help='people in the org')
+    parser.add_argument('--feedback-per-user', type=float, default=10, help='average feedback received per user')
+    parser.add_argument('--comments-per-feedback', type=float, default=1, help='average comments per feedback')
+    parser.add_argument('--requests-per-user', type=float, default=1, help='average feedback requests per user')
+    parser.add_argument('--notifications-per-user', type=float, default=5, help='average notifications per user')
+    parser.add_argument('--span', type=int, nargs=2, default=(3, 10), metavar=('MIN', 'MAX'), help='reports per manager')
+    parser.add_argument('--days', type=int, default=365, help='days of history')
+    parser.add_argument('--seed', type=int, default=42, help='random seed; the same seed gives the same data')
+    parser.add_argument('--batch-size', type=int, default=10000, help='rows per INSERT batch')
+    parser.add_argument('--manifest', help='write counts and sample ids as JSON to this file')
+    args = parser.parse_args()
+    
+    if args.synthetic:
+        init_synthetic_db(
+            manifest=args.manifest, users=args.users, feedback_per_user=args.feedback_per_user,
+            comments_per_feedback=args.comments_per_feedback, requests_per_user=args.requests_per_user,
+            notifications_per_user=args.notifications_per_user, span=tuple(args.span), days=args.days,
+            seed=args.seed, batch_size=args.batch_size
+        )
+    else:
+        init_db() 
\ No newline at end of file
@@ -0,0 +1,271 @@
+import os
+import socket
+import threading
+import time
+import click
+from datetime import datetime, timedelta
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import and_, or_, update, func, event
+from extensions import db
+from models import Job
+
+# Table-backed job queue. enqueue() adds a Job row to the current session,
+# so a job exists exactly when the transaction that asked for it commits.
+# Worker threads claim due jobs with a guarded UPDATE (safe with several
+# threads and processes polling the same table), run the handler, and
+# commit the handler's own writes together with the 'done' mark. A failing
+# job is retried with exponential backoff until max_attempts, then left as
+# 'failed'. Jobs whose worker died are reclaimed once their lock expires,
+# or marked 'failed' if the worker died during their final attempt.
+
+_handlers = {}
+
+def handler(kind):
+    """Register the function that runs jobs of this kind"""
+    def register(fn):
+        _handlers[kind] = fn
+        return fn
+    return register
+
+def enqueue(kind, payload, key=None, delay_seconds=0, max_attempts=None):
+    """Queue a job in the current transaction"""
+    job = Job(
+        kind=kind,
+        payload=payload,
+        key=key,
+        max_attempts=max_attempts or current_app.config['JOBS_MAX_ATTEMPTS'],
+        run_at=datetime.utcnow() + timedelta(seconds=delay_seconds)
+    )
+    db.session.add(job)
+    db.session.info['jobs_enqueued'] = True
+    return job
+
+def backoff_seconds(attempts, base, cap):
+    """Delay before retry number `attempts`: base, 2*base, 4*base, ... up to cap"""
+    return min(base * 2 ** (attempts - 1), cap)
+
+def _due(now, lock_timeout):
+    table = Job.__table__
+    return or_(
+        and_(table.c.status == 'queued', table.c.run_at <= now),
+        and_(table.c.status == 'running', table.c.locked_at < now - timedelta(seconds=lock_timeout))
+    )
+
+def claim_next(worker_id, config):
+    """Claim the next due job for this worker; None when nothing is due"""
+    table = Job.__table__
+    while True:
+        now = datetime.utcnow()
+        due = _due(now, config['JOBS_LOCK_TIMEOUT_SECONDS'])
+        job_id = db.session.execute(
+            table.select().with_only_columns(table.c.id).where(due).order_by(table.c.run_at, table.c.id).limit(1)
+        ).scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        claimed = db.session.execute(
+            update(table)
+            .where(table.c.id == job_id, due)
+            .values(
+                status='running', locked_by=worker_id, locked_at=now,
+                attempts=table.c.attempts + 1, started_at=func.coalesce(table.c.started_at, now)
+            )
+        ).rowcount
+        db.session.commit()
+        if not claimed:
+            # Another worker took it first; try the next one
+            continue
+        job = db.session.get(Job, job_id)
+        if job.attempts <= job.max_attempts:
+            return job
+        # Its worker died during the final attempt; give up on it
+        db.session.execute(
+            update(table).where(table.c.id == job_id)
+            .values(status='failed', attempts=job.max_attempts, finished_at=now, locked_by=None, locked_at=None,
+                    last_error='Worker stopped during the final attempt')
+        )
+        db.session.commit()
+
+def run_job(job, config, logger):
+    """Run a claimed job and record the outcome"""
+    job_id, kind, payload = job.id, job.kind, job.payload
+    table = Job.__table__
+    try:
+        _handlers[kind](payload)
+        db.session.execute(
+            update(table).where(table.c.id == job_id)
+            .values(status='done', finished_at=datetime.utcnow(), locked_by=None, locked_at=None, last_error=None)
+        )
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Job %s (%s) failed', job_id, kind)
+        job = db.session.get(Job, job_id)
+        now = datetime.utcnow()
+        if job.attempts >= job.max_attempts:
+            values = {'status': 'failed', 'finished_at': now}
+        else:
+            delay = backoff_seconds(job.attempts, config['JOBS_BACKOFF_SECONDS'], config['JOBS_BACKOFF_MAX_SECONDS'])
+            values = {'status': 'queued', 'run_at': now + timedelta(seconds=delay)}
+        db.session.execute(
+            update(table).where(table.c.id == job_id)
+            .values(locked_by=None, locked_at=None, last_error=f'{type(e).__name__}: {e}'[:2000], **values)
+        )
+        db.session.commit()
+
+def purge_jobs(older_than):
+    """Delete finished jobs older than the given timedelta"""
+    table = Job.__table__
+    deleted = db.session.execute(
+        table.delete().where(table.c.status.in_(('done', 'failed')), table.c.finished_at < datetime.utcnow() - older_than)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * fraction))], 3)
+
+def job_metrics(sample_size=1000):
+    """Queue depth per status, age of the oldest due job, and wait/run time
+    percentiles over the most recently finished jobs"""
+    now = datetime.utcnow()
+    depth = dict.fromkeys(('queued', 'running', 'done', 'failed'), 0)
+    depth.update(db.session.query(Job.status, func.count(Job.id)).group_by(Job.status))
+    oldest = (
+        db.session.query(func.min(Job.run_at))
+        .filter(Job.status == 'queued', Job.run_at <= now)
+        .scalar()
+    )
+    recent = (
+        db.session.query(Job.created_at, Job.started_at, Job.finished_at)
+        .filter(Job.status == 'done')
+        .order_by(Job.finished_at.desc())
+        .limit(sample_size)
+        .all()
+    )
+    waits = [(started - created).total_seconds() for created, started, _ in recent]
+    runs = [(finished - started).total_seconds() for _, started, finished in recent]
+    return {
+        'depth': depth,
+        'oldest_due_seconds': round((now - oldest).total_seconds(), 3) if oldest else 0,
+        'wait_seconds': {'p50': _percentile(waits, 0.5), 'p95': _percentile(waits, 0.95)},
+        'run_seconds': {'p50': _percentile(runs, 0.5), 'p95': _percentile(runs, 0.95)},
+        'sample_size': len(recent)
+    }
+
+class JobWorker:
+    """Pool of threads that poll the job table in this process"""
+
+    def __init__(self):
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._last_purge = 0
+        self._warned = False
+
+    @property
+    def running(self):
+        return bool(self._threads)
+
+    def wake(self):
+        self._wakeup.set()
+
+    def start(self, app, threads=None):
+        threads = app.config['JOBS_WORKERS'] if threads is None else threads
+        with self._lock:
+            if self._threads or threads < 1:
+                return
+            self._stopping.clear()
+            prefix = f'{socket.gethostname()}:{os.getpid()}'
+            for number in range(threads):
+                thread = threading.Thread(
+                    target=self._loop, args=(app, f'{prefix}:{number}'), name=f'job-worker-{number}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def warn_unserved(self, logger):
+        """Log, once per process, that jobs were queued with no local workers"""
+        if not self._warned:
+            self._warned = True
+            logger.warning(
+                'Jobs were queued but this process runs no job workers (JOBS_WORKERS=0); '
+                'they only run if a `flask run-jobs` process is up. See /api/jobs/metrics.'
+            )
+
+    def stop(self, timeout=10):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _loop(self, app, worker_id):
+        config = app.config
+        while not self._stopping.is_set():
+            job = None
+            with app.app_context():
+                try:
+                    self._maybe_purge(config)
+                    job = claim_next(worker_id, config)
+                    if job is not None:
+                        run_job(job, config, app.logger)
+                except Exception:
+                    app.logger.exception('Job worker %s crashed; retrying', worker_id)
+                    db.session.rollback()
+            if job is None:
+                self._wakeup.wait(config['JOBS_POLL_SECONDS'])
+                self._wakeup.clear()
+
+    def _maybe_purge(self, config):
+        if time.monotonic() - self._last_purge < 3600:
+            return
+        self._last_purge = time.monotonic()
+        purge_jobs(timedelta(hours=config['JOBS_RETENTION_HOURS']))
+
+job_worker = JobWorker()
+
+def _wake_workers(session):
+    """Wake local workers as soon as newly queued jobs are committed"""
+    if session.info.pop('jobs_enqueued', False):
+        if job_worker.running:
+            job_worker.wake()
+        else:
+            job_worker.warn_unserved(current_app.logger)
+
+def init_job_worker(app):
+    """Start this process's job threads with its first request, so every
+    way of serving the app (gunicorn, flask run, python app.py) runs jobs
+    while CLI commands do not"""
+    @app.before_request
+    def start_job_worker():
+        if not job_worker.running:
+            job_worker.start(app)
+
+def _forget_enqueued(session):
+    session.info.pop('jobs_enqueued', None)
+
+def register_job_hooks():
+    if event.contains(db.session, 'after_commit', _wake_workers):
+        return
+    event.listen(db.session, 'after_commit', _wake_workers)
+    event.listen(db.session, 'after_rollback', _forget_enqueued)
+
+@click.command('run-jobs')
+@click.option('--threads', default=None, type=int, help='Worker threads (default: JOBS_WORKERS).')
+@with_appcontext
+def run_jobs_command(threads):
+    """Run job workers in the foreground until interrupted."""
+    app = current_app._get_current_object()
+    job_worker.start(app, threads or app.config['JOBS_WORKERS'] or 1)
+    click.echo(f'Running {len(job_worker._threads)} job worker threads')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        job_worker.stop()
@@ -0,0 +1,29 @@
+"""add feedback search index
+
+Revision ID: 29068871b9ae
+Revises: 338583a27d2a
+Create Date: 2026-10-17 14:58:04.692058
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from search import install_search_index, remove_search_index, fill_search_index
+
+
+# revision identifiers, used by Alembic.
+revision = '29068871b9ae'
+down_revision = '338583a27d2a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The full-text index is a virtual table (SQLite) or tsvector table
+    # (PostgreSQL) kept in sync by triggers; see search.py
+    bind = op.get_bind()
+    install_search_index(None, bind)
+    fill_search_index(bind)
+
+
+def downgrade():
+    remove_search_index(None, op.get_bind())
@@ -0,0 +1,42 @@
+"""add feedback summary table
+
+Revision ID: 8186e2e0a188
+Revises: 29068871b9ae
+Create Date: 2026-10-17 16:02:41.518377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8186e2e0a188'
+down_revision = '29068871b9ae'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases upgraded while the baseline revision still created this
+    # table already have it. A newly created table starts empty: run
+    # 'flask rebuild-summaries' afterwards to fill in the dashboard counters.
+    if sa.inspect(op.get_bind()).has_table('feedback_summary'):
+        return
+    op.create_table('feedback_summary',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('scope', sa.String(length=10), nullable=False),
+    sa.Column('scope_id', sa.Integer(), nullable=False),
+    sa.Column('total', sa.Integer(), nullable=False),
+    sa.Column('positive', sa.Integer(), nullable=False),
+    sa.Column('neutral', sa.Integer(), nullable=False),
+    sa.Column('negative', sa.Integer(), nullable=False),
+    sa.Column('unacknowledged', sa.Integer(), nullable=False),
+    sa.Column('open_requests', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('scope', 'scope_id')
+    )
+
+
+def downgrade():
+    op.drop_table('feedback_summary')
@@ -0,0 +1,55 @@
+"""add feedback tag index
+
+Revision ID: f61ba335e2a1
+Revises: 8186e2e0a188
+Create Date: 2026-10-17 16:03:12.904126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f61ba335e2a1'
+down_revision = '8186e2e0a188'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases upgraded while the baseline revision still created this
+    # table already have it and its rows
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('feedback_tag'):
+        return
+    feedback_tag = op.create_table('feedback_tag',
+    sa.Column('feedback_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(length=50), nullable=False),
+    sa.ForeignKeyConstraint(['feedback_id'], ['feedback.id'], ),
+    sa.PrimaryKeyConstraint('feedback_id', 'tag')
+    )
+    with op.batch_alter_table('feedback_tag', schema=None) as batch_op:
+        batch_op.create_index('ix_feedback_tag_tag_feedback', ['tag', 'feedback_id'], unique=False)
+
+    # Backfill from Feedback.tags, as 'flask rebuild-tags' does
+    feedback = sa.table('feedback', sa.column('id', sa.Integer()), sa.column('tags', sa.JSON()))
+    rows = []
+    for feedback_id, tags in bind.execute(sa.select(feedback.c.id, feedback.c.tags)).all():
+        seen = []
+        for tag in tags or []:
+            tag = str(tag).strip()[:50]
+            if tag and tag not in seen:
+                seen.append(tag)
+        rows.extend({'feedback_id': feedback_id, 'tag': tag} for tag in seen)
+        if len(rows) >= 10000:
+            op.bulk_insert(feedback_tag, rows)
+            rows = []
+    if rows:
+        op.bulk_insert(feedback_tag, rows)
+
+
+def downgrade():
+    with op.batch_alter_table('feedback_tag', schema=None) as batch_op:
+        batch_op.drop_index('ix_feedback_tag_tag_feedback')
+
+    op.drop_table('feedback_tag')
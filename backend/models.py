@@ -1,8 +1,25 @@
 from datetime import datetime
+from flask import current_app, has_app_context
 from werkzeug.security import generate_password_hash, check_password_hash
 from extensions import db
+from serializers import (
+    user_schema, feedback_schema, feedback_request_schema, comment_schema, notification_schema, job_schema
+)
+
+DEFAULT_PASSWORD_HASH_METHOD = 'pbkdf2:sha256:600000'
+
+def password_hash_method():
+    """Hash method for new passwords, e.g. 'pbkdf2:sha256:600000'"""
+    if has_app_context():
+        return current_app.config['PASSWORD_HASH_METHOD']
+    return DEFAULT_PASSWORD_HASH_METHOD
 
 class User(db.Model):
+    __table_args__ = (
+        db.Index('ix_user_created_at_id', 'created_at', 'id'),
+        db.Index('ix_user_manager_id', 'manager_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
@@ -22,26 +39,28 @@ class User(db.Model):
     notifications = db.relationship('Notification', backref='user', lazy='dynamic')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = generate_password_hash(password, method=password_hash_method())
+    
+    def password_needs_rehash(self):
+        """Whether the stored hash was made with a different method or cost"""
+        return not self.password_hash.startswith(password_hash_method() + '$')
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'role': self.role,
-            'manager_id': self.manager_id,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return user_schema.dump(self)
     
     def __repr__(self):
         return f'<User {self.username}>'
 
 class Feedback(db.Model):
+    __table_args__ = (
+        db.Index('ix_feedback_created_at_id', 'created_at', 'id'),
+        db.Index('ix_feedback_receiver_created_at', 'receiver_id', 'created_at'),
+        db.Index('ix_feedback_giver_created_at', 'giver_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     giver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -55,25 +74,28 @@ class Feedback(db.Model):
     
     # Relationships
     comments = db.relationship('Comment', backref='feedback', lazy='dynamic', cascade='all, delete-orphan')
+    tag_links = db.relationship('FeedbackTag', backref='feedback', cascade='all, delete-orphan')
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'giver_id': self.giver_id,
-            'receiver_id': self.receiver_id,
-            'strengths': self.strengths,
-            'areas_to_improve': self.areas_to_improve,
-            'sentiment': self.sentiment,
-            'acknowledged': self.acknowledged,
-            'tags': self.tags,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return feedback_schema.dump(self)
     
     def __repr__(self):
         return f'<Feedback {self.id}: {self.giver_id} -> {self.receiver_id}>'
 
+class FeedbackTag(db.Model):
+    # Normalised copy of Feedback.tags, indexed by tag for tag queries
+    __table_args__ = (db.Index('ix_feedback_tag_tag_feedback', 'tag', 'feedback_id'),)
+
+    feedback_id = db.Column(db.Integer, db.ForeignKey('feedback.id'), primary_key=True)
+    tag = db.Column(db.String(50), primary_key=True)
+
 class FeedbackRequest(db.Model):
+    __table_args__ = (
+        db.Index('ix_feedback_request_created_at_id', 'created_at', 'id'),
+        db.Index('ix_feedback_request_receiver_created_at', 'receiver_id', 'created_at'),
+        db.Index('ix_feedback_request_requester_created_at', 'requester_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     requester_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     receiver_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -85,19 +107,13 @@ class FeedbackRequest(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'requester_id': self.requester_id,
-            'receiver_id': self.receiver_id,
-            'message': self.message,
-            'tags': self.tags,
-            'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return feedback_request_schema.dump(self)
 
 class Comment(db.Model):
+    __table_args__ = (
+        db.Index('ix_comment_feedback_created_at', 'feedback_id', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     feedback_id = db.Column(db.Integer, db.ForeignKey('feedback.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -106,16 +122,14 @@ class Comment(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     def to_dict(self):
-        return {
-            'id': self.id,
-            'feedback_id': self.feedback_id,
-            'user_id': self.user_id,
-            'content': self.content,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
-        }
+        return comment_schema.dump(self)
 
 class Notification(db.Model):
+    __table_args__ = (
+        db.Index('ix_notification_created_at_id', 'created_at', 'id'),
+        db.Index('ix_notification_user_read_created_at', 'user_id', 'read', 'created_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -124,13 +138,69 @@ class Notification(db.Model):
     read = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    def to_dict(self):
+        return notification_schema.dump(self)
+
+class FeedbackSummary(db.Model):
+    """Dashboard counters, maintained incrementally on every feedback write.
+
+    One row per scope: 'all' (scope_id 0), 'team' (scope_id is the manager's
+    id) and 'user' (scope_id is the receiver's id).
+    """
+    __table_args__ = (db.UniqueConstraint('scope', 'scope_id'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(10), nullable=False)  # 'all', 'team' or 'user'
+    scope_id = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    positive = db.Column(db.Integer, nullable=False, default=0)
+    neutral = db.Column(db.Integer, nullable=False, default=0)
+    negative = db.Column(db.Integer, nullable=False, default=0)
+    unacknowledged = db.Column(db.Integer, nullable=False, default=0)
+    open_requests = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
     def to_dict(self):
         return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'title': self.title,
-            'message': self.message,
-            'type': self.type,
-            'read': self.read,
-            'created_at': self.created_at.isoformat()
-        } 
\ No newline at end of file
+            'total_feedback': self.total,
+            'sentiment_counts': {
+                'positive': self.positive,
+                'neutral': self.neutral,
+                'negative': self.negative
+            },
+            'unacknowledged_count': self.unacknowledged,
+            'open_requests': self.open_requests
+        }
+
+class TableVersion(db.Model):
+    # Change sequence per table, bumped in the same transaction as every
+    # ORM write to it; used to build ETags for cached GET responses.
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class Job(db.Model):
+    """Background job in the table-backed queue (see jobs.py)"""
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+        db.Index('ix_job_kind_key', 'kind', 'key'),
+        db.Index('ix_job_finished_at', 'finished_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    payload = db.Column(db.JSON, nullable=False, default=dict)
+    key = db.Column(db.String(64))  # optional id used to deduplicate jobs
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def to_dict(self):
+        return job_schema.dump(self)
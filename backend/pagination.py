@@ -0,0 +1,72 @@
+import base64
+from datetime import datetime
+from flask import request, jsonify
+from sqlalchemy import and_, or_
+
+# Keyset (cursor) pagination over (created_at, id), newest first.
+# A cursor is the position of the last row of the previous page, so each
+# page is an index range scan instead of an OFFSET over the whole table.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(created_at, row_id):
+    """Encode a (created_at, id) position as an opaque cursor string"""
+    raw = f'{created_at.isoformat()}|{row_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a cursor string back into (created_at, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, row_id = raw.split('|')
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+def limit_arg():
+    """Read the page size from the query string"""
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError('Invalid limit')
+    if limit < 1:
+        raise ValueError('Invalid limit')
+    return min(limit, MAX_PAGE_SIZE)
+
+def page_args():
+    """Read limit and cursor from the query string"""
+    cursor = request.args.get('cursor')
+    return limit_arg(), decode_cursor(cursor) if cursor else None
+
+def date_arg(name):
+    """Read an optional ISO date/datetime filter from the query string"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Invalid {name}')
+
+def paginate(query, model, limit, cursor=None):
+    """Return one page of rows and the cursor for the next page"""
+    if cursor:
+        created_at, row_id = cursor
+        query = query.filter(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id)
+        ))
+
+    rows = query.order_by(model.created_at.desc(), model.id.desc()).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return rows, next_cursor
+
+def page_response(items, next_cursor):
+    """Wrap a page of serialised rows with its continuation cursor"""
+    return jsonify({'items': items, 'next_cursor': next_cursor})
@@ -0,0 +1,87 @@
+from sqlalchemy import func
+from extensions import db
+from models import User, Feedback, Comment
+from directory import user_directory
+from serializers import wants
+
+# Query helpers that load related rows in a fixed number of round trips,
+# so list endpoints don't issue one query per row. User names are resolved
+# separately through the user directory (directory.py).
+
+def comments_by_feedback(feedback_ids):
+    """Load comments for many feedback items in one query"""
+    comments = {feedback_id: [] for feedback_id in feedback_ids}
+    if not comments:
+        return comments
+
+    rows = (
+        Comment.query
+        .filter(Comment.feedback_id.in_(list(comments)))
+        .order_by(Comment.created_at, Comment.id)
+        .all()
+    )
+    for comment in rows:
+        comments[comment.feedback_id].append(comment)
+
+    return comments
+
+def comment_counts(feedback_ids):
+    """Count comments per feedback item in one query, without loading them"""
+    counts = dict.fromkeys(feedback_ids, 0)
+    if not counts:
+        return counts
+
+    # Answered from ix_comment_feedback_created_at alone
+    rows = (
+        db.session.query(Comment.feedback_id, func.count(Comment.id))
+        .filter(Comment.feedback_id.in_(list(counts)))
+        .group_by(Comment.feedback_id)
+    )
+    counts.update(rows)
+    return counts
+
+def feedback_context(feedback_list, schema, only=None):
+    """Serialisation context for feedback rows: user names, plus comments or
+    comment counts when the schema sends those fields"""
+    def sends(name):
+        return name in schema.fields and wants(only, name)
+
+    ids = [feedback.id for feedback in feedback_list]
+    comments = comments_by_feedback(ids) if sends('comments') else {}
+    if comments:
+        counts = {feedback_id: len(rows) for feedback_id, rows in comments.items()}
+    else:
+        counts = comment_counts(ids) if sends('comment_count') else {}
+    names = user_directory.usernames(
+        [user_id for feedback in feedback_list for user_id in (feedback.giver_id, feedback.receiver_id)]
+        + [comment.user_id for feedback_comments in comments.values() for comment in feedback_comments]
+    )
+    return {'names': names, 'comments': comments, 'comment_counts': counts}
+
+def feedback_received_by(user_ids, per_user=None):
+    """Load feedback received by many users in one query; only each user's
+    newest per_user items when given"""
+    received = {user_id: [] for user_id in user_ids}
+    if not received:
+        return received
+
+    query = Feedback.query.filter(Feedback.receiver_id.in_(list(received)))
+    if per_user:
+        position = func.row_number().over(
+            partition_by=Feedback.receiver_id, order_by=(Feedback.created_at.desc(), Feedback.id.desc())
+        )
+        ranked = (
+            db.session.query(Feedback.id, position.label('position'))
+            .filter(Feedback.receiver_id.in_(list(received)))
+            .subquery()
+        )
+        query = query.join(ranked, ranked.c.id == Feedback.id).filter(ranked.c.position <= per_user)
+    rows = query.order_by(Feedback.created_at, Feedback.id).all()
+    for feedback in rows:
+        received[feedback.receiver_id].append(feedback)
+
+    return received
+
+def count_users():
+    """Count users without loading them"""
+    return db.session.query(func.count(User.id)).scalar()
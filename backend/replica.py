@@ -0,0 +1,47 @@
+from flask import g, has_app_context, request
+from flask_sqlalchemy.session import Session
+
+# Optional read-replica routing. When SQLALCHEMY_BINDS has a 'replica'
+# engine, SELECTs issued while handling a GET on a routed blueprint go to
+# it; everything else (flushes, UPDATE/DELETE, non-GET requests) stays on
+# the primary. After a client writes, a short-lived cookie pins its reads
+# to the primary so it always sees its own changes despite replica lag.
+
+REPLICA_BIND = 'replica'
+STICKY_COOKIE = 'read_primary'
+
+class RoutingSession(Session):
+    """Session that sends read-only statements to the replica when asked"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and has_app_context()
+            and g.get('read_replica')
+            and not self._flushing
+            and getattr(clause, 'is_select', False)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def init_replica_routing(app, blueprint_names):
+    """Route GET handlers of the named blueprints to the replica, if configured"""
+    if REPLICA_BIND not in (app.config.get('SQLALCHEMY_BINDS') or {}):
+        return
+    sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+
+    @app.before_request
+    def choose_engine():
+        g.read_replica = (
+            request.blueprint in blueprint_names
+            and request.method == 'GET'
+            and STICKY_COOKIE not in request.cookies
+        )
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') and response.status_code < 400:
+            response.set_cookie(STICKY_COOKIE, '1', max_age=sticky_seconds, httponly=True, samesite='Lax')
+        return response
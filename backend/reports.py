@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from io import BytesIO
+from xml.sax.saxutils import escape
+from sqlalchemy import func
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import mm
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, KeepTogether
+from extensions import db
+from models import Feedback, Comment, Job
+from queries import comments_by_feedback
+from directory import user_directory
+from jobs import enqueue, handler
+from hierarchy import team_ids
+
+# PDF feedback reports. A report covers one feedback item or every item
+# received by a user or team in a period. Rendered files are cached on disk
+# under a key built from the report spec plus the count and latest
+# updated_at of the feedback and comments it contains, so any edit produces
+# a new key and an unchanged report is never rendered twice; writing a new
+# key deletes the file the same spec had before. Large reports
+# are rendered by the job queue (jobs.py); the request only gets a job id
+# (the cache key) and a download URL.
+
+RENDER_BATCH_SIZE = 500
+
+_styles = getSampleStyleSheet()
+
+def _paragraph(text, style='BodyText'):
+    return Paragraph(escape(text or '').replace('\n', '<br/>'), _styles[style])
+
+def render_pdf(title, feedback_list, comments, names):
+    """Render feedback items, each with its comments, as one PDF document"""
+    buffer = BytesIO()
+    document = SimpleDocTemplate(
+        buffer, pagesize=A4, title=title,
+        leftMargin=20 * mm, rightMargin=20 * mm, topMargin=20 * mm, bottomMargin=20 * mm
+    )
+    story = [_paragraph(title, 'Title')]
+    for feedback in feedback_list:
+        block = [
+            _paragraph(f'From {names.get(feedback.giver_id)} to {names.get(feedback.receiver_id)}', 'Heading2'),
+            _paragraph(
+                f"Date: {feedback.created_at.strftime('%Y-%m-%d')}    "
+                f"Sentiment: {feedback.sentiment}    "
+                f"Tags: {', '.join(feedback.tags) if feedback.tags else 'None'}"
+            ),
+            _paragraph('Strengths', 'Heading4'),
+            _paragraph(feedback.strengths),
+            _paragraph('Areas to Improve', 'Heading4'),
+            _paragraph(feedback.areas_to_improve),
+        ]
+        if comments[feedback.id]:
+            block.append(_paragraph('Comments', 'Heading4'))
+            block.extend(
+                _paragraph(f'{names.get(comment.user_id)}: {comment.content}')
+                for comment in comments[feedback.id]
+            )
+        story.append(KeepTogether(block))
+        story.append(Spacer(1, 6 * mm))
+    if not feedback_list:
+        story.append(_paragraph('No feedback matches this report.'))
+    document.build(story)
+    return buffer.getvalue()
+
+def normalize_spec(data):
+    """Validate a report request; returns the spec used for queries and keys"""
+    spec = {}
+    for name in ('feedback_id', 'receiver_id', 'team_id'):
+        if data.get(name) is not None:
+            if not isinstance(data[name], int):
+                raise ValueError(f'{name} must be an integer')
+            spec[name] = data[name]
+    if len(spec) != 1:
+        raise ValueError('Provide exactly one of feedback_id, receiver_id or team_id')
+    for name in ('created_after', 'created_before'):
+        if data.get(name):
+            try:
+                spec[name] = datetime.fromisoformat(data[name]).isoformat()
+            except (TypeError, ValueError):
+                raise ValueError(f'Invalid {name}')
+    return spec
+
+def report_query(spec):
+    """Feedback covered by a report spec"""
+    query = Feedback.query
+    if 'feedback_id' in spec:
+        query = query.filter(Feedback.id == spec['feedback_id'])
+    elif 'receiver_id' in spec:
+        query = query.filter(Feedback.receiver_id == spec['receiver_id'])
+    else:
+        query = query.filter(Feedback.receiver_id.in_(team_ids(spec['team_id'], include_self=True)))
+    if spec.get('created_after'):
+        query = query.filter(Feedback.created_at >= datetime.fromisoformat(spec['created_after']))
+    if spec.get('created_before'):
+        query = query.filter(Feedback.created_at < datetime.fromisoformat(spec['created_before']))
+    return query
+
+def report_key(spec):
+    """Cache key: the spec plus the count and newest updated_at of its rows"""
+    query = report_query(spec)
+    feedback_count, feedback_updated = query.with_entities(
+        func.count(Feedback.id), func.max(Feedback.updated_at)
+    ).one()
+    comment_count, comment_updated = (
+        db.session.query(func.count(Comment.id), func.max(Comment.updated_at))
+        .filter(Comment.feedback_id.in_(query.with_entities(Feedback.id).scalar_subquery()))
+        .one()
+    )
+    raw = repr((sorted(spec.items()), feedback_count, feedback_updated, comment_count, comment_updated))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+def spec_id(spec):
+    """Stable id of a report spec, the same across edits to its rows"""
+    return hashlib.sha1(repr(sorted(spec.items())).encode()).hexdigest()
+
+def report_title(spec):
+    if 'feedback_id' in spec:
+        title = f"Feedback #{spec['feedback_id']}"
+    elif 'receiver_id' in spec:
+        title = f"Feedback received by {user_directory.usernames([spec['receiver_id']]).get(spec['receiver_id'])}"
+    else:
+        title = f"Team feedback for {user_directory.usernames([spec['team_id']]).get(spec['team_id'])}"
+    if spec.get('created_after') or spec.get('created_before'):
+        title += f" ({spec.get('created_after', '')[:10]} to {spec.get('created_before', '')[:10]})"
+    return title
+
+def render_report(spec):
+    """Render a report, oldest feedback first"""
+    feedback_list = report_query(spec).order_by(Feedback.created_at, Feedback.id).all()
+    comments = {}
+    for start in range(0, len(feedback_list), RENDER_BATCH_SIZE):
+        batch = feedback_list[start:start + RENDER_BATCH_SIZE]
+        comments.update(comments_by_feedback([feedback.id for feedback in batch]))
+    names = user_directory.usernames(
+        [user_id for feedback in feedback_list for user_id in (feedback.giver_id, feedback.receiver_id)]
+        + [comment.user_id for feedback_comments in comments.values() for comment in feedback_comments]
+    )
+    return render_pdf(report_title(spec), feedback_list, comments, names)
+
+class ReportStore:
+    """Rendered reports on disk, one file per cache key with a '<key>.json'
+    copy of its spec. A '<spec id>.key' file names the current key of each
+    spec, so superseded renders of the same spec are deleted instead of
+    accumulating."""
+
+    def __init__(self, directory=None):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.pdf')
+
+    def exists(self, key):
+        return os.path.exists(self.path(key))
+
+    def read(self, key):
+        with open(self.path(key), 'rb') as report:
+            return report.read()
+
+    def spec(self, key):
+        """Spec a stored report was rendered from, or None"""
+        try:
+            with open(os.path.join(self.directory, f'{key}.json')) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _replace(self, path, content):
+        # Write then rename so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def write(self, key, content, spec):
+        os.makedirs(self.directory, exist_ok=True)
+        self._replace(self.path(key), content)
+        self._replace(os.path.join(self.directory, f'{key}.json'), json.dumps(spec).encode())
+
+        latest = os.path.join(self.directory, f'{spec_id(spec)}.key')
+        try:
+            with open(latest) as f:
+                previous = f.read().strip()
+        except FileNotFoundError:
+            previous = None
+        self._replace(latest, key.encode())
+        if previous and previous != key:
+            for path in (self.path(previous), os.path.join(self.directory, f'{previous}.json')):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+class ReportJobs:
+    """Report rendering through the job queue, deduplicated by cache key"""
+
+    def __init__(self):
+        self.store = ReportStore()
+
+    def configure(self, app):
+        self.store.directory = app.config['REPORT_CACHE_DIR']
+
+    def get_or_render(self, spec):
+        """Rendered bytes for a spec, rendering inline on a cache miss"""
+        key = report_key(spec)
+        if not self.store.exists(key):
+            self.store.write(key, render_report(spec), spec)
+        return self.store.read(key)
+
+    def _latest_job(self, key):
+        return (
+            Job.query.filter(Job.kind == 'render_report', Job.key == key)
+            .order_by(Job.id.desc())
+            .first()
+        )
+
+    def submit(self, spec):
+        """Queue a report unless it is cached or already queued; the caller commits"""
+        key = report_key(spec)
+        if self.store.exists(key):
+            return key, 'done'
+        job = self._latest_job(key)
+        if job is None or job.status in ('done', 'failed'):
+            job = enqueue('render_report', {'key': key, 'spec': spec}, key=key)
+        return key, job.status or 'queued'
+
+    def status(self, key):
+        """('done' | 'queued' | 'running' | 'failed', error), or (None, None) for unknown ids"""
+        if self.store.exists(key):
+            return 'done', None
+        job = self._latest_job(key)
+        if job is None:
+            return None, None
+        return job.status, job.last_error
+
+    def spec(self, key):
+        """Spec of a stored or queued report, or None for unknown ids"""
+        spec = self.store.spec(key)
+        if spec is None:
+            job = self._latest_job(key)
+            spec = job.payload['spec'] if job else None
+        return spec
+
+report_jobs = ReportJobs()
+
+@handler('render_report')
+def render_report_job(payload):
+    report_jobs.store.write(payload['key'], render_report(payload['spec']), payload['spec'])
@@ -1,51 +1,198 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context, send_file, url_for
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from sqlalchemy import func, or_
 from extensions import db
-from models import User, Feedback, FeedbackRequest, Comment, Notification
+from models import User, Feedback, FeedbackRequest, Comment, Notification, Job
+from queries import comment_counts, feedback_context, feedback_received_by, count_users
+from hierarchy import team_ids, count_reports, is_report
+from directory import user_directory
+from http_cache import conditional
+from tags import normalize_tags, set_feedback_tags, filter_by_tags, tag_counts
+from summaries import record_feedback, record_acknowledgement, record_request, get_summary, get_org_summary, get_user_summaries
+from bulk import feedback_item_error, request_item_error, create_feedback_bulk, create_requests_bulk
+from events import poll_waiters, notifications_after, wait_for_notifications, queue_notifications
+from exports import FORMATS, stream_feedback
+from reports import report_jobs, normalize_spec
+from search import search_supported, search_feedback, decode_cursor as decode_search_cursor
+from jobs import job_metrics
+from pagination import page_args, limit_arg, date_arg, paginate, page_response
+from serializers import (
+    fields_arg, wants, comment_summary_schema, feedback_item_schema, feedback_preview_schema, feedback_request_item_schema,
+    feedback_tagged_schema, feedback_search_schema, member_schema, user_item_schema, notification_schema, notification_item_schema
+)
 from datetime import datetime
-import json
+import re
 
 # Create blueprints
 feedback_bp = Blueprint('feedback', __name__)
 user_bp = Blueprint('users', __name__)
 notification_bp = Blueprint('notifications', __name__)
+job_bp = Blueprint('jobs', __name__)
 
 # Helper function to get user by ID
 def get_user_by_id(user_id):
     return User.query.get(user_id)
 
+# Helper functions to resolve the calling user
+def token_user_id():
+    """User id from the JWT, or None when no token was sent"""
+    if verify_jwt_in_request(optional=True):
+        return int(get_jwt_identity())
+    return None
+
+def current_user_id():
+    """User id from the JWT if one was sent, else (unless AUTH_REQUIRED is
+    set) the user_id query parameter"""
+    user_id = token_user_id()
+    if user_id or current_app.config['AUTH_REQUIRED']:
+        return user_id
+    return request.args.get('user_id', type=int)
+
+def actor_id(data, *fields, items=()):
+    """User a write is made as, and an error when the body (or one of the
+    bulk items) names someone else. With a token that is the caller; without
+    one (demo mode) the first of fields in the body, else the first user."""
+    caller = token_user_id()
+    if caller is None:
+        return next((data[field] for field in fields if field in data), 1), None
+    if any(isinstance(obj, dict) and obj.get(field, caller) != caller for obj in (data, *items) for field in fields):
+        return None, 'Cannot act as another user'
+    return caller, None
+
+# Helper functions to resolve the org a listing is scoped to
+def in_callers_org(user_id):
+    """Whether the caller may see user_id's data: themself or anyone under
+    them. Everyone is visible without a token (demo mode)."""
+    caller = token_user_id()
+    return caller is None or user_id == caller or is_report(caller, user_id)
+
+def can_see_feedback(feedback_id):
+    """Whether the feedback exists and its receiver is in the caller's org"""
+    receiver_id = db.session.query(Feedback.receiver_id).filter(Feedback.id == feedback_id).scalar()
+    return receiver_id is not None and in_callers_org(receiver_id)
+
+def can_see_report(spec):
+    """Whether everything a report spec covers is in the caller's org; a
+    report whose spec is unknown is only visible without a token"""
+    if token_user_id() is None:
+        return True
+    if spec is None:
+        return False
+    if 'feedback_id' in spec:
+        return can_see_feedback(spec['feedback_id'])
+    return in_callers_org(spec.get('receiver_id') or spec['team_id'])
+
+def team_scope(default_to_caller=True):
+    """Manager whose org (them and everyone under them) a listing covers,
+    or None for everyone. Without a token that is ?team_id=; with one it is
+    ?team_id= clamped to the caller's own org, else (by default) the caller."""
+    team_id = request.args.get('team_id', type=int)
+    caller = token_user_id()
+    if caller is None:
+        return team_id
+    if team_id and in_callers_org(team_id):
+        return team_id
+    return caller if team_id or default_to_caller else None
+
+def direct_only():
+    return request.args.get('direct', '').lower() in ('1', 'true')
+
+# Helper functions for bulk endpoints
+def bulk_body():
+    """Options and items of a bulk request. The body is either an object
+    with an "items" list or the list of items itself."""
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        return {}, data
+    data = data if isinstance(data, dict) else {}
+    return data, data.get('items')
+
+def bulk_items_error(items):
+    """Validate the shape of a bulk request body"""
+    if not isinstance(items, list) or not items:
+        return 'items must be a non-empty list'
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return f"At most {current_app.config['BULK_MAX_ITEMS']} items per request"
+    return None
+
+def bulk_response(results):
+    """201 when every item was created, 207 when some failed, 400 when all did"""
+    created = sum(1 for result in results if result['status'] == 'created')
+    status = 201 if created == len(results) else 207 if created else 400
+    return jsonify({'created': created, 'failed': len(results) - created, 'results': results}), status
+
+# Helper functions for report jobs
+def is_report_id(job_id):
+    return re.fullmatch(r'[0-9a-f]{40}', job_id) is not None
+
+def report_status(job_id, status, error=None):
+    data = {
+        'job_id': job_id,
+        'status': status,
+        'status_url': url_for('feedback.get_report_status', job_id=job_id),
+        'download_url': url_for('feedback.download_report', job_id=job_id)
+    }
+    if error:
+        data['error'] = error
+    return data
+
+# Helper function shared by the feedback listing and export
+def filter_feedback(query, created_after=None, created_before=None):
+    """Apply the team/receiver/giver/sentiment/date filters from the query string"""
+    team_id = team_scope()
+    if team_id:
+        query = query.filter(Feedback.receiver_id.in_(team_ids(team_id, include_self=True, direct_only=direct_only())))
+    if request.args.get('receiver_id', type=int):
+        query = query.filter(Feedback.receiver_id == request.args.get('receiver_id', type=int))
+    if request.args.get('giver_id', type=int):
+        query = query.filter(Feedback.giver_id == request.args.get('giver_id', type=int))
+    if request.args.get('sentiment'):
+        query = query.filter(Feedback.sentiment == request.args['sentiment'])
+    if created_after:
+        query = query.filter(Feedback.created_at >= created_after)
+    if created_before:
+        query = query.filter(Feedback.created_at < created_before)
+    return query
+
 # Feedback routes
 @feedback_bp.route('/', methods=['GET'])
+@conditional('feedback', 'comment', 'user')
 def get_all_feedback():
-    """Get all feedback with comments and tags"""
-    feedback_list = Feedback.query.all()
-    result = []
-    
-    for feedback in feedback_list:
-        feedback_data = {
-            'id': feedback.id,
-            'strengths': feedback.strengths,
-            'areas_to_improve': feedback.areas_to_improve,
-            'sentiment': feedback.sentiment,
-            'tags': feedback.tags if feedback.tags else [],
-            'giver_name': get_user_by_id(feedback.giver_id).username,
-            'receiver_name': get_user_by_id(feedback.receiver_id).username,
-            'created_at': feedback.created_at.isoformat(),
-            'comments': []
-        }
-        
-        # Add comments
-        for comment in feedback.comments:
-            comment_data = {
-                'id': comment.id,
-                'content': comment.content,
-                'author_name': get_user_by_id(comment.user_id).username,
-                'created_at': comment.created_at.isoformat()
-            }
-            feedback_data['comments'].append(comment_data)
-        
-        result.append(feedback_data)
-    
-    return jsonify(result)
+    """Get a page of feedback with comments and tags"""
+    try:
+        limit, cursor = page_args()
+        created_after = date_arg('created_after')
+        created_before = date_arg('created_before')
+        only = fields_arg(feedback_item_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = filter_feedback(Feedback.query, created_after, created_before)
+    feedback_list, next_cursor = paginate(query, Feedback, limit, cursor)
+    # Comments (or just their counts) are only loaded when they are part of the response
+    context = feedback_context(feedback_list, feedback_item_schema, only)
+    return page_response(feedback_item_schema.dump_many(feedback_list, context, only), next_cursor)
+
+@feedback_bp.route('/export', methods=['GET'])
+def export_feedback():
+    """Stream all matching feedback, oldest first, as NDJSON or a JSON array"""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return jsonify({'error': 'format must be "ndjson" or "json"'}), 400
+    
+    try:
+        created_after = date_arg('created_after')
+        created_before = date_arg('created_before')
+        only = fields_arg(feedback_item_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = filter_feedback(Feedback.query, created_after, created_before)
+    stream = stream_feedback(query, fmt, only)
+    return Response(stream_with_context(stream), mimetype=FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename=feedback.{fmt}',
+        'X-Accel-Buffering': 'no'
+    })
 
 @feedback_bp.route('/', methods=['POST'])
 def create_feedback():
@@ -56,27 +203,34 @@ def create_feedback():
     if not all(key in data for key in ['receiver_id', 'strengths', 'areas_to_improve']):
         return jsonify({'error': 'Missing required fields'}), 400
     
+    error = feedback_item_error(data)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    giver_id, error = actor_id(data, 'giver_id')
+    if error:
+        return jsonify({'error': error}), 403
+    
     # Create feedback
     feedback = Feedback(
-        giver_id=data.get('giver_id', 1),  # Default to first user for demo
+        giver_id=giver_id,
         receiver_id=data['receiver_id'],
         strengths=data['strengths'],
         areas_to_improve=data['areas_to_improve'],
-        sentiment=data.get('sentiment', 'neutral'),
-        tags=data.get('tags', [])
+        sentiment=data.get('sentiment', 'neutral')
     )
+    set_feedback_tags(feedback, data.get('tags', []))
     
     db.session.add(feedback)
-    db.session.commit()
-    
-    # Create notification
-    notification = Notification(
-        user_id=data['receiver_id'],
-        title='New Feedback Received',
-        message=f'You have received new {data.get("sentiment", "neutral")} feedback',
-        type='feedback'
-    )
-    db.session.add(notification)
+    record_feedback(feedback)
+    
+    # Queue the notification in the same transaction; a worker inserts and pushes it
+    queue_notifications([{
+        'user_id': data['receiver_id'],
+        'title': 'New Feedback Received',
+        'message': f'You have received new {data.get("sentiment", "neutral")} feedback',
+        'type': 'feedback'
+    }])
     db.session.commit()
     
     return jsonify({
@@ -84,60 +238,76 @@ def create_feedback():
         'message': 'Feedback created successfully'
     }), 201
 
+@feedback_bp.route('/bulk', methods=['POST'])
+def create_feedback_batch():
+    """Create many feedback items in one transaction"""
+    data, items = bulk_body()
+    
+    error = bulk_items_error(items)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    giver_id, error = actor_id(data, 'giver_id', items=items)
+    if error:
+        return jsonify({'error': error}), 403
+    
+    results = create_feedback_bulk(items, giver_id)
+    db.session.commit()
+    return bulk_response(results)
+
 @feedback_bp.route('/dashboard', methods=['GET'])
+@conditional('feedback_summary', 'feedback', 'feedback_request', 'comment', 'user')
 def get_dashboard():
     """Get dashboard data"""
-    # Get all users
-    users = User.query.all()
-    
-    # Get all feedback
-    feedback_list = Feedback.query.all()
-    
-    # Calculate statistics
-    total_feedback = len(feedback_list)
-    sentiment_counts = {
-        'positive': len([f for f in feedback_list if f.sentiment == 'positive']),
-        'neutral': len([f for f in feedback_list if f.sentiment == 'neutral']),
-        'negative': len([f for f in feedback_list if f.sentiment == 'negative'])
-    }
+    try:
+        limit, cursor = page_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Read the materialised counters for the requested scope, and restrict
+    # recent feedback and requests to the same people
+    feedback_query, request_query = Feedback.query, FeedbackRequest.query
+    receiver_id, team_id = request.args.get('receiver_id', type=int), team_scope()
+    if receiver_id and not in_callers_org(receiver_id):
+        return jsonify({'error': 'receiver_id is outside your organisation'}), 403
+    if receiver_id:
+        summary = get_summary('user', receiver_id)
+        feedback_query = feedback_query.filter(Feedback.receiver_id == receiver_id)
+        request_query = request_query.filter(FeedbackRequest.receiver_id == receiver_id)
+        team_size = 1
+    elif team_id:
+        # The manager and everyone under them, as in filter_feedback
+        summary = get_org_summary(team_id)
+        team = team_ids(team_id, include_self=True)
+        feedback_query = feedback_query.filter(Feedback.receiver_id.in_(team))
+        request_query = request_query.filter(FeedbackRequest.receiver_id.in_(team))
+        team_size = count_reports(team_id) + 1
+    else:
+        summary = get_summary()
+        team_size = count_users()
     
     # Get recent feedback
-    recent_feedback = []
-    for feedback in feedback_list[-5:]:  # Last 5 feedback
-        feedback_data = {
-            'id': feedback.id,
-            'strengths': feedback.strengths[:100] + '...' if len(feedback.strengths) > 100 else feedback.strengths,
-            'areas_to_improve': feedback.areas_to_improve[:100] + '...' if len(feedback.areas_to_improve) > 100 else feedback.areas_to_improve,
-            'sentiment': feedback.sentiment,
-            'tags': feedback.tags if feedback.tags else [],
-            'giver_name': get_user_by_id(feedback.giver_id).username,
-            'receiver_name': get_user_by_id(feedback.receiver_id).username,
-            'created_at': feedback.created_at.isoformat()
-        }
-        recent_feedback.append(feedback_data)
-    
-    # Get feedback requests
-    requests = FeedbackRequest.query.all()
-    feedback_requests = []
-    for req in requests:
-        request_data = {
-            'id': req.id,
-            'requester_name': get_user_by_id(req.requester_id).username,
-            'receiver_name': get_user_by_id(req.receiver_id).username,
-            'message': req.message,
-            'tags': req.tags if req.tags else [],
-            'priority': req.priority,
-            'due_date': req.due_date.isoformat() if req.due_date else None,
-            'created_at': req.created_at.isoformat()
-        }
-        feedback_requests.append(request_data)
+    recent = feedback_query.order_by(Feedback.created_at.desc(), Feedback.id.desc()).limit(5).all()
+    
+    # Get a page of feedback requests
+    requests, next_cursor = paginate(request_query, FeedbackRequest, limit, cursor)
+    
+    # Resolve every name on the page in one lookup
+    names = user_directory.usernames(
+        [user_id for feedback in recent for user_id in (feedback.giver_id, feedback.receiver_id)]
+        + [user_id for req in requests for user_id in (req.requester_id, req.receiver_id)]
+    )
     
+    context = {'names': names, 'comment_counts': comment_counts([feedback.id for feedback in recent])}
     return jsonify({
-        'total_feedback': total_feedback,
-        'sentiment_counts': sentiment_counts,
-        'team_size': len(users),
-        'recent_feedback': recent_feedback,
-        'feedback_requests': feedback_requests
+        'total_feedback': summary['total_feedback'],
+        'sentiment_counts': summary['sentiment_counts'],
+        'unacknowledged_count': summary['unacknowledged_count'],
+        'open_requests': summary['open_requests'],
+        'team_size': team_size,
+        'recent_feedback': feedback_preview_schema.dump_many(recent, context),
+        'feedback_requests': feedback_request_item_schema.dump_many(requests, context),
+        'feedback_requests_next_cursor': next_cursor
     })
 
 @feedback_bp.route('/request', methods=['POST'])
@@ -148,26 +318,37 @@ def request_feedback():
     if not all(key in data for key in ['receiver_id']):
         return jsonify({'error': 'Missing required fields'}), 400
     
+    error = request_item_error(data)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        due_date = datetime.fromisoformat(data['due_date']) if data.get('due_date') else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'Invalid due_date'}), 400
+    
+    requester_id, error = actor_id(data, 'requester_id')
+    if error:
+        return jsonify({'error': error}), 403
+    
     request_obj = FeedbackRequest(
-        requester_id=data.get('requester_id', 1),  # Default to first user
+        requester_id=requester_id,
         receiver_id=data['receiver_id'],
         message=data.get('message', ''),
         tags=data.get('tags', []),
         priority=data.get('priority', 'medium'),
-        due_date=datetime.fromisoformat(data['due_date']) if data.get('due_date') else None
+        due_date=due_date
     )
     
     db.session.add(request_obj)
-    db.session.commit()
-    
-    # Create notification
-    notification = Notification(
-        user_id=data['receiver_id'],
-        title='Feedback Request',
-        message=f'Someone has requested feedback from you',
-        type='request'
-    )
-    db.session.add(notification)
+    record_request(request_obj)
+    
+    # Queue the notification in the same transaction; a worker inserts and pushes it
+    queue_notifications([{
+        'user_id': data['receiver_id'],
+        'title': 'Feedback Request',
+        'message': 'Someone has requested feedback from you',
+        'type': 'request'
+    }])
     db.session.commit()
     
     return jsonify({
@@ -175,38 +356,86 @@ def request_feedback():
         'message': 'Feedback request created successfully'
     }), 201
 
+@feedback_bp.route('/requests/bulk', methods=['POST'])
+def request_feedback_batch():
+    """Request feedback from many people in one transaction"""
+    data, items = bulk_body()
+    
+    error = bulk_items_error(items)
+    if error:
+        return jsonify({'error': error}), 400
+    
+    requester_id, error = actor_id(data, 'requester_id', items=items)
+    if error:
+        return jsonify({'error': error}), 403
+    
+    results = create_requests_bulk(items, requester_id)
+    db.session.commit()
+    return bulk_response(results)
+
 @feedback_bp.route('/requests', methods=['GET'])
 def get_feedback_requests():
-    """Get all feedback requests"""
-    requests = FeedbackRequest.query.all()
-    result = []
-    
-    for req in requests:
-        request_data = {
-            'id': req.id,
-            'requester_name': get_user_by_id(req.requester_id).username,
-            'receiver_name': get_user_by_id(req.receiver_id).username,
-            'message': req.message,
-            'tags': req.tags if req.tags else [],
-            'priority': req.priority,
-            'due_date': req.due_date.isoformat() if req.due_date else None,
-            'created_at': req.created_at.isoformat()
-        }
-        result.append(request_data)
-    
-    return jsonify(result)
+    """Get a page of feedback requests"""
+    try:
+        limit, cursor = page_args()
+        only = fields_arg(feedback_request_item_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Requests where either side is in the caller's org
+    query = FeedbackRequest.query
+    team_id = team_scope()
+    if team_id:
+        team = team_ids(team_id, include_self=True, direct_only=direct_only())
+        query = query.filter(or_(FeedbackRequest.receiver_id.in_(team), FeedbackRequest.requester_id.in_(team)))
+    if request.args.get('requester_id', type=int):
+        query = query.filter(FeedbackRequest.requester_id == request.args.get('requester_id', type=int))
+    if request.args.get('receiver_id', type=int):
+        query = query.filter(FeedbackRequest.receiver_id == request.args.get('receiver_id', type=int))
+    if request.args.get('priority'):
+        query = query.filter(FeedbackRequest.priority == request.args['priority'])
+    
+    requests, next_cursor = paginate(query, FeedbackRequest, limit, cursor)
+    names = user_directory.usernames([user_id for req in requests for user_id in (req.requester_id, req.receiver_id)])
+    return page_response(feedback_request_item_schema.dump_many(requests, {'names': names}, only), next_cursor)
+
+@feedback_bp.route('/<int:feedback_id>/comments', methods=['GET'])
+@conditional('comment', 'user')
+def get_comments(feedback_id):
+    """Get a page of comments on one feedback item, newest first"""
+    if not can_see_feedback(feedback_id):
+        return jsonify({'error': 'Feedback not found'}), 404
+    
+    try:
+        limit, cursor = page_args()
+        only = fields_arg(comment_summary_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # A range scan of ix_comment_feedback_created_at
+    query = Comment.query.filter(Comment.feedback_id == feedback_id)
+    comments, next_cursor = paginate(query, Comment, limit, cursor)
+    names = user_directory.usernames([comment.user_id for comment in comments])
+    return page_response(comment_summary_schema.dump_many(comments, {'names': names}, only), next_cursor)
 
 @feedback_bp.route('/<int:feedback_id>/comments', methods=['POST'])
 def add_comment(feedback_id):
     """Add comment to feedback"""
-    data = request.get_json()
+    data = request.get_json() or {}
     
     if not data.get('content'):
         return jsonify({'error': 'Comment content is required'}), 400
     
+    user_id, error = actor_id(data, 'user_id', 'author_id')
+    if error:
+        return jsonify({'error': error}), 403
+    
+    if not can_see_feedback(feedback_id):
+        return jsonify({'error': 'Feedback not found'}), 404
+    
     comment = Comment(
         feedback_id=feedback_id,
-        author_id=data.get('author_id', 1),  # Default to first user
+        user_id=user_id,
         content=data['content']
     )
     
@@ -218,118 +447,192 @@ def add_comment(feedback_id):
         'message': 'Comment added successfully'
     }), 201
 
-@feedback_bp.route('/<int:feedback_id>/export', methods=['GET'])
-def export_feedback_pdf(feedback_id):
-    """Export feedback as PDF (mock implementation)"""
+@feedback_bp.route('/<int:feedback_id>/acknowledge', methods=['PUT'])
+def acknowledge_feedback(feedback_id):
+    """Mark feedback as acknowledged by its receiver"""
     feedback = Feedback.query.get(feedback_id)
     if not feedback:
         return jsonify({'error': 'Feedback not found'}), 404
     
-    # Mock PDF generation - in real implementation, you'd use a library like reportlab
-    pdf_content = f"""
-    Feedback Report
-    
-    From: {get_user_by_id(feedback.giver_id).username}
-    To: {get_user_by_id(feedback.receiver_id).username}
-    Date: {feedback.created_at.strftime('%Y-%m-%d')}
-    Sentiment: {feedback.sentiment}
-    Tags: {', '.join(feedback.tags) if feedback.tags else 'None'}
-    
-    Content:
-    {feedback.strengths}
-    
-    Areas to Improve:
-    {feedback.areas_to_improve}
-    
-    Comments:
-    """
+    caller = token_user_id()
+    if caller is not None and caller != feedback.receiver_id:
+        return jsonify({'error': 'Only the receiver can acknowledge feedback'}), 403
     
-    for comment in feedback.comments:
-        pdf_content += f"\n- {get_user_by_id(comment.user_id).username}: {comment.content}"
+    if not feedback.acknowledged:
+        feedback.acknowledged = True
+        record_acknowledgement(feedback)
+        db.session.commit()
     
-    # Return as text for now - in real implementation, return actual PDF
     return jsonify({
-        'content': pdf_content,
-        'filename': f'feedback-{feedback_id}.txt'
+        'id': feedback.id,
+        'message': 'Feedback acknowledged'
     })
 
+@feedback_bp.route('/<int:feedback_id>/export', methods=['GET'])
+def export_feedback_pdf(feedback_id):
+    """Export one feedback item as a PDF, served from the report cache; use
+    POST /reports to have it rendered by the job queue instead"""
+    if not can_see_feedback(feedback_id):
+        return jsonify({'error': 'Feedback not found'}), 404
+    
+    content = report_jobs.get_or_render({'feedback_id': feedback_id})
+    return Response(content, mimetype='application/pdf', headers={
+        'Content-Disposition': f'attachment; filename=feedback-{feedback_id}.pdf'
+    })
+
+@feedback_bp.route('/reports', methods=['POST'])
+def create_report():
+    """Render a report for a feedback item, user or team in the background"""
+    try:
+        spec = normalize_spec(request.get_json() or {})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not can_see_report(spec):
+        return jsonify({'error': 'Report is outside your organisation'}), 403
+    
+    job_id, status = report_jobs.submit(spec)
+    db.session.commit()
+    return jsonify(report_status(job_id, status)), 200 if status == 'done' else 202
+
+@feedback_bp.route('/reports/<job_id>', methods=['GET'])
+def get_report_status(job_id):
+    """Get the state of a report job"""
+    status, error = report_jobs.status(job_id) if is_report_id(job_id) else (None, None)
+    if status is None or not can_see_report(report_jobs.spec(job_id)):
+        return jsonify({'error': 'Report not found'}), 404
+    
+    return jsonify(report_status(job_id, status, error))
+
+@feedback_bp.route('/reports/<job_id>/download', methods=['GET'])
+def download_report(job_id):
+    """Download a rendered report"""
+    found = is_report_id(job_id) and report_jobs.store.exists(job_id)
+    if not found or not can_see_report(report_jobs.store.spec(job_id)):
+        return jsonify({'error': 'Report not found'}), 404
+    
+    return send_file(report_jobs.store.path(job_id), mimetype='application/pdf',
+                     as_attachment=True, download_name=f'feedback-report-{job_id[:12]}.pdf')
+
 @feedback_bp.route('/by-tags', methods=['GET'])
 def get_feedback_by_tags():
-    """Get feedback filtered by tags"""
-    tags = request.args.get('tags', '').split(',')
-    if not tags or tags == ['']:
+    """Get a page of feedback carrying any (or all) of the given tags"""
+    tags = normalize_tags(request.args.get('tags', '').split(','))
+    if not tags:
         return jsonify({'error': 'Tags parameter is required'}), 400
     
-    feedback_list = Feedback.query.all()
-    result = []
-    
-    for feedback in feedback_list:
-        feedback_tags = json.loads(feedback.tags) if feedback.tags else []
-        if any(tag in feedback_tags for tag in tags):
-            feedback_data = {
-                'id': feedback.id,
-                'strengths': feedback.strengths,
-                'areas_to_improve': feedback.areas_to_improve,
-                'sentiment': feedback.sentiment,
-                'tags': feedback_tags,
-                'giver_name': get_user_by_id(feedback.giver_id).username,
-                'receiver_name': get_user_by_id(feedback.receiver_id).username,
-                'created_at': feedback.created_at.isoformat()
-            }
-            result.append(feedback_data)
-    
-    return jsonify(result)
+    match = request.args.get('match', 'any')
+    if match not in ('any', 'all'):
+        return jsonify({'error': 'match must be "any" or "all"'}), 400
+    
+    try:
+        limit, cursor = page_args()
+        only = fields_arg(feedback_tagged_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = filter_by_tags(filter_feedback(Feedback.query), tags, match)
+    feedback_list, next_cursor = paginate(query, Feedback, limit, cursor)
+    context = feedback_context(feedback_list, feedback_tagged_schema, only)
+    return page_response(feedback_tagged_schema.dump_many(feedback_list, context, only), next_cursor)
+
+@feedback_bp.route('/search', methods=['GET'])
+@conditional('feedback', 'comment', 'feedback_tag', 'user')
+def search_feedback_text():
+    """Get a page of feedback matching q in its text or comments, best first,
+    with the matching words highlighted"""
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'q parameter is required'}), 400
+    if not search_supported():
+        return jsonify({'error': 'Search is not available on this database'}), 501
+    
+    match = request.args.get('match', 'any')
+    if match not in ('any', 'all'):
+        return jsonify({'error': 'match must be "any" or "all"'}), 400
+    
+    try:
+        limit = limit_arg()
+        cursor = decode_search_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        created_after = date_arg('created_after')
+        created_before = date_arg('created_before')
+        only = fields_arg(feedback_search_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = filter_feedback(Feedback.query, created_after, created_before)
+    tags = normalize_tags(request.args.get('tags', '').split(','))
+    if tags:
+        query = filter_by_tags(query, tags, match)
+    
+    feedback_list, ranks, highlights, next_cursor = search_feedback(query, text, limit, cursor)
+    context = feedback_context(feedback_list, feedback_search_schema, only)
+    context.update(ranks=ranks, highlights=highlights)
+    return page_response(feedback_search_schema.dump_many(feedback_list, context, only), next_cursor)
+
+@feedback_bp.route('/tags', methods=['GET'])
+def get_tag_counts():
+    """Get every tag with the number of feedback items using it, counting
+    only feedback received in the caller's org"""
+    team_id = team_scope()
+    return jsonify(tag_counts(team_ids(team_id, include_self=True, direct_only=direct_only()) if team_id else None))
 
 @feedback_bp.route('/team', methods=['GET'])
+@conditional('user')
 def get_team_members():
-    """Get team members for feedback forms"""
-    users = User.query.all()
-    result = []
-    
-    for user in users:
-        user_data = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'role': user.role,
-            'created_at': user.created_at.isoformat()
-        }
-        result.append(user_data)
-    
-    return jsonify(result)
+    """Get a page of team members for feedback forms, limited to one
+    manager's reports (direct and transitive) when team_id is given or a
+    manager is calling; employees see everyone they can give feedback to"""
+    try:
+        limit, cursor = page_args()
+        only = fields_arg(member_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = User.query
+    team_id = team_scope(default_to_caller=token_user_id() is not None and get_jwt().get('role') == 'manager')
+    if team_id:
+        query = query.filter(User.id.in_(team_ids(team_id, direct_only=direct_only())))
+    if request.args.get('role'):
+        query = query.filter(User.role == request.args['role'])
+    
+    users, next_cursor = paginate(query, User, limit, cursor)
+    return page_response(member_schema.dump_many(users, only=only), next_cursor)
 
 # User routes
 @user_bp.route('/', methods=['GET'])
+@conditional('user', 'feedback', 'feedback_summary')
 def get_all_users():
-    """Get all users with their feedback data"""
-    users = User.query.all()
-    result = []
-    
-    for user in users:
-        # Get feedback received by this user
-        feedback_received = Feedback.query.filter_by(receiver_id=user.id).all()
-        feedback_data = []
-        
-        for feedback in feedback_received:
-            feedback_data.append({
-                'id': feedback.id,
-                'strengths': feedback.strengths,
-                'areas_to_improve': feedback.areas_to_improve,
-                'sentiment': feedback.sentiment,
-                'created_at': feedback.created_at.isoformat()
-            })
-        
-        user_data = {
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'role': user.role,
-            'created_at': user.created_at.isoformat(),
-            'feedback_received': feedback_data
-        }
-        result.append(user_data)
-    
-    return jsonify(result)
+    """Get a page of users with their feedback counters, limited to the
+    caller's org. ?fields=...,feedback_received adds each user's newest
+    received feedback."""
+    try:
+        limit, cursor = page_args()
+        only = fields_arg(user_item_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = User.query
+    team_id = team_scope()
+    if team_id:
+        query = query.filter(User.id.in_(team_ids(team_id, include_self=True)))
+    if request.args.get('role'):
+        query = query.filter(User.role == request.args['role'])
+    if request.args.get('manager_id', type=int):
+        # Direct reports by default; transitive=true walks the whole org below the manager
+        manager_id = request.args.get('manager_id', type=int)
+        if request.args.get('transitive', '').lower() in ('1', 'true'):
+            query = query.filter(User.id.in_(team_ids(manager_id)))
+        else:
+            query = query.filter(User.manager_id == manager_id)
+    
+    users, next_cursor = paginate(query, User, limit, cursor)
+    # Counters and received feedback are only loaded when they are part of the response
+    user_ids = [user.id for user in users]
+    summaries = get_user_summaries(user_ids) if wants(only, 'feedback_summary') else {}
+    received = feedback_received_by(
+        user_ids, current_app.config['USERS_RECEIVED_FEEDBACK_LIMIT']
+    ) if wants(only, 'feedback_received') else {}
+    return page_response(user_item_schema.dump_many(users, {'summaries': summaries, 'received': received}, only), next_cursor)
 
 @user_bp.route('/<int:user_id>', methods=['GET'])
 def get_user(user_id):
@@ -338,21 +641,20 @@ def get_user(user_id):
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
-    return jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'role': user.role,
-        'created_at': user.created_at.isoformat()
-    })
+    return jsonify(member_schema.dump(user))
 
 @user_bp.route('/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
-    """Update user profile"""
+    """Update a user's profile; callers may update themselves and their
+    direct reports"""
     user = get_user_by_id(user_id)
     if not user:
         return jsonify({'error': 'User not found'}), 404
     
+    caller = token_user_id()
+    if caller is not None and caller not in (user.id, user.manager_id):
+        return jsonify({'error': 'Cannot update another user'}), 403
+    
     data = request.get_json()
     
     if 'username' in data:
@@ -361,40 +663,132 @@ def update_user(user_id):
         user.email = data['email']
     
     db.session.commit()
+    user_directory.invalidate(user.id)
     
-    return jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'role': user.role,
-        'created_at': user.created_at.isoformat()
-    })
+    return jsonify(member_schema.dump(user))
 
 # Notification routes
 @notification_bp.route('/', methods=['GET'])
 def get_notifications():
-    """Get all notifications"""
-    notifications = Notification.query.order_by(Notification.created_at.desc()).all()
-    result = []
-    
-    for notification in notifications:
-        notification_data = {
-            'id': notification.id,
-            'title': notification.title,
-            'message': notification.message,
-            'type': notification.type,
-            'read': notification.read,
-            'created_at': notification.created_at.isoformat()
-        }
-        result.append(notification_data)
-    
-    return jsonify(result)
+    """Get a page of notifications, newest first; only the caller's own
+    when a token was sent"""
+    try:
+        limit, cursor = page_args()
+        only = fields_arg(notification_item_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = Notification.query
+    user_id = current_user_id()
+    if user_id:
+        query = query.filter(Notification.user_id == user_id)
+    if request.args.get('read') in ('true', 'false'):
+        query = query.filter(Notification.read == (request.args['read'] == 'true'))
+    
+    notifications, next_cursor = paginate(query, Notification, limit, cursor)
+    return page_response(notification_item_schema.dump_many(notifications, only=only), next_cursor)
+
+@notification_bp.route('/inbox', methods=['GET'])
+def get_inbox():
+    """Get a page of the current user's notifications, newest first"""
+    user_id = current_user_id()
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    try:
+        limit, cursor = page_args()
+        only = fields_arg(notification_schema)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = Notification.query.filter(Notification.user_id == user_id)
+    if request.args.get('read') in ('true', 'false'):
+        query = query.filter(Notification.read == (request.args['read'] == 'true'))
+    
+    notifications, next_cursor = paginate(query, Notification, limit, cursor)
+    return page_response(notification_schema.dump_many(notifications, only=only), next_cursor)
+
+@notification_bp.route('/poll', methods=['GET'])
+def poll_inbox():
+    """Long-poll for the current user's notifications with an id above
+    ?after=, waiting up to ?wait= seconds (capped) for one to arrive. When
+    this process already has its maximum of waiting requests it answers at
+    once, with retry_after telling the client to poll again later."""
+    user_id = current_user_id()
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    config = current_app.config
+    after_id = request.args.get('after', type=int)
+    if after_id is None:
+        # First poll: start from the newest notification
+        last_id = db.session.query(func.max(Notification.id)).filter(Notification.user_id == user_id).scalar()
+        return jsonify({'items': [], 'last_id': last_id or 0, 'retry_after': 0})
+    
+    timeout = config['NOTIFICATIONS_POLL_TIMEOUT_SECONDS']
+    wait = max(0, min(request.args.get('wait', timeout, type=float), timeout))
+    limit, retry_after = config['NOTIFICATIONS_POLL_LIMIT'], 0
+    if wait and poll_waiters.try_acquire(config['NOTIFICATIONS_POLL_MAX_WAITERS']):
+        try:
+            items = wait_for_notifications(user_id, after_id, wait, config['NOTIFICATIONS_POLL_CHECK_SECONDS'], limit)
+        finally:
+            poll_waiters.release()
+    else:
+        items = notifications_after(user_id, after_id, limit)
+        if wait and not items:
+            retry_after = config['NOTIFICATIONS_POLL_FALLBACK_SECONDS']
+    
+    return jsonify({
+        'items': items,
+        'last_id': items[-1]['id'] if items else after_id,
+        'retry_after': retry_after
+    })
+
+@notification_bp.route('/unread-count', methods=['GET'])
+def get_unread_count():
+    """Count the current user's unread notifications"""
+    user_id = current_user_id()
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    # Answered from ix_notification_user_read_created_at without touching the table
+    count = (
+        db.session.query(func.count())
+        .select_from(Notification)
+        .filter(Notification.user_id == user_id, Notification.read.is_(False))
+        .scalar()
+    )
+    return jsonify({'unread_count': count})
+
+@notification_bp.route('/read', methods=['PUT'])
+def mark_notifications_read():
+    """Mark all, or the given ids of, the current user's notifications as read"""
+    user_id = current_user_id()
+    if not user_id:
+        return jsonify({'error': 'Authentication required'}), 401
+    
+    data = request.get_json() or {}
+    query = Notification.query.filter(Notification.user_id == user_id, Notification.read.is_(False))
+    if not data.get('all'):
+        ids = data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify({'error': 'Provide "ids" as a list of integers or "all": true'}), 400
+        query = query.filter(Notification.id.in_(ids))
+    
+    updated = query.update({Notification.read: True}, synchronize_session=False)
+    db.session.commit()
+    
+    return jsonify({
+        'updated': updated,
+        'message': 'Notifications marked as read'
+    })
 
 @notification_bp.route('/<int:notification_id>/read', methods=['PUT'])
 def mark_notification_read(notification_id):
-    """Mark notification as read"""
+    """Mark one of the current user's notifications as read"""
     notification = Notification.query.get(notification_id)
-    if not notification:
+    user_id = current_user_id()
+    if not notification or (user_id and notification.user_id != user_id):
         return jsonify({'error': 'Notification not found'}), 404
     
     notification.read = True
@@ -426,4 +820,19 @@ def create_notification():
     return jsonify({
         'id': notification.id,
         'message': 'Notification created successfully'
-    }), 201 
\ No newline at end of file
+    }), 201 
+
+# Job routes
+@job_bp.route('/metrics', methods=['GET'])
+def get_job_metrics():
+    """Get queue depth and wait/run latency of background jobs"""
+    return jsonify(job_metrics())
+
+@job_bp.route('/<int:job_id>', methods=['GET'])
+def get_job(job_id):
+    """Get a background job's state"""
+    job = Job.query.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    return jsonify(job.to_dict())
@@ -0,0 +1,279 @@
+import base64
+import re
+import click
+from flask.cli import with_appcontext
+from markupsafe import escape
+from sqlalchemy import event, func, literal_column, select, table, column, cast, and_, or_, Float
+from extensions import db
+from models import Feedback, Comment
+
+# Full-text search over feedback. Each feedback item has one search document
+# holding its strengths, areas to improve and all of its comments. On SQLite
+# that is an FTS5 table (porter stemming, bm25 ranking); on PostgreSQL a
+# table of weighted tsvectors with a GIN index. Database triggers keep the
+# documents in step with every insert, update and delete, including bulk
+# writes that bypass the ORM. Results are ranked, keyset-paginated on
+# (rank, id) and highlighted with MARK around the matching words.
+
+MARK = ('<mark>', '</mark>')
+# The database wraps matches in these private-use characters; the stored
+# text is HTML-escaped before they are swapped for MARK, so highlights are
+# safe to render as HTML
+_SENTINELS = ('\ue000', '\ue001')
+MAX_TERMS = 10
+
+_SQLITE_SETUP = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS feedback_search USING fts5(
+        strengths, areas_to_improve, comments, tokenize='porter unicode61'
+    )""",
+    # Matches in the feedback text rank above matches in its comments
+    "INSERT INTO feedback_search(feedback_search, rank) VALUES ('rank', 'bm25(2.0, 2.0, 1.0)')",
+    """CREATE TRIGGER IF NOT EXISTS feedback_search_insert AFTER INSERT ON feedback BEGIN
+        INSERT INTO feedback_search(rowid, strengths, areas_to_improve, comments)
+        VALUES (new.id, new.strengths, new.areas_to_improve, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS feedback_search_update AFTER UPDATE OF strengths, areas_to_improve ON feedback BEGIN
+        UPDATE feedback_search SET strengths = new.strengths, areas_to_improve = new.areas_to_improve
+        WHERE rowid = new.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS feedback_search_delete AFTER DELETE ON feedback BEGIN
+        DELETE FROM feedback_search WHERE rowid = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comment_search_insert AFTER INSERT ON comment BEGIN
+        UPDATE feedback_search SET comments = (
+            SELECT group_concat(content, char(10)) FROM comment WHERE feedback_id = new.feedback_id
+        ) WHERE rowid = new.feedback_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comment_search_update AFTER UPDATE OF content, feedback_id ON comment BEGIN
+        UPDATE feedback_search SET comments = coalesce((
+            SELECT group_concat(content, char(10)) FROM comment WHERE feedback_id = old.feedback_id
+        ), '') WHERE rowid = old.feedback_id;
+        UPDATE feedback_search SET comments = (
+            SELECT group_concat(content, char(10)) FROM comment WHERE feedback_id = new.feedback_id
+        ) WHERE rowid = new.feedback_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comment_search_delete AFTER DELETE ON comment BEGIN
+        UPDATE feedback_search SET comments = coalesce((
+            SELECT group_concat(content, char(10)) FROM comment WHERE feedback_id = old.feedback_id
+        ), '') WHERE rowid = old.feedback_id;
+    END""",
+]
+
+_SQLITE_TEARDOWN = [
+    'DROP TRIGGER IF EXISTS feedback_search_insert',
+    'DROP TRIGGER IF EXISTS feedback_search_update',
+    'DROP TRIGGER IF EXISTS feedback_search_delete',
+    'DROP TRIGGER IF EXISTS comment_search_insert',
+    'DROP TRIGGER IF EXISTS comment_search_update',
+    'DROP TRIGGER IF EXISTS comment_search_delete',
+    'DROP TABLE IF EXISTS feedback_search',
+]
+
+_SQLITE_REBUILD = [
+    'DELETE FROM feedback_search',
+    """INSERT INTO feedback_search(rowid, strengths, areas_to_improve, comments)
+    SELECT feedback.id, feedback.strengths, feedback.areas_to_improve, coalesce((
+        SELECT group_concat(content, char(10)) FROM comment WHERE comment.feedback_id = feedback.id
+    ), '')
+    FROM feedback""",
+]
+
+_POSTGRES_SETUP = [
+    """CREATE TABLE IF NOT EXISTS feedback_search (
+        feedback_id INTEGER PRIMARY KEY REFERENCES feedback (id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )""",
+    'CREATE INDEX IF NOT EXISTS ix_feedback_search_document ON feedback_search USING GIN (document)',
+    """CREATE OR REPLACE FUNCTION feedback_search_refresh(target INTEGER) RETURNS VOID AS $$
+        INSERT INTO feedback_search (feedback_id, document)
+        SELECT feedback.id,
+            setweight(to_tsvector('english', feedback.strengths), 'A')
+            || setweight(to_tsvector('english', feedback.areas_to_improve), 'A')
+            || setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(content, E'\\n') FROM comment WHERE comment.feedback_id = feedback.id
+            ), '')), 'B')
+        FROM feedback WHERE feedback.id = target
+        ON CONFLICT (feedback_id) DO UPDATE SET document = excluded.document
+    $$ LANGUAGE SQL""",
+    """CREATE OR REPLACE FUNCTION feedback_search_feedback_trigger() RETURNS TRIGGER AS $$
+    BEGIN
+        PERFORM feedback_search_refresh(NEW.id);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    """CREATE OR REPLACE FUNCTION feedback_search_comment_trigger() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM feedback_search_refresh(OLD.feedback_id);
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM feedback_search_refresh(NEW.feedback_id);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql""",
+    'DROP TRIGGER IF EXISTS feedback_search_sync ON feedback',
+    """CREATE TRIGGER feedback_search_sync AFTER INSERT OR UPDATE OF strengths, areas_to_improve ON feedback
+        FOR EACH ROW EXECUTE FUNCTION feedback_search_feedback_trigger()""",
+    'DROP TRIGGER IF EXISTS comment_search_sync ON comment',
+    """CREATE TRIGGER comment_search_sync AFTER INSERT OR UPDATE OF content, feedback_id OR DELETE ON comment
+        FOR EACH ROW EXECUTE FUNCTION feedback_search_comment_trigger()""",
+]
+
+_POSTGRES_TEARDOWN = [
+    'DROP TABLE IF EXISTS feedback_search',
+    'DROP FUNCTION IF EXISTS feedback_search_feedback_trigger() CASCADE',
+    'DROP FUNCTION IF EXISTS feedback_search_comment_trigger() CASCADE',
+    'DROP FUNCTION IF EXISTS feedback_search_refresh(INTEGER)',
+]
+
+_POSTGRES_REBUILD = [
+    'TRUNCATE feedback_search',
+    'SELECT feedback_search_refresh(id) FROM feedback',
+]
+
+_DDL = {
+    'sqlite': (_SQLITE_SETUP, _SQLITE_TEARDOWN, _SQLITE_REBUILD),
+    'postgresql': (_POSTGRES_SETUP, _POSTGRES_TEARDOWN, _POSTGRES_REBUILD),
+}
+
+def _execute(connection, statements):
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+
+def install_search_index(target, connection, **kw):
+    """Create the search table and its sync triggers after db.create_all()"""
+    if connection.dialect.name in _DDL:
+        _execute(connection, _DDL[connection.dialect.name][0])
+
+def remove_search_index(target, connection, **kw):
+    """Drop the search table before db.drop_all() drops what it refers to"""
+    if connection.dialect.name in _DDL:
+        _execute(connection, _DDL[connection.dialect.name][1])
+
+def fill_search_index(connection):
+    """(Re)build every search document from the feedback and comment tables"""
+    _execute(connection, _DDL[connection.dialect.name][2])
+
+event.listen(db.metadata, 'after_create', install_search_index)
+event.listen(db.metadata, 'before_drop', remove_search_index)
+
+def dialect_name():
+    return db.session.get_bind().dialect.name
+
+def search_supported():
+    return dialect_name() in _DDL
+
+def search_terms(text):
+    """Words of a user query; punctuation and search operators are dropped"""
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+def encode_cursor(rank, row_id):
+    """Encode a (rank, id) position as an opaque cursor string"""
+    return base64.urlsafe_b64encode(f'{rank!r}|{row_id}'.encode()).decode()
+
+def decode_cursor(cursor):
+    """Decode a search cursor back into (rank, id)"""
+    try:
+        rank, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return float(rank), int(row_id)
+    except (ValueError, UnicodeError):
+        raise ValueError('Invalid cursor')
+
+def _sqlite_search(terms):
+    # Every term must match, after stemming
+    expression = ' '.join(f'"{term}"' for term in terms)
+    index = table('feedback_search', column('rowid'))
+    match = literal_column('feedback_search').op('MATCH')(expression)
+    return index, index.c.rowid, match, literal_column('feedback_search.rank')
+
+def _postgres_search(terms):
+    query = func.plainto_tsquery('english', ' '.join(terms))
+    index = table('feedback_search', column('feedback_id'), column('document'))
+    match = index.c.document.op('@@')(query)
+    # Negated so that, as with bm25 on SQLite, lower ranks are better
+    rank = cast(-func.ts_rank_cd(index.c.document, query), Float(53))
+    return index, index.c.feedback_id, match, rank
+
+def _sqlite_highlights(terms, ids):
+    _, rowid, match, _ = _sqlite_search(terms)
+    index = literal_column('feedback_search')
+    return db.session.execute(
+        select(
+            rowid,
+            func.highlight(index, 0, *_SENTINELS),
+            func.highlight(index, 1, *_SENTINELS),
+            func.snippet(index, 2, *_SENTINELS, '...', 16)
+        ).where(match, rowid.in_(ids))
+    )
+
+def _postgres_highlights(terms, ids):
+    query = func.plainto_tsquery('english', ' '.join(terms))
+    whole = f'StartSel="{_SENTINELS[0]}", StopSel="{_SENTINELS[1]}", HighlightAll=true'
+    fragment = f'StartSel="{_SENTINELS[0]}", StopSel="{_SENTINELS[1]}", MaxWords=16, MinWords=6'
+    comments = (
+        select(func.string_agg(Comment.content, '\n'))
+        .where(Comment.feedback_id == Feedback.id)
+        .scalar_subquery()
+    )
+    return db.session.execute(
+        select(
+            Feedback.id,
+            func.ts_headline('english', Feedback.strengths, query, whole),
+            func.ts_headline('english', Feedback.areas_to_improve, query, whole),
+            func.ts_headline('english', func.coalesce(comments, ''), query, fragment)
+        ).where(Feedback.id.in_(ids))
+    )
+
+def _marked(text):
+    """HTML-escape highlighted text and turn the sentinels into MARK"""
+    return str(escape(text)).replace(_SENTINELS[0], MARK[0]).replace(_SENTINELS[1], MARK[1])
+
+def search_feedback(query, text, limit, cursor=None):
+    """Best matches for text among the feedback in query, as
+    (feedback_list, ranks, highlights, next_cursor)"""
+    terms = search_terms(text)
+    if not terms:
+        return [], {}, {}, None
+    postgres = dialect_name() == 'postgresql'
+    index, index_id, match, rank = (_postgres_search if postgres else _sqlite_search)(terms)
+
+    query = query.join(index, index_id == Feedback.id).filter(match).add_columns(rank)
+    if cursor:
+        last_rank, last_id = cursor
+        query = query.filter(or_(rank > last_rank, and_(rank == last_rank, Feedback.id > last_id)))
+    rows = query.order_by(rank, Feedback.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id)
+
+    feedback_list = [feedback for feedback, _ in rows]
+    ranks = {feedback.id: -value for feedback, value in rows}
+    highlights = {}
+    if feedback_list:
+        # Highlighting is only done for the rows on this page
+        fetch = _postgres_highlights if postgres else _sqlite_highlights
+        for feedback_id, strengths, areas_to_improve, comments in fetch(terms, list(ranks)):
+            highlights[feedback_id] = {
+                'strengths': _marked(strengths),
+                'areas_to_improve': _marked(areas_to_improve),
+                'comments': _marked(comments) if comments and _SENTINELS[0] in comments else None
+            }
+    return feedback_list, ranks, highlights, next_cursor
+
+def rebuild_search_index():
+    """Recreate every search document from the feedback and comment tables"""
+    fill_search_index(db.session.connection())
+    db.session.commit()
+    return db.session.query(func.count(Feedback.id)).scalar()
+
+@click.command('rebuild-search')
+@with_appcontext
+def rebuild_search_command():
+    """Rebuild the feedback full-text search index."""
+    if not search_supported():
+        raise click.ClickException('Full-text search needs SQLite (FTS5) or PostgreSQL')
+    count = rebuild_search_index()
+    click.echo(f'Indexed {count} feedback items for search')
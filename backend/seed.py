@@ -0,0 +1,314 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from werkzeug.security import generate_password_hash
+from extensions import db
+from models import User, Feedback, FeedbackTag, FeedbackRequest, Comment, Notification, FeedbackSummary
+from summaries import rebuild_summaries
+from versions import bump_versions
+from search import install_search_index, remove_search_index, fill_search_index
+
+# Synthetic data at production scale. seed_synthetic() builds an org tree
+# (managers with 3-10 reports each, several levels deep) and fills it with
+# skewed activity: a few people receive most of the feedback, feedback
+# mostly flows between a manager, their reports and peers, and comment
+# threads have a long tail. Every row comes from one seeded Random and is
+# dated relative to SEED_EPOCH, so the same arguments always produce the
+# same database. Rows go in with executemany in large batches; the search
+# triggers are dropped meanwhile and the search index, tag index and
+# dashboard summaries are built once at the end.
+
+SEED_EPOCH = datetime(2025, 1, 1)
+SEED_PASSWORD = 'password123'
+
+SENTIMENTS = (('positive', 0.6), ('neutral', 0.3), ('negative', 0.1))
+PRIORITIES = (('low', 0.3), ('medium', 0.5), ('high', 0.2))
+TAGS = (
+    'communication', 'teamwork', 'leadership', 'technical-skills', 'problem-solving',
+    'time-management', 'collaboration', 'creativity', 'ownership', 'mentoring',
+    'documentation', 'presentation', 'project-management', 'customer-focus', 'reliability',
+)
+
+_OPENERS = (
+    'Great job on', 'Really appreciated your work on', 'Strong results with', 'Impressive progress on',
+    'Solid contribution to', 'Thanks for driving', 'Clear improvement in',
+)
+_SUBJECTS = (
+    'the quarterly release', 'the onboarding revamp', 'the billing migration', 'the incident review',
+    'the customer escalation', 'the design review', 'the hiring loop', 'the performance audit',
+    'the API redesign', 'the roadmap planning', 'the data pipeline', 'the mobile launch',
+)
+_STRENGTHS = (
+    'Your communication kept everyone aligned.', 'You took ownership from start to finish.',
+    'Your technical depth unblocked the team.', 'You mentored newer engineers patiently.',
+    'Your documentation was thorough and easy to follow.', 'You stayed calm under pressure.',
+    'Your presentation to leadership was clear and persuasive.', 'You found a creative solution quickly.',
+)
+_IMPROVEMENTS = (
+    'Consider sharing progress updates more often.', 'Try to delegate more of the routine work.',
+    'Estimates slipped a few times; break tasks down further.', 'Write up decisions so others can follow them.',
+    'Speak up earlier when priorities conflict.', 'Spend more time reviewing teammates\' work.',
+    'Prepare meeting agendas in advance.', 'Ask for feedback on designs before building.',
+)
+_COMMENTS = (
+    'Thanks, that is really helpful!', 'Agreed, I noticed the same thing.', 'Could we talk about this in our 1:1?',
+    'I will work on this next quarter.', 'Good point about the documentation.', 'Appreciate the detailed feedback.',
+    'Can you share an example?', 'Happy to pair on this.',
+)
+_REQUESTS = (
+    'Could you give me feedback on my presentation?', 'How did the release go from your side?',
+    'Any thoughts on how I handled the incident?', 'I would value your input on my design doc.',
+    'What should I focus on next quarter?', 'How was my mentoring of the new hires?',
+)
+
+def build_org(rand, users, span=(3, 10)):
+    """Manager id of every user id (None for the root), filled breadth first"""
+    managers = {1: None}
+    queue = [1]
+    next_id = 2
+    while next_id <= users:
+        manager_id = queue.pop(0)
+        for _ in range(rand.randint(*span)):
+            if next_id > users:
+                break
+            managers[next_id] = manager_id
+            queue.append(next_id)
+            next_id += 1
+    return managers
+
+def _cumulative(weights):
+    total, result = 0, []
+    for weight in weights:
+        total += weight
+        result.append(total)
+    return result
+
+def _pick(rand, choices):
+    """Draw from ((value, probability), ...)"""
+    point, total = rand.random(), 0
+    for value, probability in choices:
+        total += probability
+        if point < total:
+            return value
+    return choices[-1][0]
+
+def _pick_tags(rand, tag_weights, most):
+    count = rand.randint(0, most)
+    return list(dict.fromkeys(rand.choices(TAGS, cum_weights=tag_weights, k=count)))
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _insert(model, rows):
+    # Core executemany; ORM bookkeeping is not needed for fresh rows
+    db.session.execute(model.__table__.insert(), rows)
+
+def _reset_sequences(connection):
+    """Move PostgreSQL id sequences past the explicitly inserted ids"""
+    if connection.dialect.name != 'postgresql':
+        return
+    for model in (User, Feedback, Comment):
+        table = model.__table__.name
+        connection.exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', 'id'), (SELECT max(id) FROM \"{table}\"))"
+        )
+
+def seed_synthetic(users=1000, feedback_per_user=10, comments_per_feedback=1.0, requests_per_user=1.0,
+                   notifications_per_user=5.0, span=(3, 10), days=365, seed=42, batch_size=10000, log=print):
+    """Fill an empty database with a synthetic org; returns counts and
+    handy ids (biggest org, busiest receiver, longest comment thread)"""
+    if users < 2:
+        raise ValueError('users must be at least 2')
+    rand = random.Random(seed)
+    start = SEED_EPOCH - timedelta(days=days)
+    period = (SEED_EPOCH - start).total_seconds()
+    connection = db.session.connection()
+    remove_search_index(None, connection)
+
+    # Users and the org tree; one password hash shared by every account
+    managers = build_org(rand, users, span)
+    reports = {}
+    for user_id, manager_id in managers.items():
+        if manager_id:
+            reports.setdefault(manager_id, []).append(user_id)
+    password_hash = generate_password_hash(SEED_PASSWORD, method=current_app.config['PASSWORD_HASH_METHOD'])
+    for batch in _batches(({
+        'id': user_id,
+        'username': f'user{user_id}',
+        'email': f'user{user_id}@example.com',
+        'password_hash': password_hash,
+        'role': 'manager' if user_id in reports else 'employee',
+        'manager_id': manager_id,
+        'created_at': start + timedelta(seconds=period * (user_id - 1) / users / 10),
+        'updated_at': start
+    } for user_id, manager_id in managers.items()), batch_size):
+        _insert(User, batch)
+    log(f'Inserted {users} users ({len(reports)} managers)')
+
+    # Popularity is heavy tailed: a few receivers get most of the feedback
+    user_ids = list(managers)
+    popularity = _cumulative(rand.paretovariate(1.2) for _ in user_ids)
+    tag_weights = _cumulative(1 / rank for rank in range(1, len(TAGS) + 1))
+
+    def giver_for(receiver_id):
+        manager_id = managers[receiver_id]
+        roll = rand.random()
+        if manager_id and roll < 0.4:
+            return manager_id
+        if manager_id and roll < 0.7:
+            peer = rand.choice(reports[manager_id])
+            if peer != receiver_id:
+                return peer
+        if receiver_id in reports and roll < 0.8:
+            return rand.choice(reports[receiver_id])
+        giver_id = rand.randint(1, users)
+        return giver_id if giver_id != receiver_id else managers[receiver_id] or rand.randint(2, users)
+
+    feedback_total = int(users * feedback_per_user)
+    step = period / max(feedback_total, 1)
+    received = Counter()
+    longest_thread = (0, None)
+    comment_id = 0
+    counts = Counter()
+    for batch_start in range(0, feedback_total, batch_size):
+        feedback_rows, tag_rows, comment_rows = [], [], []
+        batch_end = min(batch_start + batch_size, feedback_total)
+        receivers = rand.choices(user_ids, cum_weights=popularity, k=batch_end - batch_start)
+        for offset, receiver_id in enumerate(receivers):
+            feedback_id = batch_start + offset + 1
+            # Ids and timestamps rise together, as with live inserts
+            created_at = start + timedelta(seconds=(feedback_id - 1 + rand.random()) * step)
+            giver_id = giver_for(receiver_id)
+            tags = _pick_tags(rand, tag_weights, 3)
+            feedback_rows.append({
+                'id': feedback_id,
+                'giver_id': giver_id,
+                'receiver_id': receiver_id,
+                'strengths': f'{rand.choice(_OPENERS)} {rand.choice(_SUBJECTS)}. {rand.choice(_STRENGTHS)}',
+                'areas_to_improve': ' '.join(rand.sample(_IMPROVEMENTS, rand.randint(1, 2))),
+                'sentiment': _pick(rand, SENTIMENTS),
+                'acknowledged': rand.random() < (0.8 if SEED_EPOCH - created_at > timedelta(days=14) else 0.3),
+                'tags': tags,
+                'created_at': created_at,
+                'updated_at': created_at
+            })
+            tag_rows.extend({'feedback_id': feedback_id, 'tag': tag} for tag in tags)
+            received[receiver_id] += 1
+
+            # Most threads are short; a few run long
+            thread = min(int(rand.expovariate(1 / comments_per_feedback) + 0.5), 50) if comments_per_feedback else 0
+            for position in range(thread):
+                comment_id += 1
+                commented_at = created_at + timedelta(minutes=rand.randint(5, 60 * 24 * 3) * (position + 1))
+                comment_rows.append({
+                    'id': comment_id,
+                    'feedback_id': feedback_id,
+                    'user_id': (receiver_id, giver_id)[position % 2] if rand.random() < 0.9 else rand.randint(1, users),
+                    'content': rand.choice(_COMMENTS),
+                    'created_at': commented_at,
+                    'updated_at': commented_at
+                })
+            if thread > longest_thread[0]:
+                longest_thread = (thread, feedback_id)
+        _insert(Feedback, feedback_rows)
+        if tag_rows:
+            _insert(FeedbackTag, tag_rows)
+        if comment_rows:
+            _insert(Comment, comment_rows)
+        counts['feedback'] += len(feedback_rows)
+        counts['comments'] += len(comment_rows)
+        log(f"Inserted {counts['feedback']}/{feedback_total} feedback, {counts['comments']} comments")
+
+    def request_rows():
+        for _ in range(int(users * requests_per_user)):
+            requester_id = rand.randint(1, users)
+            manager_id = managers[requester_id]
+            if manager_id and rand.random() < 0.6:
+                receiver_id = manager_id
+            else:
+                receiver_id = rand.randint(1, users)
+                if receiver_id == requester_id:
+                    receiver_id = manager_id or rand.randint(2, users)
+            created_at = start + timedelta(seconds=rand.random() * period)
+            yield {
+                'requester_id': requester_id,
+                'receiver_id': receiver_id,
+                'message': rand.choice(_REQUESTS),
+                'tags': _pick_tags(rand, tag_weights, 2),
+                'priority': _pick(rand, PRIORITIES),
+                'due_date': created_at + timedelta(days=rand.randint(7, 30)),
+                'created_at': created_at,
+                'updated_at': created_at
+            }
+
+    for batch in _batches(request_rows(), batch_size):
+        _insert(FeedbackRequest, batch)
+        counts['requests'] += len(batch)
+    log(f"Inserted {counts['requests']} feedback requests")
+
+    def notification_rows():
+        # People who receive more feedback get more notifications
+        for user_id in rand.choices(user_ids, cum_weights=popularity, k=int(users * notifications_per_user)):
+            created_at = start + timedelta(seconds=rand.random() * period)
+            if rand.random() < 0.7:
+                title, kind = 'New Feedback Received', 'feedback'
+            else:
+                title, kind = 'Feedback Request', 'request'
+            yield {
+                'user_id': user_id,
+                'title': title,
+                'message': f'{title} from user{rand.randint(1, users)}',
+                'type': kind,
+                'read': rand.random() < (0.9 if SEED_EPOCH - created_at > timedelta(days=7) else 0.2),
+                'created_at': created_at
+            }
+
+    for batch in _batches(notification_rows(), batch_size):
+        _insert(Notification, batch)
+        counts['notifications'] += len(batch)
+    log(f"Inserted {counts['notifications']} notifications")
+
+    _reset_sequences(connection)
+    install_search_index(None, connection)
+    fill_search_index(connection)
+    db.session.commit()
+    rebuild_summaries()
+    # Core inserts skip the version hooks; without this a reseeded database
+    # would serve ETags issued for the data it replaced
+    bump_versions([model.__table__.name for model in (
+        User, Feedback, FeedbackTag, FeedbackRequest, Comment, Notification, FeedbackSummary
+    )])
+    db.session.commit()
+    log('Built search index and dashboard summaries')
+
+    # Size of each manager's whole org, children before parents
+    org_size = Counter()
+    for user_id in reversed(user_ids):
+        if managers[user_id]:
+            org_size[managers[user_id]] += org_size[user_id] + 1
+    biggest_org = max(
+        (manager_id for manager_id in org_size if manager_id != 1), key=org_size.get, default=1
+    )
+    return {
+        'seed': seed,
+        'users': users,
+        'managers': len(reports),
+        'feedback': counts['feedback'],
+        'comments': counts['comments'],
+        'requests': counts['requests'],
+        'notifications': counts['notifications'],
+        'root_user_id': 1,
+        'team_manager_id': biggest_org,
+        'team_size': org_size[biggest_org],
+        'busiest_receiver_id': received.most_common(1)[0][0] if received else 1,
+        'busiest_feedback_id': longest_thread[1] or 1,
+        'password': SEED_PASSWORD
+    }
@@ -0,0 +1,234 @@
+import re
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+# Response serialisation. Each Schema lists its output fields once; the
+# first time a field set is used it is compiled into a single function that
+# builds every row's dict in one list comprehension, so serialising a row
+# costs attribute reads rather than per-field dispatch. A field is one of:
+#
+#   ATTR           the model attribute of the same name
+#   DATETIME       that attribute as an ISO 8601 string (or None)
+#   LIST           that attribute, or [] when it is empty/NULL
+#   Name(attr)     username of the user id in attr, from context['names']
+#   Nested(s, key) rows from context[key][obj.id] serialised with schema s
+#   Count(key)     context[key][obj.id], or 0 when it is missing
+#   callable       called as fn(obj, context) for anything else
+#
+# Fields named in optional= are only sent when ?fields= asks for them.
+
+ATTR = 'attr'
+DATETIME = 'datetime'
+LIST = 'list'
+
+class Name:
+    def __init__(self, attr):
+        self.attr = attr
+
+class Nested:
+    def __init__(self, schema, key):
+        self.schema = schema
+        self.key = key
+
+class Count:
+    def __init__(self, key):
+        self.key = key
+
+class Schema:
+    """Compiled rows -> dicts serialiser with optional field selection"""
+
+    def __init__(self, optional=(), **fields):
+        self.fields = fields
+        # Field set sent when ?fields= is not given; None means every field
+        self.defaults = frozenset(name for name in fields if name not in optional) if optional else None
+        self._compiled = {}
+
+    def _compile(self, only):
+        names = [name for name in self.fields if only is None or name in only]
+        namespace = {}
+        prologue = set()
+        attrs = set()
+        parts = []
+        for name in names:
+            source = self.fields[name]
+            if source in (ATTR, DATETIME, LIST):
+                attrs.add(name)
+                if source == ATTR:
+                    value = f'<{name}>'
+                elif source == DATETIME:
+                    value = f'<{name}>.isoformat() if <{name}> is not None else None'
+                else:
+                    value = f'<{name}> if <{name}> else []'
+            elif isinstance(source, Name):
+                attrs.add(source.attr)
+                prologue.add("names = context['names']")
+                value = f'names.get(<{source.attr}>)'
+            elif isinstance(source, Nested):
+                attrs.add('id')
+                namespace[f'_{name}'] = source.schema.serializer()
+                prologue.add(f'{source.key} = context[{source.key!r}]')
+                value = f'_{name}({source.key}[<id>], context)'
+            elif isinstance(source, Count):
+                attrs.add('id')
+                prologue.add(f'{source.key} = context[{source.key!r}]')
+                value = f'{source.key}.get(<id>, 0)'
+            else:
+                namespace[f'_{name}'] = source
+                value = f'_{name}(obj, context)'
+            parts.append(f'{name!r}: {value}')
+        row = '{' + ', '.join(parts) + '}'
+
+        # Loaded column values are read straight from the instance dict,
+        # skipping the ORM attribute descriptors; rows with expired or
+        # unloaded attributes take the plain attribute path instead.
+        namespace['_loaded'] = frozenset(attrs)
+        fast = re.sub(r'<(\w+)>', lambda m: f"state['{m[1]}']", row)
+        slow = re.sub(r'<(\w+)>', lambda m: f'obj.{m[1]}', row)
+        code = 'def serialize(objs, context):\n'
+        code += ''.join(f'    {line}\n' for line in sorted(prologue))
+        code += (
+            f'    return [{fast} if state.keys() >= _loaded else {slow}\n'
+            f'            for obj in objs for state in (obj.__dict__,)]\n'
+        )
+        exec(compile(code, f'<schema {", ".join(names)}>', 'exec'), namespace)
+        return namespace['serialize']
+
+    def serializer(self, only=None):
+        """The compiled function for a field set (every field when only is None)"""
+        key = frozenset(only) if only is not None else None
+        serialize = self._compiled.get(key)
+        if serialize is None:
+            serialize = self._compiled[key] = self._compile(key)
+        return serialize
+
+    def dump(self, obj, context=None, only=None):
+        return self.serializer(only)((obj,), context)[0]
+
+    def dump_many(self, objs, context=None, only=None):
+        return self.serializer(only)(objs, context)
+
+    def select(self, fields):
+        """Validate a requested field list against this schema"""
+        unknown = [name for name in fields if name not in self.fields]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(unknown)}')
+        return frozenset(fields)
+
+def fields_arg(schema):
+    """Read ?fields=a,b,c for a schema; None selects every field"""
+    value = request.args.get('fields')
+    if not value:
+        return schema.defaults
+    return schema.select([name.strip() for name in value.split(',') if name.strip()])
+
+def wants(only, name):
+    """Whether a field survives selection, to skip loading what isn't sent"""
+    return only is None or name in only
+
+def _truncate(attr, length=100):
+    def truncate(obj, context):
+        value = getattr(obj, attr)
+        return value[:length] + '...' if len(value) > length else value
+    return truncate
+
+def _by_id(key):
+    def lookup(obj, context):
+        return context[key].get(obj.id)
+    return lookup
+
+# Full model representations, used by Model.to_dict()
+user_schema = Schema(
+    id=ATTR, username=ATTR, email=ATTR, role=ATTR, manager_id=ATTR,
+    created_at=DATETIME, updated_at=DATETIME
+)
+feedback_schema = Schema(
+    id=ATTR, giver_id=ATTR, receiver_id=ATTR, strengths=ATTR, areas_to_improve=ATTR,
+    sentiment=ATTR, acknowledged=ATTR, tags=ATTR, created_at=DATETIME, updated_at=DATETIME
+)
+feedback_request_schema = Schema(
+    id=ATTR, requester_id=ATTR, receiver_id=ATTR, message=ATTR, tags=ATTR,
+    priority=ATTR, due_date=DATETIME, created_at=DATETIME, updated_at=DATETIME
+)
+comment_schema = Schema(
+    id=ATTR, feedback_id=ATTR, user_id=ATTR, content=ATTR, created_at=DATETIME, updated_at=DATETIME
+)
+notification_schema = Schema(
+    id=ATTR, user_id=ATTR, title=ATTR, message=ATTR, type=ATTR, read=ATTR, created_at=DATETIME
+)
+job_schema = Schema(
+    id=ATTR, kind=ATTR, key=ATTR, status=ATTR, attempts=ATTR, max_attempts=ATTR, run_at=DATETIME,
+    last_error=ATTR, created_at=DATETIME, started_at=DATETIME, finished_at=DATETIME
+)
+
+# API views; context carries 'names' (user id -> username) and the
+# related rows loaded for the page ('comments', 'received')
+comment_summary_schema = Schema(
+    id=ATTR, content=ATTR, author_name=Name('user_id'), created_at=DATETIME
+)
+feedback_item_schema = Schema(
+    id=ATTR, strengths=ATTR, areas_to_improve=ATTR, sentiment=ATTR, tags=LIST,
+    giver_name=Name('giver_id'), receiver_name=Name('receiver_id'), created_at=DATETIME,
+    comment_count=Count('comment_counts'), comments=Nested(comment_summary_schema, 'comments')
+)
+feedback_tagged_schema = Schema(
+    id=ATTR, strengths=ATTR, areas_to_improve=ATTR, sentiment=ATTR, tags=LIST,
+    giver_name=Name('giver_id'), receiver_name=Name('receiver_id'), created_at=DATETIME,
+    comment_count=Count('comment_counts')
+)
+feedback_search_schema = Schema(
+    id=ATTR, strengths=ATTR, areas_to_improve=ATTR, sentiment=ATTR, tags=LIST,
+    giver_name=Name('giver_id'), receiver_name=Name('receiver_id'), created_at=DATETIME,
+    comment_count=Count('comment_counts'), rank=_by_id('ranks'), highlights=_by_id('highlights')
+)
+feedback_preview_schema = Schema(
+    id=ATTR, strengths=_truncate('strengths'), areas_to_improve=_truncate('areas_to_improve'),
+    sentiment=ATTR, tags=LIST, giver_name=Name('giver_id'), receiver_name=Name('receiver_id'),
+    created_at=DATETIME, comment_count=Count('comment_counts')
+)
+feedback_request_item_schema = Schema(
+    id=ATTR, requester_name=Name('requester_id'), receiver_name=Name('receiver_id'),
+    message=ATTR, tags=LIST, priority=ATTR, due_date=DATETIME, created_at=DATETIME
+)
+received_feedback_schema = Schema(
+    id=ATTR, strengths=ATTR, areas_to_improve=ATTR, sentiment=ATTR, created_at=DATETIME
+)
+member_schema = Schema(
+    id=ATTR, username=ATTR, email=ATTR, role=ATTR, created_at=DATETIME
+)
+user_item_schema = Schema(
+    id=ATTR, username=ATTR, email=ATTR, role=ATTR, created_at=DATETIME,
+    feedback_summary=_by_id('summaries'), feedback_received=Nested(received_feedback_schema, 'received'),
+    optional=('feedback_received',)
+)
+notification_item_schema = Schema(
+    id=ATTR, title=ATTR, message=ATTR, type=ATTR, read=ATTR, created_at=DATETIME
+)
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when it is installed"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, indent=kwargs.get('indent')).decode()
+
+    def _orjson_dumps(self, obj, indent=None):
+        # Dates go through default() so they render exactly as with the stdlib
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if self.compact is None and self._app.debug or self.compact is False else None
+        return self._app.response_class(self._orjson_dumps(obj, indent) + b'\n', mimetype=self.mimetype)
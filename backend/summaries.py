@@ -0,0 +1,175 @@
+import click
+from flask.cli import with_appcontext
+from collections import defaultdict
+from sqlalchemy import func, tuple_
+from extensions import db
+from models import Feedback, FeedbackRequest, FeedbackSummary
+from hierarchy import ancestors
+
+# Materialised dashboard counters. Write paths call the record_* helpers
+# before committing, so counters change in the same transaction as the rows
+# they describe; the dashboard then reads a single summary row. A 'team'
+# row covers everyone under that manager, direct and transitive.
+
+SENTIMENTS = ('positive', 'neutral', 'negative')
+COUNTERS = ('total',) + SENTIMENTS + ('unacknowledged', 'open_requests')
+
+def _scopes(user_ids):
+    """Summary rows each user's counters roll up into, resolved in one query"""
+    managers = ancestors(user_ids)
+    return {
+        user_id: [('all', 0), ('user', user_id)]
+        + [('team', manager_id) for manager_id in managers.get(user_id, ())]
+        for user_id in user_ids
+    }
+
+def _apply(deltas_by_user):
+    """Add per-user deltas to every summary row, creating missing rows"""
+    totals = defaultdict(lambda: defaultdict(int))
+    for user_id, scopes in _scopes(list(deltas_by_user)).items():
+        for scope in scopes:
+            for name, delta in deltas_by_user[user_id].items():
+                totals[scope][name] += delta
+
+    # Scopes with the same deltas (all of them, for a single row) share one
+    # UPDATE, so the statement count does not grow with the depth of the org
+    groups = defaultdict(list)
+    for scope, deltas in totals.items():
+        groups[tuple(sorted(deltas.items()))].append(scope)
+
+    key = tuple_(FeedbackSummary.scope, FeedbackSummary.scope_id)
+    for deltas, scopes in groups.items():
+        values = {
+            getattr(FeedbackSummary, name): getattr(FeedbackSummary, name) + delta
+            for name, delta in deltas
+        }
+        updated = (
+            FeedbackSummary.query
+            .filter(key.in_(scopes))
+            .update(values, synchronize_session=False)
+        )
+        if updated < len(scopes):
+            existing = set(db.session.query(FeedbackSummary.scope, FeedbackSummary.scope_id).filter(key.in_(scopes)))
+            for scope, scope_id in scopes:
+                if (scope, scope_id) not in existing:
+                    counters = dict.fromkeys(COUNTERS, 0)
+                    counters.update(deltas)
+                    db.session.add(FeedbackSummary(scope=scope, scope_id=scope_id, **counters))
+            db.session.flush()
+
+def record_feedback_rows(rows):
+    """Count new feedback, given as dicts with receiver_id/sentiment/acknowledged"""
+    deltas_by_user = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        deltas = deltas_by_user[row['receiver_id']]
+        deltas['total'] += 1
+        if row.get('sentiment') in SENTIMENTS:
+            deltas[row['sentiment']] += 1
+        if not row.get('acknowledged'):
+            deltas['unacknowledged'] += 1
+    _apply(deltas_by_user)
+
+def record_request_rows(rows):
+    """Count new feedback requests, given as dicts with receiver_id"""
+    deltas_by_user = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        deltas_by_user[row['receiver_id']]['open_requests'] += 1
+    _apply(deltas_by_user)
+
+def record_feedback(feedback):
+    """Count a new feedback item against its receiver"""
+    record_feedback_rows([{
+        'receiver_id': feedback.receiver_id,
+        'sentiment': feedback.sentiment,
+        'acknowledged': feedback.acknowledged
+    }])
+
+def record_acknowledgement(feedback):
+    """Count a feedback item as acknowledged by its receiver"""
+    _apply({feedback.receiver_id: {'unacknowledged': -1}})
+
+def record_request(request_obj):
+    """Count a new feedback request against its receiver"""
+    record_request_rows([{'receiver_id': request_obj.receiver_id}])
+
+def get_summary(scope='all', scope_id=0):
+    """Read the counters for one scope, zeroed if nothing was recorded yet"""
+    summary = FeedbackSummary.query.filter_by(scope=scope, scope_id=scope_id).first()
+    if summary is None:
+        summary = FeedbackSummary(scope=scope, scope_id=scope_id, **dict.fromkeys(COUNTERS, 0))
+    return summary.to_dict()
+
+def get_user_summaries(user_ids):
+    """Counters of many users' 'user' rows in one query, zeroed for users
+    without one"""
+    summaries = dict.fromkeys(user_ids, FeedbackSummary(**dict.fromkeys(COUNTERS, 0)).to_dict())
+    if summaries:
+        rows = FeedbackSummary.query.filter(
+            FeedbackSummary.scope == 'user', FeedbackSummary.scope_id.in_(list(summaries))
+        )
+        summaries.update((row.scope_id, row.to_dict()) for row in rows)
+    return summaries
+
+def get_org_summary(manager_id):
+    """Counters for a manager and everyone under them: their own 'user' row
+    plus their 'team' row, read together"""
+    rows = FeedbackSummary.query.filter(
+        tuple_(FeedbackSummary.scope, FeedbackSummary.scope_id).in_([('user', manager_id), ('team', manager_id)])
+    ).all()
+    summary = FeedbackSummary(scope='team', scope_id=manager_id, **{
+        name: sum(getattr(row, name) for row in rows) for name in COUNTERS
+    })
+    return summary.to_dict()
+
+def rebuild_summaries():
+    """Recompute every summary row from the source tables"""
+    per_user = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+    sentiment_rows = (
+        db.session.query(Feedback.receiver_id, Feedback.sentiment, func.count(Feedback.id))
+        .group_by(Feedback.receiver_id, Feedback.sentiment)
+    )
+    for user_id, sentiment, count in sentiment_rows:
+        per_user[user_id]['total'] += count
+        if sentiment in SENTIMENTS:
+            per_user[user_id][sentiment] += count
+
+    unacknowledged_rows = (
+        db.session.query(Feedback.receiver_id, func.count(Feedback.id))
+        .filter(db.or_(Feedback.acknowledged.is_(False), Feedback.acknowledged.is_(None)))
+        .group_by(Feedback.receiver_id)
+    )
+    for user_id, count in unacknowledged_rows:
+        per_user[user_id]['unacknowledged'] = count
+
+    request_rows = (
+        db.session.query(FeedbackRequest.receiver_id, func.count(FeedbackRequest.id))
+        .group_by(FeedbackRequest.receiver_id)
+    )
+    for user_id, count in request_rows:
+        per_user[user_id]['open_requests'] = count
+
+    managers = ancestors()
+
+    rows = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for user_id, counters in per_user.items():
+        scopes = [('all', 0), ('user', user_id)]
+        scopes += [('team', manager_id) for manager_id in managers.get(user_id, ())]
+        for scope in scopes:
+            for name, value in counters.items():
+                rows[scope][name] += value
+
+    FeedbackSummary.query.delete()
+    db.session.bulk_insert_mappings(FeedbackSummary, [
+        dict(scope=scope, scope_id=scope_id, **counters)
+        for (scope, scope_id), counters in rows.items()
+    ])
+    db.session.commit()
+    return len(rows)
+
+@click.command('rebuild-summaries')
+@with_appcontext
+def rebuild_summaries_command():
+    """Rebuild the materialised dashboard counters."""
+    count = rebuild_summaries()
+    click.echo(f'Rebuilt {count} summary rows')
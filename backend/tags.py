@@ -0,0 +1,83 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func
+from extensions import db
+from models import Feedback, FeedbackTag
+
+# Tag index. Feedback.tags keeps the list as submitted for display; the
+# FeedbackTag table holds one row per (feedback, tag) so filtering by tag
+# is an index lookup instead of a scan over the JSON column.
+
+MAX_TAGS = 20
+MAX_TAG_LENGTH = FeedbackTag.__table__.c.tag.type.length
+
+def normalize_tags(tags):
+    """Strip blanks and duplicates while keeping the submitted order"""
+    result = []
+    for tag in tags or []:
+        tag = str(tag).strip()
+        if tag and tag not in result:
+            result.append(tag)
+    return result
+
+def tags_error(tags):
+    """Why a submitted tag list cannot be stored, or None if it can"""
+    if not isinstance(tags, list):
+        return 'tags must be a list'
+    tags = normalize_tags(tags)
+    if len(tags) > MAX_TAGS:
+        return f'At most {MAX_TAGS} tags per feedback item'
+    if any(len(tag) > MAX_TAG_LENGTH for tag in tags):
+        return f'Tags must be at most {MAX_TAG_LENGTH} characters'
+    return None
+
+def set_feedback_tags(feedback, tags):
+    """Set a feedback item's tags and keep the tag index in step"""
+    feedback.tags = normalize_tags(tags)
+    feedback.tag_links = [FeedbackTag(tag=tag) for tag in feedback.tags]
+
+def filter_by_tags(query, tags, match='any'):
+    """Restrict a Feedback query to items carrying any/all of the tags"""
+    matching = (
+        db.session.query(FeedbackTag.feedback_id)
+        .filter(FeedbackTag.tag.in_(tags))
+    )
+    if match == 'all':
+        matching = (
+            matching.group_by(FeedbackTag.feedback_id)
+            .having(func.count(FeedbackTag.tag) == len(tags))
+        )
+    return query.filter(Feedback.id.in_(matching))
+
+def tag_counts(receiver_ids=None):
+    """Number of feedback items per tag, most used first; only feedback
+    received by receiver_ids (a select of user ids) when given"""
+    query = db.session.query(FeedbackTag.tag, func.count(FeedbackTag.feedback_id))
+    if receiver_ids is not None:
+        query = (
+            query.join(Feedback, Feedback.id == FeedbackTag.feedback_id)
+            .filter(Feedback.receiver_id.in_(receiver_ids))
+        )
+    rows = (
+        query.group_by(FeedbackTag.tag)
+        .order_by(func.count(FeedbackTag.feedback_id).desc(), FeedbackTag.tag)
+        .all()
+    )
+    return [{'tag': tag, 'count': count} for tag, count in rows]
+
+def rebuild_tag_index():
+    """Recreate the tag index from Feedback.tags"""
+    FeedbackTag.query.delete()
+    rows = []
+    for feedback_id, tags in db.session.query(Feedback.id, Feedback.tags).yield_per(1000):
+        rows.extend({'feedback_id': feedback_id, 'tag': tag} for tag in normalize_tags(tags))
+    db.session.bulk_insert_mappings(FeedbackTag, rows)
+    db.session.commit()
+    return len(rows)
+
+@click.command('rebuild-tags')
+@with_appcontext
+def rebuild_tags_command():
+    """Rebuild the feedback tag index."""
+    count = rebuild_tag_index()
+    click.echo(f'Indexed {count} feedback tags')
@@ -0,0 +1,57 @@
+import os
+import sys
+import tempfile
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config reads the environment at import time, so point it at a throwaway
+# database (never the one in DATABASE_URL) before the app is imported
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ['REPORT_CACHE_DIR'] = os.path.join(_workdir, 'reports')
+os.environ['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:1000'
+os.environ['JOBS_WORKERS'] = '0'
+os.environ['AUTH_REQUIRED'] = 'false'
+
+from app import create_app
+from extensions import db
+from directory import user_directory
+from http_cache import response_cache
+from models import User
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        user_directory.clear()
+        response_cache.clear()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def make_user(app):
+    """Create a user; the first one made is id 1"""
+    def make(username, role='employee', manager=None):
+        user = User(username=username, email=f'{username}@example.com', role=role,
+                    manager_id=manager.id if manager else None)
+        user.set_password('password123')
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make
+
+@pytest.fixture
+def login(client):
+    """Log a user made by make_user in; returns the Authorization header"""
+    def log_in(username):
+        token = client.post('/api/auth/login', json={'username': username, 'password': 'password123'}).json['access_token']
+        return {'Authorization': f'Bearer {token}'}
+    return log_in
@@ -0,0 +1,98 @@
+import pytest
+from extensions import db
+from models import User, Feedback, Comment, FeedbackRequest, Notification
+
+@pytest.fixture
+def users(make_user):
+    return make_user('first'), make_user('alice'), make_user('bob')
+
+def test_writes_are_attributed_to_the_caller(client, users, login):
+    _, alice, bob = users
+    headers = login('alice')
+
+    response = client.post('/api/feedback/', headers=headers, json={
+        'receiver_id': bob.id, 'strengths': 'Strengths', 'areas_to_improve': 'Areas'
+    })
+    assert response.status_code == 201
+    feedback = db.session.get(Feedback, response.json['id'])
+    assert feedback.giver_id == alice.id
+
+    received = Feedback(giver_id=bob.id, receiver_id=alice.id, strengths='S', areas_to_improve='A')
+    db.session.add(received)
+    db.session.commit()
+    response = client.post(f'/api/feedback/{received.id}/comments', headers=headers, json={'content': 'Comment'})
+    assert db.session.get(Comment, response.json['id']).user_id == alice.id
+
+    response = client.post('/api/feedback/request', headers=headers, json={'receiver_id': bob.id})
+    assert db.session.get(FeedbackRequest, response.json['id']).requester_id == alice.id
+
+    response = client.post('/api/feedback/bulk', headers=headers, json={'items': [
+        {'receiver_id': bob.id, 'strengths': 'Strengths', 'areas_to_improve': 'Areas'}
+    ]})
+    assert db.session.get(Feedback, response.json['results'][0]['id']).giver_id == alice.id
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/feedback/', {'giver_id': '{bob}', 'receiver_id': '{bob}', 'strengths': 'S', 'areas_to_improve': 'A'}),
+    ('/api/feedback/request', {'requester_id': '{bob}', 'receiver_id': '{bob}'}),
+    ('/api/feedback/{feedback}/comments', {'author_id': '{bob}', 'content': 'Comment'}),
+    ('/api/feedback/bulk', {'items': [{'giver_id': '{bob}', 'receiver_id': '{bob}', 'strengths': 'S', 'areas_to_improve': 'A'}]}),
+    ('/api/feedback/requests/bulk', {'items': [{'requester_id': '{bob}', 'receiver_id': '{bob}'}]}),
+])
+def test_caller_cannot_act_as_someone_else(client, users, path, body, login):
+    first, alice, bob = users
+    feedback = Feedback(giver_id=first.id, receiver_id=alice.id, strengths='S', areas_to_improve='A')
+    db.session.add(feedback)
+    db.session.commit()
+    ids = {'{bob}': bob.id, '{feedback}': feedback.id}
+
+    def fill(value):
+        if isinstance(value, dict):
+            return {key: fill(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [fill(item) for item in value]
+        return ids.get(value, value)
+
+    response = client.post(path.format(feedback=feedback.id), headers=login('alice'), json=fill(body))
+    assert response.status_code == 403
+
+def test_notifications_are_scoped_to_the_caller(client, users, login):
+    _, alice, bob = users
+    mine = Notification(user_id=alice.id, title='Mine', message='Mine')
+    theirs = Notification(user_id=bob.id, title='Theirs', message='Theirs')
+    db.session.add_all([mine, theirs])
+    db.session.commit()
+    headers = login('alice')
+
+    response = client.get(f'/api/notifications/?user_id={bob.id}', headers=headers)
+    assert [item['id'] for item in response.json['items']] == [mine.id]
+
+    assert client.put(f'/api/notifications/{theirs.id}/read', headers=headers).status_code == 404
+    assert client.put(f'/api/notifications/{mine.id}/read', headers=headers).status_code == 200
+    assert db.session.get(Notification, theirs.id).read is False
+
+def test_query_string_token_is_refused(app, client, users, login):
+    app.config['AUTH_REQUIRED'] = True
+    token = login('alice')['Authorization'].split()[1]
+
+    assert client.get(f'/api/notifications/inbox?jwt={token}').status_code == 401
+    assert client.get(f'/api/notifications/poll?jwt={token}').status_code == 401
+
+def test_writes_to_other_peoples_records_are_refused(client, make_user, login):
+    manager = make_user('manager', role='manager')
+    alice, bob = make_user('alice', manager=manager), make_user('bob', manager=manager)
+    outsider = make_user('outsider')
+    feedback = Feedback(giver_id=manager.id, receiver_id=bob.id, strengths='S', areas_to_improve='A')
+    db.session.add(feedback)
+    db.session.commit()
+    headers = login('alice')
+
+    assert client.put(f'/api/users/{bob.id}', headers=headers, json={'username': 'pwned'}).status_code == 403
+    assert client.put(f'/api/feedback/{feedback.id}/acknowledge', headers=headers).status_code == 403
+    assert client.post(f'/api/feedback/{feedback.id}/comments', headers=login('outsider'),
+                       json={'content': 'Comment'}).status_code == 404
+    assert db.session.get(User, bob.id).username == 'bob'
+    assert db.session.get(Feedback, feedback.id).acknowledged is False
+
+    assert client.put(f'/api/users/{alice.id}', headers=headers, json={'username': 'alice2'}).status_code == 200
+    assert client.put(f'/api/users/{bob.id}', headers=login('manager'), json={'username': 'bobby'}).status_code == 200
+    assert client.put(f'/api/feedback/{feedback.id}/acknowledge', headers=login('bobby')).status_code == 200
@@ -0,0 +1,53 @@
+import pytest
+from models import Feedback, FeedbackRequest
+
+@pytest.fixture
+def users(make_user):
+    return make_user('giver'), make_user('receiver')
+
+@pytest.mark.parametrize('path, model, item', [
+    ('/api/feedback/bulk', Feedback, {'strengths': 'S', 'areas_to_improve': 'A'}),
+    ('/api/feedback/requests/bulk', FeedbackRequest, {'message': 'Please'}),
+])
+def test_body_may_be_the_list_of_items(client, users, path, model, item):
+    receiver = users[1]
+    items = [dict(item, receiver_id=receiver.id)] * 2
+
+    assert client.post(path, json=items).status_code == 201
+    assert client.post(path, json={'items': items}).status_code == 201
+    assert model.query.count() == 4
+    assert client.post(path, json='items').status_code == 400
+
+@pytest.mark.parametrize('field, value, error', [
+    ('strengths', {'text': 'S'}, 'strengths must be a string'),
+    ('giver_id', True, 'giver_id must be an integer'),
+    ('receiver_id', '2', 'receiver_id must be an integer'),
+    ('sentiment', 'evil', 'sentiment must be one of positive, neutral, negative'),
+])
+def test_malformed_feedback_items_fail_on_their_own(client, users, field, value, error):
+    giver, receiver = users
+    item = {'giver_id': giver.id, 'receiver_id': receiver.id, 'strengths': 'S', 'areas_to_improve': 'A'}
+
+    response = client.post('/api/feedback/bulk', json=[dict(item, **{field: value}), item])
+    assert response.status_code == 207
+    assert [result.get('error') for result in response.json['results']] == [error, None]
+    assert Feedback.query.count() == 1
+
+    response = client.post('/api/feedback/', json=dict(item, **{field: value}))
+    assert (response.status_code, response.json['error']) == (400, error)
+
+@pytest.mark.parametrize('field, value, error', [
+    ('message', ['Please'], 'message must be a string'),
+    ('requester_id', False, 'requester_id must be an integer'),
+    ('priority', 3, 'priority must be a string'),
+])
+def test_malformed_request_items_fail_on_their_own(client, users, field, value, error):
+    requester, receiver = users
+    item = {'requester_id': requester.id, 'receiver_id': receiver.id}
+
+    response = client.post('/api/feedback/requests/bulk', json=[dict(item, **{field: value}), item])
+    assert response.status_code == 207
+    assert [result.get('error') for result in response.json['results']] == [error, None]
+
+    response = client.post('/api/feedback/request', json=dict(item, **{field: value}))
+    assert (response.status_code, response.json['error']) == (400, error)
@@ -0,0 +1,22 @@
+from extensions import db
+from models import Feedback
+
+def test_comments_are_paged_newest_first(client, make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    feedback = Feedback(giver_id=alice.id, receiver_id=bob.id, strengths='S', areas_to_improve='A')
+    db.session.add(feedback)
+    db.session.commit()
+    path = f'/api/feedback/{feedback.id}/comments'
+
+    ids = [client.post(path, json={'user_id': bob.id, 'content': f'Comment {n}'}).json['id'] for n in range(3)]
+    assert client.post('/api/feedback/999/comments', json={'user_id': bob.id, 'content': 'Lost'}).status_code == 404
+
+    page = client.get(path, query_string={'limit': 2}).json
+    assert [item['id'] for item in page['items']] == ids[:0:-1]
+    assert page['items'][0] == {
+        'id': ids[2], 'content': 'Comment 2', 'author_name': 'bob', 'created_at': page['items'][0]['created_at']
+    }
+    last = client.get(path, query_string={'limit': 2, 'cursor': page['next_cursor']}).json
+    assert ([item['id'] for item in last['items']], last['next_cursor']) == ([ids[0]], None)
+
+    assert client.get(path, query_string={'cursor': 'garbage'}).status_code == 400
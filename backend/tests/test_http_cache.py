@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from werkzeug.http import http_date
+import http_cache
+from extensions import db
+from models import TableVersion
+
+CHANGED_AT = datetime(2030, 1, 1, 12, 0, 0, 300000)
+
+def at(monkeypatch, moment):
+    class Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return moment
+    monkeypatch.setattr(http_cache, 'datetime', Clock)
+
+def test_if_modified_since_waits_for_the_second_to_end(client, make_user, monkeypatch):
+    make_user('user')
+    db.session.get(TableVersion, 'user').changed_at = CHANGED_AT
+    db.session.commit()
+    since = {'If-Modified-Since': http_date(CHANGED_AT.replace(microsecond=0))}
+
+    # Another write could still land in this second
+    at(monkeypatch, CHANGED_AT + timedelta(milliseconds=200))
+    response = client.get('/api/feedback/team')
+    assert response.status_code == 200 and response.last_modified is None and response.headers['ETag']
+    assert client.get('/api/feedback/team', headers=since).status_code == 200
+
+    at(monkeypatch, CHANGED_AT + timedelta(seconds=1))
+    response = client.get('/api/feedback/team')
+    assert response.last_modified.replace(tzinfo=None) == CHANGED_AT.replace(microsecond=0)
+    assert client.get('/api/feedback/team', headers=since).status_code == 304
+
+def test_etag_decides_when_both_are_sent(client, make_user, monkeypatch):
+    make_user('user')
+    at(monkeypatch, datetime.utcnow() + timedelta(seconds=5))
+    response = client.get('/api/feedback/team')
+    headers = {'If-None-Match': response.headers['ETag'], 'If-Modified-Since': response.headers['Last-Modified']}
+    assert client.get('/api/feedback/team', headers=headers).status_code == 304
+
+    make_user('other')
+    assert client.get('/api/feedback/team', headers=headers).status_code == 200
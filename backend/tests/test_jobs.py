@@ -0,0 +1,40 @@
+from datetime import datetime, timedelta
+from extensions import db
+from jobs import claim_next, run_job, job_worker
+from models import Job, Notification
+
+def stale_job(attempts, max_attempts=3):
+    job = Job(kind='notify', payload={}, status='running', attempts=attempts, max_attempts=max_attempts,
+              run_at=datetime.utcnow(), locked_by='dead-worker', locked_at=datetime.utcnow() - timedelta(hours=1))
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+def test_stale_job_is_reclaimed(app):
+    job_id = stale_job(attempts=1)
+    job = claim_next('worker', app.config)
+    assert (job.id, job.status, job.attempts, job.locked_by) == (job_id, 'running', 2, 'worker')
+
+def test_stale_job_on_its_final_attempt_fails(app):
+    job_id = stale_job(attempts=3)
+    assert claim_next('worker', app.config) is None
+    job = db.session.get(Job, job_id)
+    assert (job.status, job.attempts, job.locked_by) == ('failed', 3, None)
+    assert job.finished_at is not None and job.last_error
+
+def test_single_and_bulk_notifications_use_the_job_queue(app, client, make_user, monkeypatch, caplog):
+    monkeypatch.setattr(job_worker, '_warned', False)
+    receiver = make_user('receiver')
+    item = {'receiver_id': receiver.id, 'strengths': 'S', 'areas_to_improve': 'A'}
+
+    assert client.post('/api/feedback/', json=item).status_code == 201
+    assert client.post('/api/feedback/bulk', json=[item, item]).status_code == 201
+    assert Notification.query.count() == 0
+    assert Job.query.filter_by(kind='notify').count() == 2
+    assert 'this process runs no job workers' in caplog.text
+
+    job = claim_next('worker', app.config)
+    while job is not None:
+        run_job(job, app.config, app.logger)
+        job = claim_next('worker', app.config)
+    assert Notification.query.filter_by(user_id=receiver.id).count() == 3
@@ -0,0 +1,88 @@
+import queue
+import threading
+import time
+from extensions import db
+from events import poll_waiters, set_broker, get_broker
+from models import Notification
+
+class SilentBroker:
+    """A broker that never wakes anyone, like a write in another process"""
+
+    def subscribe(self, user_id):
+        return queue.Queue()
+
+    def unsubscribe(self, user_id, subscription):
+        pass
+
+    def publish(self, user_id, message):
+        pass
+
+def notify(user, title='Title'):
+    notification = Notification(user_id=user.id, title=title, message='Message')
+    db.session.add(notification)
+    db.session.commit()
+    return notification.id
+
+def test_poll_starts_from_the_newest_notification(client, make_user):
+    user = make_user('user')
+    newest = notify(user)
+
+    assert client.get(f'/api/notifications/poll?user_id={user.id}').json == {'items': [], 'last_id': newest, 'retry_after': 0}
+    response = client.get(f'/api/notifications/poll?user_id={user.id}&after=0').json
+    assert ([item['id'] for item in response['items']], response['last_id']) == ([newest], newest)
+
+def test_poll_sees_writes_from_other_processes(app, client, make_user):
+    user = make_user('user')
+    app.config['NOTIFICATIONS_POLL_CHECK_SECONDS'] = 0.05
+    broker = get_broker()
+    set_broker(SilentBroker())
+
+    def write_later():
+        time.sleep(0.2)
+        with app.app_context():
+            notify(user, 'Late')
+
+    writer = threading.Thread(target=write_later)
+    writer.start()
+    try:
+        response = client.get(f'/api/notifications/poll?user_id={user.id}&after=0&wait=5').json
+    finally:
+        writer.join()
+        set_broker(broker)
+    assert [item['title'] for item in response['items']] == ['Late']
+
+def test_poll_falls_back_when_waiters_are_capped(app, client, make_user):
+    user = make_user('user')
+    app.config['NOTIFICATIONS_POLL_MAX_WAITERS'] = 0
+
+    started = time.monotonic()
+    response = client.get(f'/api/notifications/poll?user_id={user.id}&after=0&wait=5').json
+    assert time.monotonic() - started < 1
+    assert response == {'items': [], 'last_id': 0, 'retry_after': app.config['NOTIFICATIONS_POLL_FALLBACK_SECONDS']}
+    assert poll_waiters.count == 0
+
+def test_inbox_and_bulk_mark_read_touch_only_the_callers_notifications(client, make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    first, second, third = (notify(alice, title) for title in ('First', 'Second', 'Third'))
+    bobs = notify(bob)
+
+    def inbox(**args):
+        return client.get('/api/notifications/inbox', query_string={'user_id': alice.id, **args}).json
+
+    def unread():
+        return client.get(f'/api/notifications/unread-count?user_id={alice.id}').json['unread_count']
+
+    page = inbox(limit=2)
+    assert [item['id'] for item in page['items']] == [third, second]
+    assert [item['id'] for item in inbox(cursor=page['next_cursor'])['items']] == [first]
+
+    read = client.put(f'/api/notifications/read?user_id={alice.id}', json={'ids': [first, bobs]})
+    assert read.json['updated'] == 1
+    assert [item['id'] for item in inbox(read='false')['items']] == [third, second]
+    assert unread() == 2
+
+    assert client.put(f'/api/notifications/read?user_id={alice.id}', json={'all': True}).json['updated'] == 2
+    assert unread() == 0
+    assert db.session.get(Notification, bobs).read is False
+
+    assert client.put(f'/api/notifications/read?user_id={alice.id}', json={'ids': 'all'}).status_code == 400
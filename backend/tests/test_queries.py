@@ -0,0 +1,41 @@
+from flask import g
+from sqlalchemy import event
+from extensions import db
+from directory import user_directory
+from seed import seed_synthetic
+
+# The small database has fewer rows than one page and the large one more,
+# so a query per row shows up as a different count
+PATHS = [
+    '/api/feedback/?limit=50', '/api/feedback/?limit=50&fields=id,comment_count', '/api/feedback/dashboard?limit=50'
+]
+
+def statement_counts(client, users):
+    """Statements each path issues against a database seeded with `users` users"""
+    db.drop_all()
+    db.create_all()
+    seed_synthetic(users=users, feedback_per_user=3, log=lambda message: None)
+
+    statements = []
+    def count(*_):
+        statements.append(1)
+
+    counts = {}
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for path in PATHS:
+            # Start cold so user lookups are counted too; the test's app
+            # context, and so g, outlives each request
+            user_directory.clear()
+            g.pop('user_directory', None)
+            statements.clear()
+            assert client.get(path).status_code == 200
+            counts[path] = len(statements)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return counts
+
+def test_statement_count_does_not_grow_with_data(client):
+    small = statement_counts(client, users=5)
+    large = statement_counts(client, users=200)
+    assert small == large
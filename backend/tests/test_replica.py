@@ -0,0 +1,49 @@
+import shutil
+import pytest
+from app import create_app
+from config import Config
+from extensions import db
+from directory import user_directory
+from http_cache import response_cache
+from models import User
+from replica import REPLICA_BIND, STICKY_COOKIE
+
+@pytest.fixture
+def replica_app(tmp_path, monkeypatch):
+    """An app whose replica is a snapshot of the primary taken before the test"""
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{primary}')
+    monkeypatch.setattr(Config, 'SQLALCHEMY_BINDS', {'replica': f'sqlite:///{replica}'})
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        for username in ('giver', 'receiver'):
+            user = User(username=username, email=f'{username}@example.com')
+            user.set_password('password123')
+            db.session.add(user)
+        db.session.commit()
+        db.session.remove()
+        # Closing the last connection checkpoints the WAL into the file
+        db.engine.dispose()
+        shutil.copy(primary, replica)
+        user_directory.clear()
+        response_cache.clear()
+        yield app
+        db.session.remove()
+    # init_app registered a metadata for the bind on the shared extension;
+    # later apps have no replica, so create_all/drop_all must not see it
+    db.metadatas.pop(REPLICA_BIND, None)
+
+def feedback_ids(client):
+    return [item['id'] for item in client.get('/api/feedback/').json['items']]
+
+def test_writer_reads_the_primary_and_others_the_replica(replica_app):
+    writer, reader = replica_app.test_client(), replica_app.test_client()
+
+    response = writer.post('/api/feedback/', json={'receiver_id': 2, 'strengths': 'S', 'areas_to_improve': 'A'})
+    assert response.status_code == 201
+    assert STICKY_COOKIE in response.headers['Set-Cookie']
+
+    # The writer sees its own write; everyone else reads the lagging replica
+    assert feedback_ids(writer) == [response.json['id']]
+    assert feedback_ids(reader) == []
@@ -0,0 +1,28 @@
+from extensions import db
+from models import Feedback, Job
+from reports import report_jobs
+
+def test_superseded_renders_are_deleted(app, make_user, tmp_path, monkeypatch):
+    monkeypatch.setattr(report_jobs.store, 'directory', str(tmp_path))
+    giver, receiver = make_user('giver'), make_user('receiver')
+    feedback = Feedback(giver_id=giver.id, receiver_id=receiver.id, strengths='S', areas_to_improve='A')
+    db.session.add(feedback)
+    db.session.commit()
+    spec = {'feedback_id': feedback.id}
+
+    report_jobs.get_or_render(spec)
+    feedback.strengths = 'Edited'
+    db.session.commit()
+    report_jobs.get_or_render(spec)
+
+    assert len(list(tmp_path.glob('*.pdf'))) == 1
+
+def test_pdf_export_never_queues_a_job(client, make_user):
+    giver, receiver = make_user('giver'), make_user('receiver')
+    feedback = Feedback(giver_id=giver.id, receiver_id=receiver.id, strengths='S', areas_to_improve='A')
+    db.session.add(feedback)
+    db.session.commit()
+
+    response = client.get(f'/api/feedback/{feedback.id}/export?async=1')
+    assert response.mimetype == 'application/pdf'
+    assert Job.query.count() == 0
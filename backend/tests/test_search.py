@@ -0,0 +1,26 @@
+from extensions import db
+from models import Feedback, Comment
+
+PAYLOAD = '<img src=x onerror=alert(1)>'
+
+def test_highlights_escape_stored_markup(client, make_user):
+    giver, receiver = make_user('giver'), make_user('receiver')
+    feedback = Feedback(giver_id=giver.id, receiver_id=receiver.id,
+                        strengths=f'{PAYLOAD} Clear documentation',
+                        areas_to_improve=f'<b>More</b> documentation & {PAYLOAD}')
+    db.session.add(feedback)
+    db.session.flush()
+    db.session.add(Comment(feedback_id=feedback.id, user_id=giver.id, content=f'{PAYLOAD} documentation'))
+    db.session.commit()
+
+    response = client.get('/api/feedback/search?q=documentation')
+    assert response.status_code == 200
+    highlights = response.json['items'][0]['highlights']
+
+    assert highlights['strengths'] == '&lt;img src=x onerror=alert(1)&gt; Clear <mark>documentation</mark>'
+    assert highlights['areas_to_improve'] == (
+        '&lt;b&gt;More&lt;/b&gt; <mark>documentation</mark> &amp; &lt;img src=x onerror=alert(1)&gt;'
+    )
+    assert '<mark>documentation</mark>' in highlights['comments']
+    for text in highlights.values():
+        assert '<img' not in text and '<b>' not in text
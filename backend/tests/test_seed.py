@@ -0,0 +1,22 @@
+from extensions import db
+from seed import seed_synthetic
+from versions import table_versions
+
+def seed():
+    return seed_synthetic(users=30, feedback_per_user=2, log=lambda message: None)
+
+def test_seeding_bumps_table_versions(app):
+    seed()
+    versions = table_versions(['user', 'feedback', 'comment', 'feedback_summary'])
+    assert all(version > 0 for version, _ in versions.values())
+
+def test_reseeded_database_gets_new_etags(app, client):
+    seed()
+    etag = client.get('/api/feedback/').headers['ETag']
+
+    db.drop_all()
+    db.create_all()
+    seed()
+    response = client.get('/api/feedback/', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
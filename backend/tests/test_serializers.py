@@ -0,0 +1,34 @@
+from extensions import db
+from models import Feedback, Comment
+from serializers import feedback_item_schema
+
+def test_fields_selects_what_is_sent(client, make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    feedback = Feedback(giver_id=alice.id, receiver_id=bob.id, strengths='S', areas_to_improve='A', tags=['team'])
+    db.session.add(feedback)
+    db.session.flush()
+    db.session.add(Comment(feedback_id=feedback.id, user_id=bob.id, content='Thanks'))
+    db.session.commit()
+
+    [full] = client.get('/api/feedback/').json['items']
+    assert set(full) == set(feedback_item_schema.fields)
+    assert [comment['content'] for comment in full['comments']] == ['Thanks']
+
+    [item] = client.get('/api/feedback/?fields=id,receiver_name,comment_count').json['items']
+    assert item == {'id': full['id'], 'receiver_name': 'bob', 'comment_count': 1}
+
+    response = client.get('/api/feedback/?fields=id,password_hash')
+    assert (response.status_code, response.json['error']) == (400, 'Unknown fields: password_hash')
+
+def test_expired_rows_serialise_like_loaded_ones(app, make_user):
+    alice, bob = make_user('alice'), make_user('bob')
+    feedback = Feedback(giver_id=alice.id, receiver_id=bob.id, strengths='S', areas_to_improve='A')
+    db.session.add(feedback)
+    db.session.commit()
+    context = {'names': {alice.id: 'alice', bob.id: 'bob'}, 'comments': {feedback.id: []}, 'comment_counts': {}}
+
+    db.session.refresh(feedback)
+    loaded = feedback_item_schema.dump(feedback, context)
+    db.session.expire(feedback)
+    assert feedback_item_schema.dump(feedback, context) == loaded
+    assert (loaded['giver_name'], loaded['tags'], loaded['comment_count']) == ('alice', [], 0)
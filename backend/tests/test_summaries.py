@@ -0,0 +1,24 @@
+from summaries import get_summary, rebuild_summaries
+
+def test_acknowledging_updates_every_scope_once(client, make_user):
+    manager = make_user('manager', role='manager')
+    alice, bob = make_user('alice', manager=manager), make_user('bob', manager=manager)
+    scopes = [('all', 0), ('user', bob.id), ('team', manager.id)]
+
+    def unacknowledged():
+        return [get_summary(*scope)['unacknowledged_count'] for scope in scopes]
+
+    feedback_id = client.post('/api/feedback/', json={
+        'giver_id': alice.id, 'receiver_id': bob.id, 'strengths': 'S', 'areas_to_improve': 'A', 'sentiment': 'positive'
+    }).json['id']
+    assert unacknowledged() == [1, 1, 1]
+
+    # A second acknowledgement must not count twice
+    for _ in range(2):
+        assert client.put(f'/api/feedback/{feedback_id}/acknowledge').status_code == 200
+    assert unacknowledged() == [0, 0, 0]
+    assert get_summary('user', bob.id)['sentiment_counts']['positive'] == 1
+
+    incremental = [get_summary(*scope) for scope in scopes]
+    rebuild_summaries()
+    assert [get_summary(*scope) for scope in scopes] == incremental
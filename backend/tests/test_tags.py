@@ -0,0 +1,18 @@
+import pytest
+from tags import MAX_TAGS, MAX_TAG_LENGTH
+
+@pytest.mark.parametrize('tags, error', [
+    (['x' * (MAX_TAG_LENGTH + 1)], f'Tags must be at most {MAX_TAG_LENGTH} characters'),
+    ([f'tag{n}' for n in range(MAX_TAGS + 1)], f'At most {MAX_TAGS} tags per feedback item'),
+    ('teamwork', 'tags must be a list'),
+])
+def test_invalid_tags_are_rejected(client, make_user, tags, error):
+    giver, receiver = make_user('giver'), make_user('receiver')
+    item = {'receiver_id': receiver.id, 'strengths': 'S', 'areas_to_improve': 'A', 'tags': tags}
+
+    response = client.post('/api/feedback/', json=item)
+    assert (response.status_code, response.json['error']) == (400, error)
+
+    response = client.post('/api/feedback/bulk', json={'items': [item, dict(item, tags=['x' * MAX_TAG_LENGTH])]})
+    assert response.status_code == 207
+    assert [result.get('error') for result in response.json['results']] == [error, None]
@@ -0,0 +1,89 @@
+import pytest
+from extensions import db
+from models import Feedback, Comment, FeedbackRequest
+from summaries import record_feedback
+from hierarchy import is_report
+from tags import set_feedback_tags
+from reports import report_jobs, report_key
+
+@pytest.fixture
+def org(make_user):
+    """root -> manager -> report, plus an unrelated other_manager -> outsider"""
+    root = make_user('root', role='manager')
+    manager = make_user('manager', role='manager', manager=root)
+    report = make_user('report', manager=manager)
+    other_manager = make_user('other_manager', role='manager', manager=root)
+    outsider = make_user('outsider', manager=other_manager)
+    for receiver in (manager, report, report, outsider):
+        feedback = Feedback(giver_id=root.id, receiver_id=receiver.id, strengths='S', areas_to_improve='A')
+        db.session.add(feedback)
+        record_feedback(feedback)
+    db.session.commit()
+    return root, manager, report, other_manager, outsider
+
+def receivers(client, path, headers=None):
+    return sorted(item['receiver_name'] for item in client.get(path, headers=headers).json['items'])
+
+def test_listing_and_dashboard_agree_on_a_team(client, org):
+    manager = org[1]
+    listed = receivers(client, f'/api/feedback/?team_id={manager.id}')
+    dashboard = client.get(f'/api/feedback/dashboard?team_id={manager.id}').json
+    assert listed == ['manager', 'report', 'report']
+    assert dashboard['total_feedback'] == len(listed)
+    assert dashboard['team_size'] == 2
+
+def test_callers_are_limited_to_their_own_org(client, org, login):
+    root, manager, report, other_manager, outsider = org
+    headers = login('manager')
+
+    assert receivers(client, '/api/feedback/', headers) == ['manager', 'report', 'report']
+    # Another org's team_id is clamped to the caller's own
+    assert receivers(client, f'/api/feedback/?team_id={other_manager.id}', headers) == ['manager', 'report', 'report']
+    assert receivers(client, f'/api/feedback/?team_id={report.id}', headers) == ['report', 'report']
+    assert client.get('/api/feedback/dashboard', headers=headers).json['total_feedback'] == 3
+    assert client.get(f'/api/feedback/dashboard?receiver_id={outsider.id}', headers=headers).status_code == 403
+
+    headers = login('report')
+    assert receivers(client, f'/api/feedback/?team_id={manager.id}', headers) == ['report', 'report']
+    assert client.get('/api/feedback/dashboard', headers=headers).json['total_feedback'] == 2
+
+def test_is_report_follows_the_manager_chain(app, org):
+    root, manager, report, other_manager, outsider = org
+    assert is_report(root.id, report.id) and is_report(manager.id, report.id)
+    assert not is_report(manager.id, outsider.id)
+    assert not is_report(report.id, manager.id)
+    assert not is_report(manager.id, manager.id)
+
+def test_other_read_paths_are_limited_to_the_callers_org(client, org, login):
+    root, manager, report, other_manager, outsider = org
+    feedback = Feedback.query.filter_by(receiver_id=manager.id).first()
+    set_feedback_tags(feedback, ['secret'])
+    db.session.add_all([
+        Comment(feedback_id=feedback.id, user_id=root.id, content='Comment'),
+        FeedbackRequest(requester_id=report.id, receiver_id=manager.id, message='Please')
+    ])
+    db.session.commit()
+    spec = {'team_id': manager.id}
+    report_jobs.get_or_render(spec)
+    key = report_key(spec)
+    headers = login('outsider')
+
+    users = client.get('/api/users/?fields=username,feedback_received', headers=headers).json['items']
+    assert [user['username'] for user in users] == ['outsider']
+    assert client.get(f'/api/feedback/{feedback.id}/comments', headers=headers).status_code == 404
+    assert client.get(f'/api/feedback/{feedback.id}/export', headers=headers).status_code == 404
+    assert client.post('/api/feedback/reports', headers=headers, json=spec).status_code == 403
+    assert client.post('/api/feedback/reports', headers=headers, json={'feedback_id': feedback.id}).status_code == 403
+    assert client.get(f'/api/feedback/reports/{key}', headers=headers).status_code == 404
+    assert client.get(f'/api/feedback/reports/{key}/download', headers=headers).status_code == 404
+    assert client.get('/api/feedback/requests', headers=headers).json['items'] == []
+    assert client.get('/api/feedback/tags', headers=headers).json == []
+
+    headers = login('manager')
+    users = client.get('/api/users/', headers=headers).json['items']
+    assert sorted(user['username'] for user in users) == ['manager', 'report']
+    assert len(client.get(f'/api/feedback/{feedback.id}/comments', headers=headers).json['items']) == 1
+    assert client.get(f'/api/feedback/{feedback.id}/export', headers=headers).status_code == 200
+    assert client.get(f'/api/feedback/reports/{key}/download', headers=headers).status_code == 200
+    assert len(client.get('/api/feedback/requests', headers=headers).json['items']) == 1
+    assert client.get('/api/feedback/tags', headers=headers).json == [{'tag': 'secret', 'count': 1}]
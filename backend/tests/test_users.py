@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta
+from extensions import db
+from models import Feedback
+from summaries import record_feedback
+
+def test_received_feedback_is_opt_in_and_capped(app, client, make_user):
+    giver, receiver = make_user('giver'), make_user('receiver')
+    start = datetime(2024, 1, 1)
+    for day in range(5):
+        feedback = Feedback(giver_id=giver.id, receiver_id=receiver.id, strengths=f'Day {day}', areas_to_improve='A',
+                            sentiment='positive' if day % 2 else 'neutral', created_at=start + timedelta(days=day))
+        db.session.add(feedback)
+        record_feedback(feedback)
+    db.session.commit()
+    app.config['USERS_RECEIVED_FEEDBACK_LIMIT'] = 3
+
+    users = {user['username']: user for user in client.get('/api/users/').json['items']}
+    assert 'feedback_received' not in users['receiver']
+    assert users['receiver']['feedback_summary']['total_feedback'] == 5
+    assert users['receiver']['feedback_summary']['sentiment_counts']['positive'] == 2
+    assert users['giver']['feedback_summary']['total_feedback'] == 0
+
+    users = {user['username']: user for user in client.get('/api/users/?fields=username,feedback_received').json['items']}
+    assert [item['strengths'] for item in users['receiver']['feedback_received']] == ['Day 2', 'Day 3', 'Day 4']
+    assert users['giver']['feedback_received'] == []
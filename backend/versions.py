@@ -0,0 +1,68 @@
+from datetime import datetime
+from sqlalchemy import event, select, update, insert
+from extensions import db
+from models import TableVersion
+
+# Per-table change sequence. Every ORM flush and every ORM-enabled bulk
+# INSERT/UPDATE/DELETE bumps the version of the tables it writes, inside
+# the same transaction, so readers on any worker see a version change
+# exactly when the data changes.
+
+_table = TableVersion.__table__
+
+# Tables no cached response depends on
+_UNVERSIONED = {_table.name, 'job'}
+
+def _bump(session, table_names):
+    table_names = set(table_names) - _UNVERSIONED
+    if not table_names:
+        return
+    connection = session.connection()
+    now = datetime.utcnow()
+    updated = connection.execute(
+        update(_table)
+        .where(_table.c.name.in_(table_names))
+        .values(version=_table.c.version + 1, changed_at=now)
+    ).rowcount
+    if updated < len(table_names):
+        existing = set(connection.scalars(select(_table.c.name).where(_table.c.name.in_(table_names))))
+        connection.execute(insert(_table), [
+            {'name': name, 'version': 1, 'changed_at': now}
+            for name in table_names - existing
+        ])
+
+def _after_flush(session, flush_context):
+    _bump(session, {
+        obj.__table__.name
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted)
+        if hasattr(obj, '__table__')
+    })
+
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None:
+            _bump(orm_execute_state.session, {mapper.local_table.name})
+
+def register_version_hooks():
+    """Bump table versions whenever the ORM writes"""
+    if event.contains(db.session, 'after_flush', _after_flush):
+        return
+    event.listen(db.session, 'after_flush', _after_flush)
+    event.listen(db.session, 'do_orm_execute', _on_orm_execute)
+
+def bump_versions(table_names):
+    """Bump tables written outside the ORM (Core executemany, raw SQL), in
+    the current transaction"""
+    _bump(db.session, table_names)
+
+def table_versions(table_names):
+    """Current (version, changed_at) of each table, in one query"""
+    rows = db.session.execute(
+        select(_table.c.name, _table.c.version, _table.c.changed_at)
+        .where(_table.c.name.in_(table_names))
+    )
+    versions = {name: (0, None) for name in table_names}
+    for name, version, changed_at in rows:
+        versions[name] = (version, changed_at)
+    return versions
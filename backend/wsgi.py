@@ -0,0 +1,12 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from app import create_app
+from jobs import job_worker
+
+app = create_app()
+# Each server process runs JOBS_WORKERS job threads (started here, or by
+# the first request; see jobs.init_job_worker); set it to 0 to run jobs
+# only in dedicated `flask run-jobs` processes.
+job_worker.start(app)
@@ -1,5 +1,5 @@
-import React from 'react';
-import { useQuery } from 'react-query';
+import React, { useEffect } from 'react';
+import { useQuery, useQueryClient } from 'react-query';
 import { useNavigate } from 'react-router-dom';
 import { 
   Users, 
@@ -24,6 +24,9 @@ import { DashboardData, Feedback, FeedbackRequest } from '../types';
 
 const Dashboard: React.FC = () => {
   const navigate = useNavigate();
+  const queryClient = useQueryClient();
+  const storedUser = localStorage.getItem('user');
+  const userId: number | null = storedUser ? JSON.parse(storedUser).id : null;
   
   const { data: dashboardData, isLoading, error } = useQuery<DashboardData>(
     'dashboard',
@@ -33,14 +36,23 @@ const Dashboard: React.FC = () => {
     }
   );
 
+  // The signed-in user's own notifications, refreshed whenever the
+  // long-poll below reports a new one
   const { data: notifications } = useQuery(
-    'notifications',
-    notificationAPI.getAll,
+    'inbox',
+    notificationAPI.getInbox,
     {
-      refetchInterval: 10000, // Refetch every 10 seconds
+      enabled: !!userId,
     }
   );
 
+  useEffect(() => {
+    if (!userId) return;
+    return notificationAPI.subscribe(() => {
+      queryClient.invalidateQueries('inbox');
+    });
+  }, [userId, queryClient]);
+
   if (isLoading) {
     return (
       <div className="flex items-center justify-center h-64">
@@ -25,13 +25,12 @@ const TeamPage: React.FC = () => {
 
   const getPerformanceScore = (member: any) => {
     // Calculate performance score based on feedback sentiment
-    if (!member.feedback_received || member.feedback_received.length === 0) {
+    const summary = member.feedback_summary;
+    if (!summary || summary.total_feedback === 0) {
       return 'N/A';
     }
     
-    const positiveCount = member.feedback_received.filter((f: any) => f.sentiment === 'positive').length;
-    const totalCount = member.feedback_received.length;
-    const score = Math.round((positiveCount / totalCount) * 100);
+    const score = Math.round((summary.sentiment_counts.positive / summary.total_feedback) * 100);
     
     return `${score}%`;
   };
@@ -139,7 +138,7 @@ const TeamPage: React.FC = () => {
                     Active Members
                   </dt>
                   <dd className="text-lg font-medium text-gray-900">
-                    {teamMembers?.filter((m: any) => m.feedback_received && m.feedback_received.length > 0).length || 0}
+                    {teamMembers?.filter((m: any) => m.feedback_summary && m.feedback_summary.total_feedback > 0).length || 0}
                   </dd>
                 </dl>
               </div>
@@ -168,7 +167,7 @@ const TeamPage: React.FC = () => {
                     <div className="flex items-center text-sm text-gray-600"><Calendar className="w-4 h-4 mr-2" />Joined {new Date(member.created_at).toLocaleDateString()}</div>
                     <div className="flex items-center text-sm text-gray-600"><Award className="w-4 h-4 mr-2" />Performance: {getPerformanceScore(member)}</div>
                     <div className="flex items-center text-sm text-gray-600"><TrendingUp className="w-4 h-4 mr-2" />Feedback Given: {member.feedback_given ? member.feedback_given.length : 0}</div>
-                    <div className="flex items-center text-sm text-gray-600"><TrendingUp className="w-4 h-4 mr-2" />Feedback Received: {member.feedback_received ? member.feedback_received.length : 0}</div>
+                    <div className="flex items-center text-sm text-gray-600"><TrendingUp className="w-4 h-4 mr-2" />Feedback Received: {member.feedback_summary ? member.feedback_summary.total_feedback : 0}</div>
                     {member.tags && member.tags.length > 0 && (
                       <div className="flex flex-wrap gap-1 mt-1">
                         {member.tags.map((tag: string, idx: number) => (
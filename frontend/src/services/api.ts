@@ -20,11 +20,26 @@ const api = axios.create({
   },
 });
 
+// Request interceptor to send the stored JWT
+api.interceptors.request.use((config) => {
+  const token = localStorage.getItem('token');
+  if (token) {
+    config.headers.Authorization = `Bearer ${token}`;
+  }
+  return config;
+});
+
 // Response interceptor to handle errors
 api.interceptors.response.use(
   (response) => response,
   (error) => {
     console.log('API Error:', error.response?.status, error.response?.data, 'URL:', error.config?.url);
+    // An expired token: sign out so the login page is shown again
+    if (error.response?.status === 401 && localStorage.getItem('token') && !error.config?.url?.startsWith('/auth/login')) {
+      localStorage.removeItem('token');
+      localStorage.removeItem('user');
+      window.location.reload();
+    }
     return Promise.reject(error);
   }
 );
@@ -49,15 +64,22 @@ export const authAPI = {
 
 // Feedback API
 export const feedbackAPI = {
-  getAll: () => api.get('/feedback/').then(res => res.data),
+  getAll: () => api.get('/feedback/').then(res => res.data.items),
   
   getDashboard: () => api.get('/feedback/dashboard').then(res => res.data),
   
   submit: (data: any) => api.post('/feedback/', data).then(res => res.data),
   
+  submitBulk: (items: any[]) => api.post('/feedback/bulk', { items }).then(res => res.data),
+  
   requestFeedback: (data: any) => api.post('/feedback/request', data).then(res => res.data),
   
-  getRequests: () => api.get('/feedback/requests').then(res => res.data),
+  requestFeedbackBulk: (items: any[]) => api.post('/feedback/requests/bulk', { items }).then(res => res.data),
+  
+  getRequests: () => api.get('/feedback/requests').then(res => res.data.items),
+  
+  getComments: (feedbackId: number, cursor?: string) =>
+    api.get(`/feedback/${feedbackId}/comments`, { params: { cursor } }).then(res => res.data),
   
   submitComment: (feedbackId: number, data: any) => 
     api.post(`/feedback/${feedbackId}/comments`, data).then(res => res.data),
@@ -65,15 +87,25 @@ export const feedbackAPI = {
   exportPDF: (feedbackId: number) => 
     api.get(`/feedback/${feedbackId}/export`, { responseType: 'blob' }).then(res => res.data),
   
-  getTeamMembers: () => api.get('/users/team').then(res => res.data),
+  createReport: (spec: { feedback_id?: number; receiver_id?: number; team_id?: number; created_after?: string; created_before?: string }) =>
+    api.post('/feedback/reports', spec).then(res => res.data),
+  
+  getReport: (jobId: string) => api.get(`/feedback/reports/${jobId}`).then(res => res.data),
+  
+  getTeamMembers: () => api.get('/feedback/team').then(res => res.data.items),
   
   getByTags: (tags: string[]) => 
-    api.get('/feedback/by-tags', { params: { tags: tags.join(',') } }).then(res => res.data),
+    api.get('/feedback/by-tags', { params: { tags: tags.join(',') } }).then(res => res.data.items),
+  
+  search: (q: string, filters: { receiver_id?: number; sentiment?: string; tags?: string[]; cursor?: string } = {}) =>
+    api.get('/feedback/search', {
+      params: { ...filters, q, tags: filters.tags ? filters.tags.join(',') : undefined }
+    }).then(res => res.data),
 };
 
 // User API
 export const userAPI = {
-  getAll: () => api.get('/users/').then(res => res.data),
+  getAll: () => api.get('/users/').then(res => res.data.items),
   
   getProfile: (id: number) => api.get(`/users/${id}`).then(res => res.data),
   
@@ -89,11 +121,41 @@ export const healthAPI = {
 };
 
 export const notificationAPI = {
-  getAll: () => api.get('/notifications/').then(res => res.data),
+  getAll: () => api.get('/notifications/').then(res => res.data.items),
   
   markAsRead: (id: number) => api.put(`/notifications/${id}/read`).then(res => res.data),
   
+  getInbox: () => api.get('/notifications/inbox').then(res => res.data.items),
+  
+  getUnreadCount: () => api.get('/notifications/unread-count').then(res => res.data.unread_count),
+  
+  markManyAsRead: (ids: number[]) => api.put('/notifications/read', { ids }).then(res => res.data),
+  
+  markAllAsRead: () => api.put('/notifications/read', { all: true }).then(res => res.data),
+  
   send: (data: any) => api.post('/notifications/', data).then(res => res.data),
+  
+  // Long-polls for new notifications until the returned function is called.
+  // The server answers as soon as one arrives; when it is too busy to wait
+  // (retry_after) or a request fails, the next poll is delayed instead.
+  subscribe: (onNotification: (notification: any) => void) => {
+    const controller = new AbortController();
+    const sleep = (seconds: number) => new Promise(resolve => setTimeout(resolve, seconds * 1000));
+    (async () => {
+      let after: number | undefined;
+      while (!controller.signal.aborted) {
+        try {
+          const { data } = await api.get('/notifications/poll', { params: { after }, signal: controller.signal });
+          data.items.forEach(onNotification);
+          after = data.last_id;
+          if (data.retry_after) await sleep(data.retry_after);
+        } catch {
+          if (!controller.signal.aborted) await sleep(30);
+        }
+      }
+    })();
+    return () => controller.abort();
+  },
 };
 
 export default api; 
\ No newline at end of file
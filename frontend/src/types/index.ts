@@ -32,10 +32,20 @@ export interface Feedback {
   sentiment: 'positive' | 'neutral' | 'negative';
   acknowledged: boolean;
   acknowledged_at?: string;
+  comment_count?: number;
   created_at: string;
   updated_at: string;
 }
 
+export interface FeedbackSearchResult extends Feedback {
+  rank: number;
+  highlights: {
+    strengths: string;
+    areas_to_improve: string;
+    comments: string | null;
+  };
+}
+
 export interface FeedbackRequest {
   id: number;
   requester_id: number;
@@ -60,6 +70,8 @@ export interface DashboardData {
   team_size?: number;
   team_members?: User[];
   acknowledged_count?: number;
+  unacknowledged_count?: number;
+  open_requests?: number;
   feedback_requests: FeedbackRequest[];
 }
 